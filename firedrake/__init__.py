@@ -55,6 +55,8 @@ from firedrake.interpolation import *
 from firedrake.output import *
 from firedrake.linear_solver import *
 from firedrake.preconditioners import *
+from firedrake.memory import *
+from firedrake.performance import *
 from firedrake.mesh import *
 from firedrake.mg.mesh import *
 from firedrake.mg.interface import *
@@ -123,7 +123,8 @@ def allocate_matrix(f, bcs=None, form_compiler_parameters=None,
 
 
 def create_assembly_callable(f, tensor=None, bcs=None, form_compiler_parameters=None,
-                             inverse=False, mat_type=None, sub_mat_type=None):
+                             inverse=False, mat_type=None, sub_mat_type=None,
+                             diagonal=False):
     r"""Create a callable object than be used to assemble f into a tensor.
 
     This is really only designed to be used inside residual and
@@ -142,6 +143,7 @@ def create_assembly_callable(f, tensor=None, bcs=None, form_compiler_parameters=
                       form_compiler_parameters=form_compiler_parameters,
                       inverse=inverse, mat_type=mat_type,
                       sub_mat_type=sub_mat_type,
+                      diagonal=diagonal,
                       collect_loops=True)
 
     def thunk():
@@ -156,7 +158,8 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
               appctx={},
               options_prefix=None,
               collect_loops=False,
-              allocate_only=False):
+              allocate_only=False,
+              diagonal=False):
     r"""Assemble the form or Slate expression f and return a Firedrake object
     representing the result. This will be a :class:`float` for 0-forms/rank-0
     Slate tensors, a :class:`.Function` for 1-forms/rank-1 Slate tensors and
@@ -178,6 +181,9 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
          matrix if an implicit matrix is requested (mat_type "matfree").
     :arg options_prefix: An options prefix for the PETSc matrix
         (ignored if not assembling a bilinear form).
+    :arg diagonal: (optional) if f is a 2-form, assemble only its
+        diagonal into a :class:`.Function` on the test space.
+        Boundary conditions are not applied.
     """
     if mat_type is None:
         mat_type = parameters.parameters["default_matrix_type"]
@@ -193,6 +199,8 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
     else:
         form_compiler_parameters = {}
     form_compiler_parameters["assemble_inverse"] = inverse
+    if diagonal:
+        form_compiler_parameters["assemble_diagonal"] = diagonal
 
     topology = f.ufl_domains()[0].topology
     for m in f.ufl_domains():
@@ -207,6 +215,19 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
         if domain is not None and domain.topology != topology:
             raise NotImplementedError("Assembly with multiple meshes not supported.")
 
+    rank = len(f.arguments())
+
+    if diagonal:
+        if rank != 2 or inverse:
+            raise ValueError("Can only assemble the diagonal of a 2-form")
+        test, trial = f.arguments()
+        if test.function_space() != trial.function_space():
+            raise ValueError("Can only assemble the diagonal of a 2-form with the same test and trial space")
+        if isinstance(f, slate.TensorBase):
+            raise NotImplementedError("Assembling the diagonal of Slate tensors not implemented")
+        if bcs:
+            raise NotImplementedError("Boundary conditions are not applied to assembled diagonals")
+
     if isinstance(f, slate.TensorBase):
         kernels = slac.compile_expression(f, tsfc_parameters=form_compiler_parameters)
         integral_types = [kernel.kinfo.integral_type for kernel in kernels]
@@ -214,10 +235,8 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
         kernels = tsfc_interface.compile_form(f, "form", parameters=form_compiler_parameters, inverse=inverse)
         integral_types = [integral.integral_type() for integral in f.integrals()]
 
-    rank = len(f.arguments())
-
-    is_mat = rank == 2
-    is_vec = rank == 1
+    is_mat = rank == 2 and not diagonal
+    is_vec = rank == 1 or diagonal
 
     if any((coeff.function_space() and coeff.function_space().component is not None)
            for coeff in f.coefficients()):
@@ -410,7 +429,8 @@ def _assemble(f, tensor=None, bcs=None, form_compiler_parameters=None,
             if is_mat:
                 i, j = indices
             elif is_vec:
-                i, = indices
+                # The diagonal is assembled from the (i, i) blocks
+                i = indices[0]
             else:
                 assert len(indices) == 0
 
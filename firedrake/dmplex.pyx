@@ -25,6 +25,36 @@ FACE_SETS_LABEL = "Face Sets"
 CELL_SETS_LABEL = "Cell Sets"
 
 
+def create_from_distributed_cell_list(PetscInt dim,
+                                      np.ndarray[int, ndim=2, mode="c"] cells,
+                                      np.ndarray[PetscReal, ndim=2, mode="c"] coords,
+                                      MPI.Comm comm not None):
+    """Create a distributed, interpolated DMPlex from per-process cell lists.
+
+    :arg dim: The topological dimension of the mesh
+    :arg cells: The vertices of the local cells, in the global vertex
+         numbering
+    :arg coords: The coordinates of the vertices owned by this
+         process.  Each process owns a contiguous block of the global
+         vertex numbering, ordered by rank.
+    :arg comm: The communicator to build the mesh on.
+
+    The pieces are connected through the point star forest of the
+    returned Plex, no process ever holds the whole mesh.
+    """
+    cdef:
+        PETSc.DMPlex plex = PETSc.DMPlex()
+
+    CHKERR(DMPlexCreateFromCellListParallel(comm.ob_mpi, dim,
+                                            cells.shape[0], coords.shape[0],
+                                            cells.shape[1], PETSC_TRUE,
+                                            <const int *>cells.data,
+                                            coords.shape[1],
+                                            <const PetscReal *>coords.data,
+                                            NULL, &plex.dm))
+    return plex
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 def facet_numbering(PETSc.DM plex, kind,
@@ -867,6 +897,46 @@ def reordered_coords(PETSc.DM plex, PETSc.Section global_numbering, shape):
 
     return coords
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def cell_centroids(PETSc.DM plex):
+    """Return the vertex average of each cell of the plex, in plex
+    cell order.
+
+    :arg plex: The DMPlex object encapsulating the mesh topology
+    """
+    cdef:
+        PetscInt c, cStart, cEnd, v, vStart, vEnd, ci, i, p, nverts
+        PetscInt nclosure, dim
+        PetscInt *closure = NULL
+        np.ndarray[PetscReal, ndim=2, mode="c"] plex_coords, centroids
+
+    cStart, cEnd = plex.getHeightStratum(0)
+    vStart, vEnd = plex.getDepthStratum(0)
+    dim = plex.getCoordinateDim()
+    plex_coords = plex.getCoordinatesLocal().array_r.reshape(-1, dim)
+    centroids = np.zeros((cEnd - cStart, dim), dtype=np.double)
+
+    for c in range(cStart, cEnd):
+        CHKERR(DMPlexGetTransitiveClosure(plex.dm, c,
+                                          PETSC_TRUE,
+                                          &nclosure,
+                                          &closure))
+        nverts = 0
+        for ci in range(nclosure):
+            p = closure[2*ci]
+            if vStart <= p < vEnd:
+                nverts += 1
+                for i in range(dim):
+                    centroids[c - cStart, i] += plex_coords[p - vStart, i]
+        for i in range(dim):
+            centroids[c - cStart, i] /= nverts
+    if closure != NULL:
+        CHKERR(DMPlexRestoreTransitiveClosure(plex.dm, 0, PETSC_TRUE,
+                                              NULL, &closure))
+    return centroids
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 def mark_entity_classes(PETSc.DM plex):
@@ -1280,6 +1350,126 @@ def plex_renumbering(PETSc.DM plex,
                                perm, PETSC_OWN_POINTER))
     return perm_is
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def get_cones(PETSc.DM plex):
+    """Return the cone sizes, cones and cone orientations of all
+    points in a Plex, flattened in chart order.
+
+    :arg plex: The DMPlex object encapsulating the mesh topology
+    """
+    cdef:
+        PetscInt pStart, pEnd, p, i, size, offset
+        PetscInt *cone = NULL
+        PetscInt *orientation = NULL
+        np.ndarray[PetscInt, ndim=1, mode="c"] cone_sizes, cones, orientations
+
+    pStart, pEnd = plex.getChart()
+    cone_sizes = np.empty(pEnd - pStart, dtype=IntType)
+    for p in range(pStart, pEnd):
+        CHKERR(DMPlexGetConeSize(plex.dm, p, &size))
+        cone_sizes[p - pStart] = size
+
+    cones = np.empty(np.sum(cone_sizes), dtype=IntType)
+    orientations = np.empty_like(cones)
+    offset = 0
+    for p in range(pStart, pEnd):
+        CHKERR(DMPlexGetCone(plex.dm, p, &cone))
+        CHKERR(DMPlexGetConeOrientation(plex.dm, p, &orientation))
+        for i in range(cone_sizes[p - pStart]):
+            cones[offset + i] = cone[i]
+            orientations[offset + i] = orientation[i]
+        offset += cone_sizes[p - pStart]
+    return cone_sizes, cones, orientations
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def set_cones(PETSc.DM plex,
+              np.ndarray[PetscInt, ndim=1, mode="c"] cone_sizes,
+              np.ndarray[PetscInt, ndim=1, mode="c"] cones,
+              np.ndarray[PetscInt, ndim=1, mode="c"] orientations):
+    """Set the topology of a Plex from flattened cone data (as
+    returned by :func:`get_cones`).
+
+    :arg plex: The DMPlex object, its chart must already be set.
+    :arg cone_sizes: The number of cone points of each point.
+    :arg cones: The cone points, flattened in chart order.
+    :arg orientations: The cone orientations, flattened in chart order.
+
+    The Plex is symmetrized and stratified on exit.
+    """
+    cdef:
+        PetscInt pStart, pEnd, p, offset
+
+    pStart, pEnd = plex.getChart()
+    assert cone_sizes.shape[0] == pEnd - pStart
+    for p in range(pStart, pEnd):
+        CHKERR(DMPlexSetConeSize(plex.dm, p, cone_sizes[p - pStart]))
+    plex.setUp()
+    offset = 0
+    for p in range(pStart, pEnd):
+        if cone_sizes[p - pStart] > 0:
+            CHKERR(DMPlexSetCone(plex.dm, p, &cones[offset]))
+            CHKERR(DMPlexSetConeOrientation(plex.dm, p, &orientations[offset]))
+        offset += cone_sizes[p - pStart]
+    plex.symmetrize()
+    plex.stratify()
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def set_label_values(PETSc.DM plex, name,
+                     np.ndarray[PetscInt, ndim=1, mode="c"] points,
+                     np.ndarray[PetscInt, ndim=1, mode="c"] values):
+    """Mark points of a Plex in a (new) label.
+
+    :arg plex: The DMPlex object encapsulating the mesh topology
+    :arg name: The name of the label (created if it does not exist)
+    :arg points: The points to mark.
+    :arg values: The label value of each point.
+    """
+    cdef:
+        PetscInt i
+        DMLabel label = NULL
+
+    plex.createLabel(name)
+    CHKERR(DMGetLabel(plex.dm, name.encode(), &label))
+    for i in range(points.shape[0]):
+        CHKERR(DMLabelSetValue(label, points[i], values[i]))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def set_vertex_coordinates(PETSc.DM plex,
+                           np.ndarray[PetscReal, ndim=2, mode="c"] coords):
+    """Set the (local) coordinates of the vertices of a Plex.
+
+    :arg plex: The DMPlex object encapsulating the mesh topology
+    :arg coords: The coordinates of each vertex, in vertex order.
+    """
+    cdef:
+        PetscInt v, vStart, vEnd, cdim
+        PETSc.Section section
+
+    vStart, vEnd = plex.getDepthStratum(0)
+    cdim = coords.shape[1]
+    assert coords.shape[0] == vEnd - vStart
+    plex.setCoordinateDim(cdim)
+    section = plex.getCoordinateSection()
+    section.setNumFields(1)
+    section.setFieldComponents(0, cdim)
+    section.setChart(vStart, vEnd)
+    for v in range(vStart, vEnd):
+        CHKERR(PetscSectionSetDof(section.sec, v, cdim))
+        CHKERR(PetscSectionSetFieldDof(section.sec, v, 0, cdim))
+    section.setUp()
+    vec = PETSc.Vec().createWithArray(coords.reshape(-1).copy(),
+                                      bsize=cdim, comm=PETSc.COMM_SELF)
+    vec.setName("coordinates")
+    plex.setCoordinatesLocal(vec)
+
+
 @cython.boundscheck(False)
 @cython.wraparound(False)
 def get_cell_remote_ranks(PETSc.DM plex):
@@ -3,6 +3,7 @@ import sys
 import ufl
 import ctypes
 from collections import OrderedDict
+from contextlib import contextmanager
 from ctypes import POINTER, c_int, c_double, c_void_p
 
 from pyop2 import op2
@@ -642,3 +643,31 @@ def make_c_evaluate(function, c_name="evaluate", ldargs=None, tolerance=None):
                             + ["-I%s/include" % d for d in get_petsc_dir()],
                             ldargs=ldargs,
                             comm=function.comm)
+
+
+@contextmanager
+def vec_storage(f, vec, access):
+    """Temporarily give a function the values of a PETSc Vec.
+
+    :arg f: the :class:`Function` (or :class:`CoordinatelessFunction`).
+    :arg vec: a PETSc Vec with the layout of the function's dof dataset.
+    :arg access: the access to the data inside the context, one of
+        ``op2.READ`` (the function is only read, and takes the
+        values of the Vec), ``op2.WRITE`` (the function is written,
+        and the Vec takes its values) or ``op2.RW``.
+
+    The values are copied in (unless ``access`` is ``op2.WRITE``)
+    and out (unless ``access`` is ``op2.READ``, or the context exits
+    with an exception).  PyOP2 has no public interface to wrap
+    external storage in a Dat, and cached objects built on the dat
+    (its zeroing parloops and Vec, for example) refer to its own
+    storage, so the dat always keeps it.
+    """
+    dat = f.dat
+    if access is not op2.WRITE:
+        with dat.vec_wo as v:
+            vec.copy(v)
+    yield
+    if access is not op2.READ:
+        with dat.vec_ro as v:
+            v.copy(vec)
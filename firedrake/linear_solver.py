@@ -1,10 +1,17 @@
+import numpy
+from ufl import as_ufl
+from ufl.algorithms import extract_coefficients
+
+from pyop2 import op2
+from pyop2.mpi import MPI
+
 from firedrake.exceptions import ConvergenceError
 import firedrake.function as function
 import firedrake.vector as vector
 import firedrake.matrix as matrix
 import firedrake.solving_utils as solving_utils
 from firedrake.petsc import PETSc, OptionsManager
-from firedrake.utils import cached_property
+from firedrake.utils import cached_property, dat_version
 from firedrake.ufl_expr import action
 
 
@@ -15,7 +22,7 @@ class LinearSolver(OptionsManager):
 
     def __init__(self, A, P=None, solver_parameters=None,
                  nullspace=None, transpose_nullspace=None,
-                 near_nullspace=None, options_prefix=None):
+                 near_nullspace=None, options_prefix=None, ksp=None):
         """A linear solver for assembled systems (Ax = b).
 
         :arg A: a :class:`~.MatrixBase` (the operator).
@@ -35,6 +42,10 @@ class LinearSolver(OptionsManager):
                created.  Use this option if you want to pass options
                to the solver from the command line in addition to
                through the ``solver_parameters`` dict.
+        :kwarg ksp: an optional PETSc KSP, already configured from
+               the options, to solve with (for example the KSP of a
+               nonlinear solver), so that its preconditioner is
+               shared.  If not provided a new KSP is created.
 
         .. note::
 
@@ -66,12 +77,15 @@ class LinearSolver(OptionsManager):
             # Otherwise, mixed problems default to jacobi.
             self.set_default_parameter("pc_type", "jacobi")
 
-        self.ksp = PETSc.KSP().create(comm=self.comm)
+        if ksp is None:
+            self.ksp = PETSc.KSP().create(comm=self.comm)
 
-        W = self.test_space
-        # DM provides fieldsplits (but not operators)
-        self.ksp.setDM(W.dm)
-        self.ksp.setDMActive(False)
+            W = self.test_space
+            # DM provides fieldsplits (but not operators)
+            self.ksp.setDM(W.dm)
+            self.ksp.setDMActive(False)
+        else:
+            self.ksp = ksp
 
         if nullspace is not None:
             nullspace._apply(self.A)
@@ -97,9 +111,10 @@ class LinearSolver(OptionsManager):
         self.A.force_evaluation()
         self.P.force_evaluation()
         self.ksp.setOperators(A=self.A.petscmat, P=self.P.petscmat)
-        # Set from options now (we're not allowed to change parameters
-        # anyway).
-        self.set_from_options(self.ksp)
+        if ksp is None:
+            # Set from options now (we're not allowed to change parameters
+            # anyway).
+            self.set_from_options(self.ksp)
 
     @cached_property
     def test_space(self):
@@ -113,31 +128,97 @@ class LinearSolver(OptionsManager):
     def _rhs(self):
         from firedrake.assemble import create_assembly_callable
         u = function.Function(self.trial_space)
+        lift = function.Function(self.test_space)
         b = function.Function(self.test_space)
         expr = -action(self.A.a, u)
-        return u, create_assembly_callable(expr, tensor=b), b
+        return u, create_assembly_callable(expr, tensor=lift), lift, b
 
-    def _lifted(self, b):
-        u, update, blift = self._rhs
+    def _lifting_state(self, u):
+        """The state the lifting of the boundary conditions depends on.
+
+        :arg u: a :class:`.Function` for the boundary values.
+        :returns: a tuple of the objects the lifting depends on (the
+            operator, its boundary conditions and their values), and
+            either the versions or the values of the data it depends
+            on (the coefficients of the boundary values and of the
+            operator, and the mesh coordinates).
+
+        The versions are used where PyOP2 tracks them (see
+        :func:`~.utils.dat_version`), otherwise ``u`` is set to the
+        boundary values, and its values are used (rather than those of
+        the coefficients of the boundary values).
+        """
+        def values(dat):
+            if isinstance(dat, op2.Global):
+                return [dat.data_ro]
+            return [d.data_ro for d in dat.split]
+
+        bcs = tuple(self.A.bcs)
+        args = tuple(bc.function_arg for bc in bcs)
+        objects = (self.A.a, ) + bcs + args
+        dats = [c.dat for c in self.A.a.coefficients()]
+        dats.extend(m.coordinates.dat for m in self.A.a.ufl_domains())
+        bc_dats = [c.dat for g in args for c in extract_coefficients(as_ufl(g))]
+        versions = tuple(map(dat_version, dats + bc_dats))
+        if None not in versions:
+            return objects, versions
         u.dat.zero()
-        for bc in self.A.bcs:
+        for bc in bcs:
             bc.apply(u)
-        update()
-        # blift contains -A u_bc
+        data = values(u.dat)
+        for dat in dats:
+            data.extend(values(dat))
+        return objects, data
+
+    def _lifting_changed(self, state):
+        """Has the lifting of the boundary conditions changed since it
+        was last computed?
+
+        :arg state: the current state, see :meth:`_lifting_state`.
+        """
+        old = getattr(self, "_lifted_state", None)
+        if old is None or len(old[0]) != len(state[0]) or \
+           any(a is not b for a, b in zip(old[0], state[0])):
+            return True
+        if isinstance(state[1], tuple):
+            # Versions, which all processes agree on.
+            return old[1] != state[1]
+        changed = len(old[1]) != len(state[1]) or \
+            any(a.shape != b.shape or not numpy.array_equal(a, b)
+                for a, b in zip(old[1], state[1]))
+        # All processes must agree, since the lifting is collective.
+        return self.comm.allreduce(changed, op=MPI.LOR)
+
+    def _lifted(self, b):
+        u, update, lift, blift = self._rhs
+        state = self._lifting_state(u)
+        if self._lifting_changed(state):
+            u.dat.zero()
+            for bc in self.A.bcs:
+                bc.apply(u)
+            update()
+            if not isinstance(state[1], tuple):
+                # Keep copies, the data is updated in place.
+                state = (state[0], [d.copy() for d in state[1]])
+            self._lifted_state = state
+        # lift contains -A u_bc
+        blift.assign(lift)
         blift += b
         for bc in self.A.bcs:
             bc.apply(blift)
         # blift is now b - A u_bc, and satisfies the boundary conditions
         return blift
 
-    def solve(self, x, b):
+    def _check_arguments(self, x, b):
         if not isinstance(x, (function.Function, vector.Vector)):
             raise TypeError("Provided solution is a '%s', not a Function or Vector" % type(x).__name__)
         if isinstance(b, vector.Vector):
             b = b.function
         if not isinstance(b, function.Function):
             raise TypeError("Provided RHS is a '%s', not a Function" % type(b).__name__)
+        return b
 
+    def _apply_nullspaces(self):
         if len(self.trial_space) > 1 and self.nullspace is not None:
             self.nullspace._apply(self.trial_space.dof_dset.field_ises)
         if len(self.test_space) > 1 and self.transpose_nullspace is not None:
@@ -146,6 +227,15 @@ class LinearSolver(OptionsManager):
         if len(self.trial_space) > 1 and self.near_nullspace is not None:
             self.near_nullspace._apply(self.trial_space.dof_dset.field_ises, near=True)
 
+    def _check_convergence(self):
+        r = self.ksp.getConvergedReason()
+        if r < 0:
+            raise ConvergenceError("LinearSolver failed to converge after %d iterations with reason: %s", self.ksp.getIterationNumber(), solving_utils.KSPReasons[r])
+
+    def solve(self, x, b):
+        b = self._check_arguments(x, b)
+        self._apply_nullspaces()
+
         if self.A.has_bcs:
             b = self._lifted(b)
 
@@ -157,6 +247,55 @@ class LinearSolver(OptionsManager):
         with self.inserted_options(), b.dat.vec_ro as rhs, acc as solution:
             self.ksp.solve(rhs, solution)
 
-        r = self.ksp.getConvergedReason()
-        if r < 0:
-            raise ConvergenceError("LinearSolver failed to converge after %d iterations with reason: %s", self.ksp.getIterationNumber(), solving_utils.KSPReasons[r])
+        self._check_convergence()
+
+    def solve_many(self, xs, bs):
+        r"""Solve the system for several right hand sides.
+
+        :arg xs: an iterable of :class:`.Function`\s or
+             :class:`.Vector`\s to write the solutions into.
+        :arg bs: an iterable of :class:`.Function`\s or
+             :class:`.Vector`\s, the right hand sides.
+
+        If PETSc provides ``KSPMatSolve`` the right hand sides are
+        solved for together, as the columns of a dense matrix, so
+        that block Krylov methods (for example ``"ksp_type": "hpddm"``)
+        may be used.  Otherwise, or if a nonzero initial guess or a
+        transpose nullspace is used, they are solved for one after
+        another.  In either case the preconditioner is only set up
+        once.
+        """
+        xs = tuple(xs)
+        bs = tuple(bs)
+        if len(xs) != len(bs):
+            raise ValueError("Provided %d solutions for %d right hand sides" % (len(xs), len(bs)))
+        bs = tuple(self._check_arguments(x, b) for x, b in zip(xs, bs))
+        if len(xs) < 2 or not hasattr(self.ksp, "matSolve") or \
+           self.ksp.getInitialGuessNonzero() or self.transpose_nullspace is not None:
+            for x, b in zip(xs, bs):
+                self.solve(x, b)
+            return
+
+        self._apply_nullspaces()
+        layout = self.test_space.dof_dset.layout_vec
+        B = PETSc.Mat().createDense(((layout.getLocalSize(), layout.getSize()),
+                                     (PETSc.DECIDE, len(bs))),
+                                    comm=self.comm)
+        B.setUp()
+        columns = B.getDenseArray()
+        for i, b in enumerate(bs):
+            if self.A.has_bcs:
+                b = self._lifted(b)
+            with b.dat.vec_ro as rhs:
+                columns[:, i] = rhs.array_r
+        B.assemble()
+        X = B.duplicate()
+
+        with self.inserted_options():
+            self.ksp.matSolve(B, X)
+
+        self._check_convergence()
+        columns = X.getDenseArray()
+        for i, x in enumerate(xs):
+            with x.dat.vec_wo as solution:
+                solution.array[:] = columns[:, i]
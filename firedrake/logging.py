@@ -14,6 +14,7 @@ __all__ = ('set_level', 'set_log_level', 'set_log_handlers',
            'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL',
            'log', 'debug', 'info', 'warning', 'error', 'critical',
            'info_red', 'info_green', 'info_blue',
+           'log_memory_usage',
            "RED", "GREEN", "BLUE")
 
 
@@ -55,6 +56,24 @@ def info_blue(message, *args, **kwargs):
     info(BLUE % message, *args, **kwargs)
 
 
+def log_memory_usage(level=INFO, comm=COMM_WORLD, largest=10):
+    """Log a report of the memory held by Firedrake objects.
+
+    :kwarg level: The level to log the report at.
+    :kwarg comm: The communicator to reduce the report over (this
+         function is collective over it).
+    :kwarg largest: The number of largest objects (on this process)
+         to list.
+    :returns: the :class:`~.MemoryUsage`.
+    """
+    from firedrake.memory import memory_usage
+    usage = memory_usage(comm=comm)
+    log(level, "Memory usage (bytes):\n%s", usage)
+    for category, name, nbytes in usage.largest(largest):
+        log(level, "%14d %s %s", nbytes, category, name)
+    return usage
+
+
 def set_log_handlers(handlers=None, comm=COMM_WORLD):
     """Set handlers for the log messages of the different Firedrake components.
 
@@ -1,7 +1,10 @@
+from pyop2 import op2
+
 from firedrake.ufl_expr import adjoint, action
 from firedrake.formmanipulation import ExtractSubBlock
 
 from firedrake.petsc import PETSc
+from firedrake.utils import cached_property
 
 
 __all__ = ("ImplicitMatrixContext", )
@@ -90,14 +93,6 @@ class ImplicitMatrixContext(object):
         self._y = function.Function(test_space)
         self._x = function.Function(trial_space)
 
-        # These are temporary storage for holding the BC
-        # values during matvec application.  _xbc is for
-        # the action and ._ybc is for transpose.
-        if len(self.row_bcs) > 0:
-            self._xbc = function.Function(trial_space)
-        if len(self.col_bcs) > 0:
-            self._ybc = function.Function(test_space)
-
         # Get size information from template vecs on test and trial spaces
         trial_vec = trial_space.dof_dset.layout_vec
         test_vec = test_space.dof_dset.layout_vec
@@ -110,71 +105,141 @@ class ImplicitMatrixContext(object):
         self.actionT = action(self.aT, self._y)
 
         from firedrake.assemble import create_assembly_callable
+        from firedrake.tsfc_interface import action_parameters
         self._assemble_action = create_assembly_callable(self.action, tensor=self._y,
-                                                         form_compiler_parameters=self.fc_params)
+                                                         form_compiler_parameters=action_parameters(self.action, self.fc_params))
 
         self._assemble_actionT = create_assembly_callable(self.actionT, tensor=self._x,
-                                                          form_compiler_parameters=self.fc_params)
-
-    def mult(self, mat, X, Y):
-        with self._x.dat.vec_wo as v:
-            X.copy(v)
+                                                          form_compiler_parameters=action_parameters(self.actionT, self.fc_params))
 
-        # if we are a block on the diagonal, then the matrix has an
-        # identity block corresponding to the Dirichlet boundary conditions.
-        # our algorithm in this case is to save the BC values, zero them
-        # out before computing the action so that they don't pollute
-        # anything, and then set the values into the result.
-        # This has the effect of applying
-        # [ A_II 0 ; 0 I ] where A_II is the block corresponding only to
-        # non-fixed dofs and I is the identity block on the fixed dofs.
+        # Contexts of submatrices, see createSubMatrix.
+        self._sub_contexts = {}
 
-        # If we are not, then the matrix just has 0s in the rows and columns.
-
-        for bc in self.col_bcs:
-            bc.zero(self._x)
-
-        self._assemble_action()
+    # These are temporary storage for holding the BC values during
+    # matvec application.  _xbc is for the action and ._ybc is for
+    # transpose.
+    @cached_property
+    def _xbc(self):
+        from firedrake import function
+        return function.Function(self._x.function_space())
 
-        # This sets the essential boundary condition values on the
-        # result.
-        if self.on_diag:
-            if len(self.row_bcs) > 0:
-                # TODO, can we avoid the copy?
-                with self._xbc.dat.vec_wo as v:
-                    X.copy(v)
-            for bc in self.row_bcs:
-                bc.set(self._y, self._xbc)
-        else:
-            for bc in self.row_bcs:
-                bc.zero(self._y)
+    @cached_property
+    def _ybc(self):
+        from firedrake import function
+        return function.Function(self._y.function_space())
 
-        with self._y.dat.vec_ro as v:
-            v.copy(Y)
+    def mult(self, mat, X, Y):
+        self._apply(self._assemble_action, X, Y, self._x, self._y,
+                    lambda: self._xbc, self.col_bcs, self.row_bcs)
 
     def multTranspose(self, mat, Y, X):
         # As for mult, just everything swapped round.
-        with self._y.dat.vec_wo as v:
-            Y.copy(v)
-
-        for bc in self.row_bcs:
-            bc.zero(self._y)
-
-        self._assemble_actionT()
+        self._apply(self._assemble_actionT, Y, X, self._y, self._x,
+                    lambda: self._ybc, self.row_bcs, self.col_bcs)
+
+    def _apply(self, assemble, X, Y, x, y, xbc, x_bcs, y_bcs):
+        """Apply the operator (or its transpose).
+
+        :arg assemble: callable assembling the action of the form
+            on ``x`` into ``y``.
+        :arg X: the input Vec.
+        :arg Y: the output Vec.
+        :arg x: the function the action is taken on.
+        :arg y: the function the action is assembled into.
+        :arg xbc: callable returning a work function for the input
+            values on the boundary (only allocated if needed).
+        :arg x_bcs: the bcs imposed on the input space.
+        :arg y_bcs: the bcs imposed on the output space.
+
+        The values are copied between the Vecs and the functions (see
+        :func:`~.function.vec_storage`).
+        """
+        from firedrake.function import vec_storage
+        with vec_storage(y, Y, op2.WRITE):
+            # if we are a block on the diagonal, then the matrix has an
+            # identity block corresponding to the Dirichlet boundary conditions.
+            # our algorithm in this case is to zero the BC values
+            # before computing the action so that they don't pollute
+            # anything, and then set the values into the result.
+            # This has the effect of applying
+            # [ A_II 0 ; 0 I ] where A_II is the block corresponding only to
+            # non-fixed dofs and I is the identity block on the fixed dofs.
+
+            # If we are not, then the matrix just has 0s in the rows and columns.
+            if len(x_bcs) > 0:
+                with x.dat.vec_wo as v:
+                    X.copy(v)
+                for bc in x_bcs:
+                    bc.zero(x)
+                assemble()
+            else:
+                with vec_storage(x, X, op2.READ):
+                    assemble()
+
+            # This sets the essential boundary condition values on the
+            # result.
+            if self.on_diag:
+                if len(y_bcs) > 0:
+                    xbc = xbc()
+                    with vec_storage(xbc, X, op2.READ):
+                        for bc in y_bcs:
+                            bc.set(y, xbc)
+            else:
+                for bc in y_bcs:
+                    bc.zero(y)
+
+    @cached_property
+    def _diagonal(self):
+        from firedrake import function
+        return function.Function(self._y.function_space())
 
-        if self.on_diag:
-            if len(self.col_bcs) > 0:
-                # TODO, can we avoid the copy?
-                with self._ybc.dat.vec_wo as v:
-                    Y.copy(v)
-            for bc in self.col_bcs:
-                bc.set(self._x, self._ybc)
-        else:
-            for bc in self.col_bcs:
-                bc.zero(self._x)
+    @cached_property
+    def _assemble_diagonal(self):
+        from firedrake.assemble import create_assembly_callable
+        return create_assembly_callable(self.a, tensor=self._diagonal,
+                                        form_compiler_parameters=self.fc_params,
+                                        diagonal=True)
+
+    def getDiagonal(self, mat, vec):
+        """Compute the diagonal of the operator into ``vec``.
+
+        Only the local diagonal contributions are assembled (no
+        matrix is formed), rows and columns with boundary conditions
+        are treated as in :meth:`mult`.
+        """
+        from firedrake.function import vec_storage
+        if not self.on_diag:
+            raise NotImplementedError("Diagonal of off-diagonal blocks not implemented")
+        with vec_storage(self._diagonal, vec, op2.WRITE):
+            self._assemble_diagonal()
+            self._apply_diagonal_bcs(self._diagonal)
+
+    def _apply_diagonal_bcs(self, diagonal):
+        """Impose the boundary conditions on an assembled diagonal.
+
+        :arg diagonal: the diagonal.
+
+        As in :meth:`mult`, entries in columns with bcs are zero and
+        rows with bcs are those of the identity.
+        """
+        dats = diagonal.dat.split
+
+        def values(bc):
+            fs = bc.function_space()
+            component = fs.component
+            if component is not None:
+                fs = fs.parent
+            data = dats[fs.index or 0].data_with_halos
+            if component is None:
+                return data, bc.nodes
+            return data[:, component], bc.nodes
 
-        with self._x.dat.vec_ro as v:
-            v.copy(X)
+        for bc in self.col_bcs:
+            data, nodes = values(bc)
+            data[nodes] = 0
+        for bc in self.row_bcs:
+            data, nodes = values(bc)
+            data[nodes] = 1
 
     def view(self, mat, viewer=None):
         if viewer is None:
@@ -188,10 +253,9 @@ class ImplicitMatrixContext(object):
     def getInfo(self, mat, info=None):
         from mpi4py import MPI
         memory = self._x.dat.nbytes + self._y.dat.nbytes
-        if hasattr(self, "_xbc"):
-            memory += self._xbc.dat.nbytes
-        if hasattr(self, "_ybc"):
-            memory += self._ybc.dat.nbytes
+        for name in ("_xbc", "_ybc", "_diagonal", "_block_diagonal"):
+            if name in self.__dict__:
+                memory += self.__dict__[name].dat.nbytes
         if info is None:
             info = PETSc.Mat.InfoType.GLOBAL_SUM
         if info == PETSc.Mat.InfoType.LOCAL:
@@ -209,27 +273,14 @@ class ImplicitMatrixContext(object):
     # extraction for our custom matrix type.  Note that we are splitting UFL
     # and index sets rather than an assembled matrix, keeping matrix
     # assembly deferred as long as possible.
-    def createSubMatrix(self, mat, row_is, col_is, target=None):
-        if target is not None:
-            # Repeat call, just return the matrix, since we don't
-            # actually assemble in here.
-            target.assemble()
-            return target
-        from firedrake import DirichletBC
+    def _sub_bcs(self, asub, row_inds, col_inds):
+        """Return the row and column bcs of a submatrix.
 
-        # These are the sets of ISes of which the the row and column
-        # space consist.
-        row_ises = self._y.function_space().dof_dset.field_ises
-        col_ises = self._x.function_space().dof_dset.field_ises
-
-        row_inds = find_sub_block(row_is, row_ises)
-        if row_is == col_is and row_ises == col_ises:
-            col_inds = row_inds
-        else:
-            col_inds = find_sub_block(col_is, col_ises)
-
-        asub = ExtractSubBlock().split(self.a,
-                                       argument_indices=(row_inds, col_inds))
+        :arg asub: the form of the submatrix.
+        :arg row_inds: the indices of the row spaces of the submatrix.
+        :arg col_inds: the indices of the column spaces of the submatrix.
+        """
+        from firedrake import DirichletBC
         Wrow = asub.arguments()[0].function_space()
         Wcol = asub.arguments()[1].function_space()
 
@@ -254,12 +305,45 @@ class ImplicitMatrixContext(object):
                                                    bc.function_arg,
                                                    bc.sub_domain,
                                                    method=bc.method))
-        submat_ctx = ImplicitMatrixContext(asub,
-                                           row_bcs=row_bcs,
-                                           col_bcs=col_bcs,
-                                           fc_params=self.fc_params,
-                                           appctx=self.appctx)
-        submat_ctx.on_diag = self.on_diag and row_inds == col_inds
+        return row_bcs, col_bcs
+
+    def createSubMatrix(self, mat, row_is, col_is, target=None):
+        if target is not None:
+            # Repeat call, just return the matrix, since we don't
+            # actually assemble in here.
+            target.assemble()
+            return target
+        # These are the sets of ISes of which the the row and column
+        # space consist.
+        row_ises = self._y.function_space().dof_dset.field_ises
+        col_ises = self._x.function_space().dof_dset.field_ises
+
+        row_inds = find_sub_block(row_is, row_ises)
+        if row_is == col_is and row_ises == col_ises:
+            col_inds = row_inds
+        else:
+            col_inds = find_sub_block(col_is, col_ises)
+
+        # The contexts (and so the compiled actions) of submatrices
+        # are cached, their coefficients are those of this operator,
+        # so only the bcs need updating if they have changed.
+        key = (tuple(row_inds), tuple(col_inds))
+        bcs = (tuple(self.row_bcs), tuple(self.col_bcs))
+        try:
+            submat_ctx, sub_bcs = self._sub_contexts[key]
+        except KeyError:
+            asub = ExtractSubBlock().split(self.a,
+                                           argument_indices=(row_inds, col_inds))
+            submat_ctx = ImplicitMatrixContext(asub,
+                                               fc_params=self.fc_params,
+                                               appctx=self.appctx)
+            submat_ctx.on_diag = self.on_diag and row_inds == col_inds
+            sub_bcs = None
+        if sub_bcs is None or not all(len(a) == len(b) and all(x is y for x, y in zip(a, b))
+                                      for a, b in zip(sub_bcs, bcs)):
+            submat_ctx.row_bcs, submat_ctx.col_bcs = self._sub_bcs(submat_ctx.a, row_inds, col_inds)
+            self._sub_contexts[key] = (submat_ctx, bcs)
+
         submat = PETSc.Mat().create(comm=mat.comm)
         submat.setType("python")
         submat.setSizes((submat_ctx.row_sizes, submat_ctx.col_sizes),
@@ -0,0 +1,263 @@
+"""Accounting of the memory held by Firedrake objects.
+
+The report walks the live meshes, function space data, functions,
+matrices, sparsities and kernel caches, and estimates the bytes of
+numerical data each of them holds.  Storage internal to PETSc objects
+that do not expose their size (for example the DMPlex topology) is
+not included, the peak resident set size of the process is reported
+for reference.  The size of a compiled kernel is estimated by the size
+of its code.
+"""
+import gc
+import resource
+import sys
+import weakref
+from collections import OrderedDict, namedtuple
+
+import numpy
+
+from pyop2 import op2
+from pyop2.datatypes import IntType
+from pyop2.mpi import COMM_WORLD, MPI
+
+from firedrake.petsc import PETSc
+
+
+__all__ = ["MemoryUsage", "memory_usage"]
+
+
+categories = ("mesh", "function_space_data", "work_functions", "functions",
+              "matrices", "sparsities", "kernel_caches")
+"""The categories memory is accounted under."""
+
+
+class MemoryUsage(namedtuple("MemoryUsage", ["objects", "local", "total", "max", "peak_rss"])):
+    """The memory held by Firedrake objects, as returned by :func:`memory_usage`.
+
+    :arg objects: a list of ``(category, name, nbytes)`` tuples, one
+        for each object on this process.
+    :arg local: a dict mapping category to the bytes held on this process.
+    :arg total: a dict mapping category to the bytes held on all
+        processes.
+    :arg max: a dict mapping category to the largest number of bytes
+        held by any process.
+    :arg peak_rss: the peak resident set size (in bytes) of this
+        process.
+    """
+    __slots__ = ()
+
+    def largest(self, n=10):
+        """Return the ``n`` objects on this process holding the most memory."""
+        return sorted(self.objects, key=lambda o: o[2], reverse=True)[:n]
+
+    def as_dict(self):
+        """Return the report as a (JSON serialisable) dict."""
+        return {"objects": [list(o) for o in self.objects],
+                "local": dict(self.local),
+                "total": dict(self.total),
+                "max": dict(self.max),
+                "peak_rss": self.peak_rss}
+
+    def __str__(self):
+        lines = ["%-20s %14s %14s %14s" % ("category", "local", "max", "total")]
+        for category in self.local:
+            lines.append("%-20s %14d %14d %14d" % (category,
+                                                   self.local[category],
+                                                   self.max[category],
+                                                   self.total[category]))
+        lines.append("peak resident set size: %d" % self.peak_rss)
+        return "\n".join(lines)
+
+
+def _nbytes(obj, seen):
+    """Estimate the bytes of numerical data held by an object.
+
+    :arg obj: the object.
+    :arg seen: a set of ids of objects already accounted for (updated
+        in place), so that shared data is only counted once.
+
+    Containers are searched recursively, other objects not known to
+    hold data count as zero bytes.
+    """
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, numpy.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (op2.Dat, op2.MixedDat, op2.Global)):
+        return obj.nbytes
+    if isinstance(obj, op2.Map):
+        # Decorated maps share the values of the map they decorate
+        return _nbytes(obj.values_with_halo, seen)
+    if isinstance(obj, PETSc.Vec):
+        return obj.getLocalSize() * PETSc.ScalarType().itemsize
+    if isinstance(obj, PETSc.IS):
+        return obj.getLocalSize() * IntType.itemsize
+    if isinstance(obj, PETSc.Mat):
+        return _mat_nbytes(obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(v, seen) for v in obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(_nbytes(v, seen) for v in obj)
+    if hasattr(obj, "dat"):
+        # Functions
+        return _nbytes(obj.dat, seen)
+    return 0
+
+
+def _mat_nbytes(mat):
+    """Return the memory PETSc reports for a matrix (on this process)."""
+    mat_type = mat.getType()
+    if mat_type == PETSc.Mat.Type.NEST:
+        rows, cols = mat.getNestSize()
+        return sum(_mat_nbytes(mat.getNestSubMatrix(i, j))
+                   for i in range(rows) for j in range(cols)
+                   if mat.getNestSubMatrix(i, j) is not None)
+    if mat_type == PETSc.Mat.Type.PYTHON:
+        return 0
+    try:
+        return int(mat.getInfo(PETSc.Mat.InfoType.LOCAL)["memory"])
+    except PETSc.Error:
+        return 0
+
+
+def _live(classes):
+    """All live (garbage collector tracked) instances of some classes.
+
+    :arg classes: an iterable of classes.
+    :returns: a dict mapping each class to a list of its instances.
+
+    The objects tracked by the garbage collector are only scanned once.
+    """
+    live = dict((cls, []) for cls in classes)
+    for obj in gc.get_objects():
+        for cls, instances in live.items():
+            if isinstance(obj, cls):
+                instances.append(obj)
+    return live
+
+
+def _mesh_objects(seen, live):
+    from firedrake.mesh import MeshTopology
+    from firedrake.functionspacedata import get_work_function_cache
+    for mesh in live[MeshTopology]:
+        work = mesh._shared_data_cache.get(get_work_function_cache.__name__, {})
+        for element, cache in work.items():
+            # The work functions are the keys of the cache
+            yield ("work_functions", "%s: %s" % (mesh.name, element), _nbytes(list(cache), seen))
+        for name, cache in mesh._shared_data_cache.items():
+            yield ("function_space_data", "%s: %s" % (mesh.name, name), _nbytes(cache, seen))
+        data = dict((k, v) for k, v in vars(mesh).items() if k != "_shared_data_cache")
+        for facets in ("exterior_facets", "interior_facets"):
+            if facets in data:
+                data[facets] = vars(data[facets])
+        yield ("mesh", mesh.name, _nbytes(data, seen))
+
+
+def _function_objects(seen, live):
+    from firedrake.function import CoordinatelessFunction
+    for f in live[CoordinatelessFunction]:
+        yield ("functions", f.name(), _nbytes(f.dat, seen))
+
+
+def _matrix_objects(seen, live):
+    from firedrake.matrix import MatrixBase
+    for A in live[MatrixBase]:
+        if getattr(A, "petscmat", None) is None:
+            continue
+        yield ("matrices", repr(A), _nbytes(A.petscmat, seen))
+
+
+def _sparsity_objects(seen, live):
+    for sparsity in live[op2.Sparsity]:
+        nbytes = sum(_nbytes(v, seen) for v in vars(sparsity).values()
+                     if isinstance(v, numpy.ndarray))
+        yield ("sparsities", sparsity.name, nbytes)
+
+
+_kernel_nbytes = weakref.WeakKeyDictionary()
+"""The estimated size of each compiled :class:`pyop2.Kernel`.  Kernels
+do not change, so each is only measured once, and is forgotten when
+the kernel is freed."""
+
+
+def _kernel_infos(kernel):
+    """The kernel infos of a cached TSFC or Slate kernel."""
+    from firedrake.slate.slac.compiler import SlateKernel
+    if isinstance(kernel, SlateKernel):
+        return [split.kinfo for split in kernel.split_kernel]
+    return list(kernel.kernels)
+
+
+def _code_nbytes(kinfos):
+    """Estimate the size of some kernels by the size of their code."""
+    nbytes = 0
+    for kinfo in kinfos:
+        kernel = kinfo.kernel
+        try:
+            nbytes += _kernel_nbytes[kernel]
+        except KeyError:
+            nbytes += _kernel_nbytes.setdefault(kernel, len(kernel.code()))
+    return nbytes
+
+
+def _kernel_cache_objects(seen, live):
+    from firedrake.tsfc_interface import TSFCKernel
+    from firedrake.slate.slate import TensorBase
+    # SlateKernel inherits the cache of TSFCKernel.  Each Slate tensor
+    # also keeps the kernels compiled from it in its
+    # _metakernel_cache, which usually refers to the same kernels.
+    for key, kernel in list(TSFCKernel._cache.items()):
+        kinfos = _kernel_infos(kernel)
+        seen.update(id(kinfo.kernel) for kinfo in kinfos)
+        yield ("kernel_caches", "%s %s" % (type(kernel).__name__, key),
+               _code_nbytes(kinfos))
+    for tensor in live[TensorBase]:
+        for key, split_kernels in vars(tensor).get("_metakernel_cache", {}).items():
+            kinfos = [split.kinfo for split in split_kernels
+                      if id(split.kinfo.kernel) not in seen]
+            if kinfos:
+                seen.update(id(kinfo.kernel) for kinfo in kinfos)
+                yield ("kernel_caches", "Slate tensor %d %s" % (tensor.id, key),
+                       _code_nbytes(kinfos))
+
+
+def memory_usage(comm=COMM_WORLD):
+    """Report the memory held by live Firedrake objects.
+
+    :arg comm: the communicator to reduce the totals over.  This
+        function is collective over it.
+    :returns: a :class:`MemoryUsage`.
+
+    Data shared between objects (for example the dat of a
+    :class:`~.Function` and its :class:`~.CoordinatelessFunction`) is
+    only accounted once, against the first category it is found in.
+    The sizes under ``"kernel_caches"`` are estimates: the size of the
+    generated code of each kernel, not of the compiled library.
+    """
+    from firedrake.mesh import MeshTopology
+    from firedrake.function import CoordinatelessFunction
+    from firedrake.matrix import MatrixBase
+    from firedrake.slate.slate import TensorBase
+    live = _live((MeshTopology, CoordinatelessFunction, MatrixBase,
+                  op2.Sparsity, TensorBase))
+    seen = set()
+    objects = []
+    for gen in (_mesh_objects, _function_objects, _matrix_objects,
+                _sparsity_objects, _kernel_cache_objects):
+        objects.extend(gen(seen, live))
+    local = OrderedDict((c, 0) for c in categories)
+    for category, _, nbytes in objects:
+        local[category] += nbytes
+    values = numpy.array(list(local.values()), dtype=numpy.int64)
+    total = numpy.empty_like(values)
+    maximum = numpy.empty_like(values)
+    comm.Allreduce(values, total, op=MPI.SUM)
+    comm.Allreduce(values, maximum, op=MPI.MAX)
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return MemoryUsage(objects, local,
+                       OrderedDict(zip(local, map(int, total))),
+                       OrderedDict(zip(local, map(int, maximum))),
+                       peak_rss)
@@ -5,6 +5,7 @@ import sys
 import ufl
 import weakref
 from collections import OrderedDict, defaultdict
+from functools import partial
 from ufl.classes import ReferenceGrad
 import enum
 
@@ -28,7 +29,7 @@ from firedrake.petsc import PETSc, OptionsManager
 
 
 __all__ = ['Mesh', 'ExtrudedMesh', 'SubDomainData', 'unmarked',
-           'DistributedMeshOverlapType']
+           'DistributedMeshOverlapType', 'mesh_reorderings']
 
 
 _cells = {
@@ -61,6 +62,129 @@ class DistributedMeshOverlapType(enum.Enum):
     VERTEX = 3
 
 
+def _quantise(points, bits):
+    """Map points to integer coordinates in [0, 2**bits) along each
+    axis of their bounding box."""
+    lo = points.min(axis=0)
+    extent = points.max(axis=0) - lo
+    extent[extent == 0] = 1
+    scaled = (points - lo) / extent * ((1 << bits) - 1)
+    return np.rint(scaled).astype(np.uint64)
+
+
+def _interleave(X, bits):
+    """Interleave the bits of the columns of X, most significant
+    first."""
+    key = np.zeros(X.shape[0], dtype=np.uint64)
+    one = np.uint64(1)
+    for b in range(bits - 1, -1, -1):
+        for i in range(X.shape[1]):
+            key = (key << one) | ((X[:, i] >> np.uint64(b)) & one)
+    return key
+
+
+def morton_keys(points):
+    """Return the Morton (Z-order) curve index of points.
+
+    :arg points: a ``(npoints, dim)`` array of coordinates.
+    """
+    bits = 63 // points.shape[1]
+    return _interleave(_quantise(points, bits), bits)
+
+
+def hilbert_keys(points):
+    """Return the Hilbert curve index of points.
+
+    :arg points: a ``(npoints, dim)`` array of coordinates.
+
+    Uses Skilling's transpose algorithm ("Programming the Hilbert
+    curve", AIP Conf. Proc. 707, 2004) vectorised over the points.
+    """
+    dim = points.shape[1]
+    bits = 63 // dim
+    X = _quantise(points, bits)
+    M = np.uint64(1 << (bits - 1))
+    one = np.uint64(1)
+    # Inverse undo excess work
+    Q = M
+    while Q > one:
+        P = Q - one
+        for i in range(dim):
+            high = (X[:, i] & Q) != 0
+            X[high, 0] ^= P
+            low = ~high
+            t = (X[low, 0] ^ X[low, i]) & P
+            X[low, 0] ^= t
+            X[low, i] ^= t
+        Q >>= one
+    # Gray encode
+    for i in range(1, dim):
+        X[:, i] ^= X[:, i-1]
+    t = np.zeros(X.shape[0], dtype=np.uint64)
+    Q = M
+    while Q > one:
+        t[(X[:, dim-1] & Q) != 0] ^= Q - one
+        Q >>= one
+    X ^= t[:, np.newaxis]
+    return _interleave(X, bits)
+
+
+def _reorder_petsc(ordering_type):
+    def reorder(plex):
+        old_to_new = plex.getOrdering(ordering_type).indices
+        reordering = np.empty_like(old_to_new)
+        reordering[old_to_new] = np.arange(old_to_new.size, dtype=old_to_new.dtype)
+        cStart, cEnd = plex.getHeightStratum(0)
+        return reordering[(cStart <= reordering) & (reordering < cEnd)]
+    return reorder
+
+
+def _reorder_curve(keys):
+    def reorder(plex):
+        cStart, cEnd = plex.getHeightStratum(0)
+        order = np.argsort(keys(dmplex.cell_centroids(plex)), kind="mergesort")
+        return (cStart + order).astype(IntType)
+    return reorder
+
+
+mesh_reorderings = {
+    "rcm": _reorder_petsc(PETSc.Mat.OrderingType.RCM),
+    "nd": _reorder_petsc(PETSc.Mat.OrderingType.ND),
+    "hilbert": _reorder_curve(hilbert_keys),
+    "morton": _reorder_curve(morton_keys),
+}
+"""Available mesh reordering strategies, keyed by name.
+
+Each strategy is a callable taking a DMPlex and returning its cells
+(as plex points) in the order the mesh entities should be numbered:
+
+- ``"rcm"``: reverse Cuthill-McKee ordering of the cell graph (the
+  default when ``reorder=True``).
+- ``"nd"``: nested dissection of the cell graph, producing
+  graph-partition-based locality blocks.
+- ``"hilbert"``: Hilbert space-filling curve through the cell
+  centroids.
+- ``"morton"``: Morton (Z-order) space-filling curve through the cell
+  centroids.
+"""
+
+
+def _get_reordering(reorder):
+    """Return the reordering strategy for a ``reorder`` argument, or
+    None if the mesh should not be reordered."""
+    if reorder is True:
+        reorder = "rcm"
+    if reorder is False or reorder is None:
+        return None
+    if callable(reorder):
+        return reorder
+    try:
+        return mesh_reorderings[reorder]
+    except KeyError:
+        raise ValueError("Unknown mesh reordering '%s', expected a bool, a callable or one of %s"
+                         % (reorder, ", ".join(sorted(mesh_reorderings))))
+
+
 class _Facets(object):
     """Wrapper class for facet interation information on a :func:`Mesh`
 
@@ -338,6 +462,60 @@ def _from_cell_list(dim, cells, coords, comm):
     return plex
 
 
+def _from_distributed_cell_list(dim, cells, coords, comm):
+    """
+    Create a distributed DMPlex from per-process lists of cells and coords.
+
+    :arg dim: The topological dimension of the mesh
+    :arg cells: The vertices of each local cell, in the global vertex
+        numbering
+    :arg coords: The coordinates of the vertices owned by this
+        process (a contiguous block of the global vertex numbering,
+        ordered by rank)
+    :arg comm: communicator to build the mesh on.
+
+    The returned Plex is already distributed, pass
+    ``distribution_parameters={"partition": False}`` to :func:`Mesh`
+    and label the exterior facets before doing so.
+    """
+    # These types are /correct/, DMPlexCreateFromCellListParallel
+    # wants int and double (not PetscInt, PetscReal).
+    cells = np.ascontiguousarray(cells, dtype=np.int32)
+    coords = np.ascontiguousarray(coords, dtype=np.double)
+    return dmplex.create_from_distributed_cell_list(dim, cells, coords, comm)
+
+
+def _write_distributed(h5file, comm, path, data):
+    """Collectively write per-process data to an HDF5 file.
+
+    :arg h5file: an :class:`h5py:File` opened on ``comm``.
+    :arg comm: the communicator the write is collective over.
+    :arg path: the path of the dataset to create.
+    :arg data: this process' data, the leading dimensions of all
+         processes are concatenated in rank order.
+    """
+    data = np.ascontiguousarray(data)
+    sizes = comm.allgather(data.shape[0])
+    offsets = np.concatenate(([0], np.cumsum(sizes))).astype(IntType)
+    h5file.create_dataset(path + "_offsets", data=offsets)
+    dset = h5file.create_dataset(path, shape=(offsets[-1], ) + data.shape[1:],
+                                 dtype=data.dtype)
+    if data.shape[0] > 0:
+        dset[offsets[comm.rank]:offsets[comm.rank+1]] = data
+
+
+def _read_distributed(h5file, comm, path):
+    """Read this process' part of data written with
+    :func:`_write_distributed`.
+
+    :arg h5file: an :class:`h5py:File` opened on ``comm``.
+    :arg comm: the communicator the data was written on.
+    :arg path: the path of the dataset to read.
+    """
+    offsets = h5file[path + "_offsets"][...]
+    return h5file[path][offsets[comm.rank]:offsets[comm.rank+1]]
+
+
 class MeshTopology(object):
     """A representation of mesh topology."""
 
@@ -347,7 +525,9 @@ class MeshTopology(object):
 
         :arg plex: :class:`DMPlex` representing the mesh topology
         :arg name: name of the mesh
-        :arg reorder: whether to reorder the mesh (bool)
+        :arg reorder: whether to reorder the mesh (bool), or the
+            reordering strategy to use (a key of
+            :data:`mesh_reorderings` or a callable, see there).
         :arg distribution_parameters: options controlling mesh
             distribution, see :func:`Mesh` for details.
         """
@@ -356,6 +536,13 @@ class MeshTopology(object):
         self._distribution_parameters = distribution_parameters.copy()
         if distribute is None:
             distribute = True
+        elif distribute == "block":
+            if plex.comm.size > 1:
+                # The utility meshes supporting block partitions
+                # construct them and pass partition=False.
+                raise ValueError("Block partitions are only supported by RectangleMesh "
+                                 "and BoxMesh (and the meshes built from them)")
+            distribute = True
 
         overlap_type, overlap = distribution_parameters.get("overlap_type",
                                                             (DistributedMeshOverlapType.FACET, 1))
@@ -381,6 +568,8 @@ class MeshTopology(object):
         else:
             raise ValueError("Unknown overlap type %r" % overlap_type)
 
+        reorder_cells = _get_reordering(reorder)
+
         dmplex.validate_mesh(plex)
         plex.setFromOptions()
         utils._init()
@@ -435,15 +624,17 @@ class MeshTopology(object):
             if self.comm.size > 1:
                 add_overlap()
 
-            if reorder:
+            if reorder_cells is not None:
                 with timed_region("Mesh: reorder"):
-                    old_to_new = self._plex.getOrdering(PETSc.Mat.OrderingType.RCM).indices
-                    reordering = np.empty_like(old_to_new)
-                    reordering[old_to_new] = np.arange(old_to_new.size, dtype=old_to_new.dtype)
+                    pStart, pEnd = self._plex.getChart()
+                    cStart, cEnd = self._plex.getHeightStratum(0)
+                    # Only the traversal order of the cells matters.
+                    reordering = np.arange(pStart, pEnd, dtype=IntType)
+                    reordering[cStart:cEnd] = reorder_cells(self._plex)
             else:
                 # No reordering
                 reordering = None
-            self._did_reordering = bool(reorder)
+            self._did_reordering = reorder_cells is not None
 
             # Mark OP2 entities and derive the resulting Plex renumbering
             with timed_region("Mesh: numbering"):
@@ -452,21 +643,30 @@ class MeshTopology(object):
                 self._plex_renumbering = dmplex.plex_renumbering(self._plex,
                                                                  self._entity_classes,
                                                                  reordering)
+                self._create_numberings()
+        self._callback = callback
 
-                # Derive a cell numbering from the Plex renumbering
-                entity_dofs = np.zeros(dim+1, dtype=IntType)
-                entity_dofs[-1] = 1
-
-                self._cell_numbering = self.create_section(entity_dofs)
-                entity_dofs[:] = 0
-                entity_dofs[0] = 1
-                self._vertex_numbering = self.create_section(entity_dofs)
+    def _create_numberings(self, facet_ordering=None):
+        """Derive the cell and vertex numberings (and the facet
+        ordering) from the Plex renumbering.
 
-                entity_dofs[:] = 0
-                entity_dofs[-2] = 1
-                facet_numbering = self.create_section(entity_dofs)
-                self._facet_ordering = dmplex.get_facet_ordering(self._plex, facet_numbering)
-        self._callback = callback
+        :arg facet_ordering: optional precomputed facet ordering.
+        """
+        dim = self._plex.getDimension()
+        entity_dofs = np.zeros(dim+1, dtype=IntType)
+        entity_dofs[-1] = 1
+
+        self._cell_numbering = self.create_section(entity_dofs)
+        entity_dofs[:] = 0
+        entity_dofs[0] = 1
+        self._vertex_numbering = self.create_section(entity_dofs)
+
+        if facet_ordering is None:
+            entity_dofs[:] = 0
+            entity_dofs[-2] = 1
+            facet_numbering = self.create_section(entity_dofs)
+            facet_ordering = dmplex.get_facet_ordering(self._plex, facet_numbering)
+        self._facet_ordering = facet_ordering
 
     layers = None
     """No layers on unstructured mesh"""
@@ -484,6 +684,172 @@ class MeshTopology(object):
         if hasattr(self, '_callback'):
             self._callback(self)
 
+    @timed_function("SaveMesh")
+    def save(self, filename):
+        """Save the distributed, renumbered mesh topology to disk.
+
+        :arg filename: the name of the HDF5 file to write (including
+            the ``.h5`` suffix).
+
+        The overlapped Plex (including its labels and vertex
+        coordinates), the PyOP2 entity classes, the Plex renumbering,
+        the cell closure and the facet ordering of every process are
+        written.  Passing the file to :func:`Mesh` on the same number
+        of processes reloads the topology without repeating the mesh
+        distribution and renumbering.
+        """
+        import h5py
+        self.init()
+        with h5py.File(filename, "w", driver="mpio", comm=self.comm) as h5:
+            self._save(h5, "topology")
+
+    def _save(self, h5, group):
+        """Write the topology into a group of an open HDF5 file.
+
+        :arg h5: an :class:`h5py:File` opened on the mesh communicator.
+        :arg group: the name of the group to create.
+        """
+        self.init()
+        plex = self._plex
+        comm = self.comm
+        cone_sizes, cones, orientations = dmplex.get_cones(plex)
+        nroots, ilocal, iremote = plex.getPointSF().getGraph()
+        cdim = plex.getCoordinateDim()
+        coords = plex.getCoordinatesLocal().array_r.reshape(-1, cdim)
+
+        labels = {}
+        for i in range(plex.getNumLabels()):
+            name = plex.getLabelName(i)
+            if name in ("depth", "celltype"):
+                # Rebuilt when the Plex is stratified.
+                continue
+            points = [np.empty(0, dtype=IntType)]
+            values = [np.empty(0, dtype=IntType)]
+            for value in plex.getLabelIdIS(name).indices:
+                stratum = plex.getStratumIS(name, value).indices
+                points.append(stratum)
+                values.append(np.full_like(stratum, value))
+            labels[name] = (np.concatenate(points), np.concatenate(values))
+        label_names = sorted(set().union(*comm.allgather(set(labels))))
+
+        write = partial(_write_distributed, h5, comm)
+        attrs = h5.create_group(group).attrs
+        attrs["nprocs"] = comm.size
+        attrs["name"] = self.name
+        attrs["dimension"] = plex.getDimension()
+        attrs["grown_halos"] = self._grown_halos
+        attrs["did_reordering"] = self._did_reordering
+        attrs["labels"] = np.array(label_names, dtype="S")
+        overlap_type = self._distribution_parameters.get("overlap_type")
+        if overlap_type is not None:
+            attrs["overlap_type"] = overlap_type[0].name
+            attrs["overlap"] = overlap_type[1]
+
+        write(group + "/chart", np.array([plex.getChart()], dtype=IntType))
+        write(group + "/cone_sizes", cone_sizes)
+        write(group + "/cones", cones)
+        write(group + "/orientations", orientations)
+        write(group + "/sf_nroots", np.array([nroots], dtype=IntType))
+        write(group + "/sf_ilocal", ilocal.astype(IntType))
+        write(group + "/sf_iremote", iremote.astype(IntType).reshape(-1, 2))
+        write(group + "/coordinates", coords.astype(np.double))
+        for i, name in enumerate(label_names):
+            points, values = labels.get(name, (np.empty(0, dtype=IntType), ) * 2)
+            write(group + "/labels/%d/points" % i, points.astype(IntType))
+            write(group + "/labels/%d/values" % i, values.astype(IntType))
+        write(group + "/entity_classes", self._entity_classes.astype(IntType))
+        write(group + "/renumbering", self._plex_renumbering.indices.astype(IntType))
+        write(group + "/cell_closure", self.cell_closure)
+        write(group + "/facet_ordering", self._facet_ordering)
+
+    @classmethod
+    @timed_function("LoadMesh")
+    def load(cls, filename, comm=COMM_WORLD):
+        """Load a mesh topology saved with :meth:`save`.
+
+        :arg filename: the name of the HDF5 file to read.
+        :arg comm: the communicator to load the mesh on.  It must have
+            as many processes as the one the topology was saved on.
+
+        The returned topology is fully initialised, no distribution or
+        renumbering is performed.
+        """
+        import h5py
+        if not os.path.exists(filename):
+            raise IOError("File '%s' does not exist, cannot be opened for reading" % filename)
+        with h5py.File(filename, "r", driver="mpio", comm=comm) as h5:
+            return cls._load(h5, comm, "topology")
+
+    @classmethod
+    def _load(cls, h5, comm, group):
+        """Read a topology written by :meth:`_save`.
+
+        :arg h5: an :class:`h5py:File` opened on ``comm``.
+        :arg comm: the communicator to load the mesh on.
+        :arg group: the name of the group to read.
+        """
+        attrs = h5[group].attrs
+        nprocs = attrs["nprocs"]
+        if nprocs != comm.size:
+            raise ValueError("Process mismatch: written on %d, have %d" %
+                             (nprocs, comm.size))
+        read = partial(_read_distributed, h5, comm)
+        name = attrs["name"]
+        dim = int(attrs["dimension"])
+        distribution_parameters = {}
+        if "overlap_type" in attrs:
+            overlap_type = DistributedMeshOverlapType[attrs["overlap_type"]]
+            distribution_parameters["overlap_type"] = (overlap_type, int(attrs["overlap"]))
+        label_names = [n.decode() for n in attrs["labels"]]
+
+        chart, = read(group + "/chart")
+        cone_sizes = read(group + "/cone_sizes")
+        cones = read(group + "/cones")
+        orientations = read(group + "/orientations")
+        nroots, = read(group + "/sf_nroots")
+        ilocal = read(group + "/sf_ilocal")
+        iremote = read(group + "/sf_iremote")
+        coords = read(group + "/coordinates")
+        labels = [(n, read(group + "/labels/%d/points" % i), read(group + "/labels/%d/values" % i))
+                  for i, n in enumerate(label_names)]
+        entity_classes = read(group + "/entity_classes")
+        renumbering = read(group + "/renumbering")
+        cell_closure = read(group + "/cell_closure")
+        facet_ordering = read(group + "/facet_ordering")
+        grown_halos = bool(attrs["grown_halos"])
+        did_reordering = bool(attrs["did_reordering"])
+
+        plex = PETSc.DMPlex().create(comm=comm)
+        plex.setDimension(dim)
+        plex.setChart(*chart)
+        dmplex.set_cones(plex, cone_sizes, cones, orientations)
+        if nroots >= 0:
+            sf = PETSc.SF().create(comm=comm)
+            sf.setGraph(int(nroots), ilocal, iremote)
+            plex.setPointSF(sf)
+        for label, points, values in labels:
+            dmplex.set_label_values(plex, label, points, values)
+        dmplex.set_vertex_coordinates(plex, coords)
+
+        utils._init()
+        self = cls.__new__(cls)
+        self._plex = plex
+        self.name = str(name)
+        self.comm = dup_comm(comm)
+        self._distribution_parameters = distribution_parameters
+        self._grown_halos = grown_halos
+        self._did_reordering = did_reordering
+        self._shared_data_cache = defaultdict(dict)
+        self._subsets = {}
+        cStart, cEnd = plex.getHeightStratum(0)
+        self._ufl_cell = ufl.Cell(_cells[dim][plex.getConeSize(cStart)])
+        self._entity_classes = entity_classes.astype(int)
+        self._plex_renumbering = PETSc.IS().createGeneral(renumbering, comm=comm)
+        self._create_numberings(facet_ordering=facet_ordering)
+        # Populate the cached property
+        self.__dict__["cell_closure"] = cell_closure
+        return self
+
     @property
     def topology(self):
         """The underlying mesh topology object."""
@@ -842,6 +1208,17 @@ class ExtrudedMeshTopology(MeshTopology):
         """
         return self._base_mesh.cell_closure
 
+    def save(self, filename):
+        """Saving extruded mesh topologies is not supported, save the
+        base mesh topology instead."""
+        # Fail before the file is opened (and truncated).
+        self._save(None, None)
+
+    def _save(self, h5, group):
+        """Saving extruded mesh topologies is not supported, save the
+        base mesh topology instead."""
+        raise NotImplementedError("Cannot save extruded mesh topologies, save the base mesh instead")
+
     def _facets(self, kind):
         if kind not in ["interior", "exterior"]:
             raise ValueError("Unknown facet type '%s'" % kind)
@@ -1241,24 +1618,34 @@ def Mesh(meshfile, **kwargs):
     Meshes may either be created by reading from a mesh file, or by
     providing a PETSc DMPlex object defining the mesh topology.
 
-    :param meshfile: Mesh file name (or DMPlex object) defining
-           mesh topology.  See below for details on supported mesh
-           formats.
+    :param meshfile: Mesh file name (or DMPlex object, or
+           :class:`MeshTopology`, for example one returned by
+           :meth:`MeshTopology.load`) defining mesh topology.  See
+           below for details on supported mesh formats.
     :param dim: optional specification of the geometric dimension
            of the mesh (ignored if not reading from mesh file).
            If not supplied the geometric dimension is deduced from
            the topological dimension of entities in the mesh.
     :param reorder: optional flag indicating whether to reorder
-           meshes for better cache locality.  If not supplied the
-           default value in ``parameters["reorder_meshes"]``
-           is used.
+           meshes for better cache locality.  Either a bool, the name
+           of a reordering strategy (one of ``"rcm"``, ``"nd"``,
+           ``"hilbert"`` or ``"morton"``, see
+           :data:`mesh_reorderings`), or a callable taking the
+           DMPlex and returning its cells in traversal order.
+           ``True`` selects ``"rcm"``.  If not supplied the default
+           value in ``parameters["reorder_meshes"]`` is used.
     :param distribution_parameters:  an optional dictionary of options for
            parallel mesh distribution.  Supported keys are:
 
              - ``"partition"``: which may take the value ``None`` (use
                  the default choice), ``False`` (do not) ``True``
-                 (do), or a 2-tuple that specifies a partitioning of
-                 the cells (only really useful for debugging).
+                 (do), ``"block"`` (construct the mesh directly in
+                 parallel, one contiguous block of cells per process,
+                 only supported by :func:`.RectangleMesh` and
+                 :func:`.BoxMesh`, and raising an error for other
+                 meshes in parallel), or a 2-tuple that specifies a
+                 partitioning of the cells (only really useful for
+                 debugging).
              - ``"overlap_type"``: a 2-tuple indicating how to grow
                  the mesh overlap.  The first entry should be a
                  :class:`DistributedMeshOverlapType` instance, the
@@ -1277,6 +1664,11 @@ def Mesh(meshfile, **kwargs):
     * Exodus: with extension `.e`, `.exo`
     * CGNS: with extension `.cgns`
     * Triangle: with extension `.node`
+    * Saved mesh topology: with extension `.h5`, as written by
+      :meth:`MeshTopology.save`.  The topology is reloaded as
+      distributed and renumbered when it was saved (``reorder`` and
+      ``distribution_parameters`` are ignored), this requires the
+      same number of processes.
 
     .. note::
 
@@ -1309,9 +1701,15 @@ def Mesh(meshfile, **kwargs):
     if distribution_parameters is None:
         distribution_parameters = {}
 
+    topology = None
     if isinstance(meshfile, PETSc.DMPlex):
         name = "plexmesh"
         plex = meshfile
+    elif isinstance(meshfile, MeshTopology):
+        topology = meshfile
+        plex = topology._plex
+        if geometric_dim is None:
+            geometric_dim = plex.getCoordinateDim()
     else:
         comm = kwargs.get("comm", COMM_WORLD)
         name = meshfile
@@ -1331,13 +1729,19 @@ def Mesh(meshfile, **kwargs):
                 plex = _from_gmsh(meshfile, comm)
         elif ext.lower() == '.node':
             plex = _from_triangle(meshfile, geometric_dim, comm)
+        elif ext.lower() == '.h5':
+            topology = MeshTopology.load(meshfile, comm)
+            plex = topology._plex
+            if geometric_dim is None:
+                geometric_dim = plex.getCoordinateDim()
         else:
             raise RuntimeError("Mesh file %s has unknown format '%s'."
                                % (meshfile, ext[1:]))
 
     # Create mesh topology
-    topology = MeshTopology(plex, name=name, reorder=reorder,
-                            distribution_parameters=distribution_parameters)
+    if topology is None:
+        topology = MeshTopology(plex, name=name, reorder=reorder,
+                                distribution_parameters=distribution_parameters)
 
     tcell = topology.ufl_cell()
     if geometric_dim is None:
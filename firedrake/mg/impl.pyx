@@ -218,7 +218,7 @@ def create_lgmap(PETSc.DM dm):
 @cython.cdivision(True)
 @cython.boundscheck(False)
 @cython.wraparound(False)
-def coarse_to_fine_cells(mc, mf, clgmaps, flgmaps):
+def coarse_to_fine_cells(mc, mf, clgmaps, flgmaps, cnumbering=None, fnumbering=None):
     """Return a map from (renumbered) cells in a coarse mesh to those
     in a refined fine mesh.
 
@@ -226,6 +226,10 @@ def coarse_to_fine_cells(mc, mf, clgmaps, flgmaps):
     :arg mf: the fine mesh to map to.
     :arg clgmaps: coarse lgmaps (non-overlapped and overlapped)
     :arg flgmaps: fine lgmaps (non-overlapped and overlapped)
+    :arg cnumbering: optional coarse cell renumbering, as returned
+        by :func:`get_entity_renumbering` (computed if not provided).
+    :arg fnumbering: optional fine cell renumbering (computed if not
+        provided).
     :returns: Two arrays, one mapping coarse to fine cells, the second fine to coarse cells.
     """
     cdef:
@@ -242,8 +246,12 @@ def coarse_to_fine_cells(mc, mf, clgmaps, flgmaps):
     nref = 2 ** dim
     ncoarse = mc.cell_set.size
     nfine = mf.cell_set.size
-    co2n, _ = get_entity_renumbering(cdm, mc._cell_numbering, "cell")
-    _, fn2o = get_entity_renumbering(fdm, mf._cell_numbering, "cell")
+    if cnumbering is None:
+        cnumbering = get_entity_renumbering(cdm, mc._cell_numbering, "cell")
+    if fnumbering is None:
+        fnumbering = get_entity_renumbering(fdm, mf._cell_numbering, "cell")
+    co2n, _ = cnumbering
+    _, fn2o = fnumbering
     coarse_to_fine = np.full((ncoarse, nref), -1, dtype=PETSc.IntType)
     fine_to_coarse = np.full((nfine, 1), -1, dtype=PETSc.IntType)
     # Walk owned fine cells:
@@ -253,7 +261,8 @@ def coarse_to_fine_cells(mc, mf, clgmaps, flgmaps):
         cno, co = clgmaps
         fno, fo = flgmaps
         # Compute global numbers of original cell numbers
-        fo.apply(fn2o, result=fn2o)
+        # (not in place, the renumbering may be reused by the caller)
+        fn2o = fo.apply(fn2o)
         # Compute local numbers of original cells on non-overlapped mesh
         fn2o = fno.applyInverse(fn2o, PETSc.LGMap.MapMode.MASK)
         # Need to permute order of co2n so it maps from non-overlapped
@@ -1,11 +1,308 @@
+import numpy
+import ufl
+
 from pyop2 import op2
+from pyop2.datatypes import IntType
+from pyop2.mpi import MPI
 
 import firedrake
+from firedrake.petsc import PETSc
+from firedrake.utils import cached_property
 from . import utils
 from . import kernels
 
 
-__all__ = ["prolong", "restrict", "inject"]
+__all__ = ["prolong", "restrict", "inject", "TransferOperator", "prolongation_matrix"]
+
+
+class TransferOperator(object):
+    """Prolongation and restriction between (the spaces on) two
+    consecutive meshes of a hierarchy.
+
+    :arg Vc: the coarse :class:`.FunctionSpace`.
+    :arg Vf: the fine :class:`.FunctionSpace`, with the same element.
+
+    On construction the coarse cell containing each fine node and the
+    values of the coarse basis functions at the node are computed,
+    after which :meth:`prolong` and :meth:`restrict` are a weighted
+    gather and scatter.  Use :meth:`get` to obtain the (cached)
+    operator for a pair of spaces.
+
+    Extruded meshes of a hierarchy are only refined horizontally, so
+    for extruded spaces with a tensor product element (see
+    :func:`~.utils.column_element`) the weights are those of the
+    horizontal element on the base meshes, applied to each vertical
+    dof of the columns (this also works for variable layers).
+    """
+
+    def __init__(self, Vc, Vf):
+        if utils.column_element(Vc) is None:
+            values, self.weights = self._point_weights(Vc, Vf)
+            self._base = None
+        else:
+            values, self.weights = self._column_weights(Vc, Vf)
+        ncoarse = values.shape[1]
+        self.map = op2.Map(Vf.node_set, Vc.node_set, ncoarse, values=values)
+        self.Vc = Vc
+        self.Vf = Vf
+        self._prolong_kernel, self._restrict_kernel = \
+            kernels.weighted_transfer_kernels(ncoarse, Vf.dof_dset.cdim)
+
+    @staticmethod
+    def _point_weights(Vc, Vf):
+        """Locate each fine node in the coarse mesh."""
+        element = Vc.ufl_element()
+        if element.value_shape():
+            element = element.sub_elements()[0]
+        Vscalar = firedrake.FunctionSpace(Vc.mesh(), element)
+        ncoarse = Vscalar.finat_element.space_dimension()
+
+        coarse_coords = Vc.ufl_domain().coordinates
+        fine_to_coarse = utils.fine_node_to_coarse_node_map(Vf, Vc)
+        fine_to_coarse_coords = utils.fine_node_to_coarse_node_map(Vf, coarse_coords.function_space())
+        node_locations = utils.physical_node_locations(Vf)
+
+        weights = op2.Dat(op2.DataSet(Vf.node_set, ncoarse), name="transfer_weights")
+        cells = op2.Dat(op2.DataSet(Vf.node_set, 1), dtype=IntType)
+        # Have to do this, because the node set core size is not right for
+        # this expanded stencil
+        coarse_coords.dat._force_evaluation(read=True, write=False)
+        coarse_coords.dat.global_to_local_begin(op2.READ)
+        coarse_coords.dat.global_to_local_end(op2.READ)
+        op2.par_loop(kernels.transfer_weights_kernel(Vf, Vscalar), Vf.node_set,
+                     weights(op2.WRITE), cells(op2.WRITE),
+                     node_locations.dat(op2.READ),
+                     coarse_coords.dat(op2.READ, fine_to_coarse_coords[op2.i[0]]))
+
+        # Restrict the map to the coarse nodes of the containing cell,
+        # only owned fine nodes are iterated over.
+        candidates = fine_to_coarse.values_with_halo
+        values = candidates[:, :ncoarse].copy()
+        nowned = Vf.node_set.size
+        columns = cells.data_ro.reshape(-1, 1)*ncoarse + numpy.arange(ncoarse, dtype=IntType)
+        values[:nowned] = candidates[numpy.arange(nowned).reshape(-1, 1), columns]
+        return values, weights
+
+    def _column_weights(self, Vc, Vf):
+        """Apply the transfer between the base meshes up the columns."""
+        utils.check_layers(Vc, Vf)
+        base_c, columns_c = utils.column_numbering(Vc)
+        base_f, columns_f = utils.column_numbering(Vf)
+        self._base = TransferOperator.get(base_c, base_f)
+        self._columns = (columns_c, columns_f)
+        # The base node and vertical position of each fine node
+        base_node = numpy.zeros(Vf.node_set.total_size, dtype=IntType)
+        vertical = numpy.zeros(Vf.node_set.total_size, dtype=IntType)
+        rows, cols = numpy.nonzero(columns_f >= 0)
+        base_node[columns_f[rows, cols]] = rows
+        vertical[columns_f[rows, cols]] = cols
+        coarse = self._base.map.values_with_halo[base_node]
+        values = columns_c[coarse, vertical.reshape(-1, 1)]
+        weights = self._base.weights.data_ro_with_halo[base_node]
+        # Coarse nodes that are not in the layer of the fine node only
+        # appear with zero weight (or for halo fine nodes, which are
+        # not iterated over).
+        missing = values < 0
+        values[missing] = 0
+        weights[missing] = 0
+        return values, op2.Dat(op2.DataSet(Vf.node_set, values.shape[1]), data=weights,
+                               name="transfer_weights")
+
+    @cached_property
+    def injection(self):
+        """The fine node at the location of each (owned) coarse node,
+        or ``None``.
+
+        This is available for extruded spaces with a tensor product
+        element (refined horizontally) whose coarse nodes are all fine
+        nodes, as for Lagrange elements, in which case injection is a
+        gather of the fine values.
+        """
+        if self._base is None:
+            return None
+        base = self._base
+        nowned = base.Vf.node_set.size
+        # Fine nodes where prolongation is the value at a coarse node
+        coincident = numpy.isclose(base.weights.data_ro, 1)
+        fine, k = numpy.nonzero(coincident)
+        fine_node = numpy.full(base.Vc.node_set.total_size, -1, dtype=IntType)
+        fine_node[base.map.values[:nowned][fine, k]] = fine
+        found = numpy.all(fine_node[:base.Vc.node_set.size] >= 0)
+        if not self.Vc.comm.allreduce(found, op=MPI.LAND):
+            return None
+        columns_c, columns_f = self._columns
+        rows, cols = numpy.nonzero(columns_c >= 0)
+        nodes = columns_c[rows, cols]
+        injection = numpy.full(self.Vc.node_set.total_size, -1, dtype=IntType)
+        owned = fine_node[rows] >= 0
+        injection[nodes[owned]] = columns_f[fine_node[rows[owned]], cols[owned]]
+        return injection[:self.Vc.node_set.size]
+
+    @staticmethod
+    def supported(V):
+        """Can a :class:`TransferOperator` be used for the space ``V``?
+
+        The weights are those of a scalar element, so this is true for
+        scalar elements and vector or tensor elements built from them.
+        """
+        element = V.ufl_element()
+        if isinstance(element, (ufl.VectorElement, ufl.TensorElement)):
+            element = element.sub_elements()[0]
+        return element.value_shape() == () and element.family() != "Real"
+
+    @classmethod
+    def get(cls, Vc, Vf):
+        """Return the (cached) transfer operator between two spaces.
+
+        :arg Vc: the coarse :class:`.FunctionSpace`.
+        :arg Vf: the fine :class:`.FunctionSpace`.
+        """
+        hierarchy, levelc = utils.get_level(Vc.ufl_domain())
+        _, levelf = utils.get_level(Vf.ufl_domain())
+        cache = hierarchy._shared_data_cache["transfer_operators"]
+        key = (Vc.ufl_element(), levelc, levelf)
+        try:
+            return cache[key]
+        except KeyError:
+            return cache.setdefault(key, cls(Vc, Vf))
+
+    def prolong(self, coarse, fine):
+        """Prolong a coarse function.
+
+        :arg coarse: the coarse :class:`.Function`.
+        :arg fine: the fine :class:`.Function` to write the result into.
+        """
+        # Have to do this, because the node set core size is not right for
+        # this expanded stencil
+        coarse.dat._force_evaluation(read=True, write=False)
+        coarse.dat.global_to_local_begin(op2.READ)
+        coarse.dat.global_to_local_end(op2.READ)
+        op2.par_loop(self._prolong_kernel, fine.node_set,
+                     fine.dat(op2.WRITE),
+                     coarse.dat(op2.READ, self.map[op2.i[0]]),
+                     self.weights(op2.READ))
+        return fine
+
+    def restrict(self, fine_dual, coarse_dual):
+        """Restrict a fine residual (the transpose of :meth:`prolong`).
+
+        :arg fine_dual: the fine :class:`.Function`.
+        :arg coarse_dual: the coarse :class:`.Function` to write the result into.
+        """
+        coarse_dual.dat.zero()
+        op2.par_loop(self._restrict_kernel, fine_dual.node_set,
+                     coarse_dual.dat(op2.INC, self.map[op2.i[0]]),
+                     fine_dual.dat(op2.READ),
+                     self.weights(op2.READ))
+        return coarse_dual
+
+    def matrix(self):
+        """Assemble the prolongation as a PETSc AIJ matrix.
+
+        :returns: a new :class:`PETSc.Mat` with a row for each fine
+            dof and a column for each coarse dof.
+
+        Exactly zero weights (for example at fine nodes coinciding
+        with coarse nodes) are not stored.
+        """
+        Vc, Vf = self.Vc, self.Vf
+        bs = Vf.dof_dset.cdim
+        nowned = Vf.node_set.size
+        ncoarse = self.map.arity
+        # Global (block) column of each coarse node of each owned fine node
+        columns = Vc.dof_dset.lgmap.getBlockIndices()[self.map.values]
+        component = numpy.arange(bs, dtype=IntType)
+        columns = (numpy.repeat(columns, bs, axis=0)*bs
+                   + numpy.tile(component, nowned).reshape(-1, 1))
+        values = numpy.repeat(self.weights.data_ro, bs, axis=0)
+        rows = numpy.repeat(numpy.arange(nowned*bs, dtype=IntType), ncoarse)
+        columns = columns.ravel()
+        values = values.ravel()
+        nonzero = values != 0
+        rows, columns, values = rows[nonzero], columns[nonzero], values[nonzero]
+        # Column indices must be sorted within each row
+        order = numpy.lexsort((columns, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        indptr = numpy.zeros(nowned*bs + 1, dtype=IntType)
+        numpy.cumsum(numpy.bincount(rows, minlength=nowned*bs), out=indptr[1:])
+
+        mat = PETSc.Mat().create(comm=Vf.comm)
+        mat.setType(PETSc.Mat.Type.AIJ)
+        mat.setSizes((Vf.dof_dset.layout_vec.getSizes(),
+                      Vc.dof_dset.layout_vec.getSizes()), bsize=bs)
+        mat.setPreallocationCSR((indptr, columns.astype(IntType), values))
+        mat.assemble()
+        return mat
+
+
+def _bc_mask(V, bcs):
+    """A vector that is zero on the boundary condition nodes of ``V``
+    and one elsewhere."""
+    mask = firedrake.Function(V)
+    mask.dat.data[:] = 1
+    for bc in bcs:
+        bc.zero(mask)
+    with mask.dat.vec_ro as v:
+        return v.copy()
+
+
+def prolongation_matrix(Vc, Vf, cbcs=None, fbcs=None):
+    """Assemble the prolongation between two spaces of a hierarchy as
+    a PETSc AIJ matrix.
+
+    :arg Vc: the coarse :class:`.FunctionSpace`.
+    :arg Vf: the fine :class:`.FunctionSpace`, with the same element
+        (which must be :meth:`TransferOperator.supported`).
+    :arg cbcs: optional boundary conditions on ``Vc``, whose columns
+        are zeroed.
+    :arg fbcs: optional boundary conditions on ``Vf``, whose rows
+        are zeroed.
+    :returns: a new :class:`PETSc.Mat`.
+
+    The transfers through intermediate meshes (when the hierarchy has
+    several refinements per level) are multiplied together.  The
+    action of the matrix matches :func:`prolong` followed by zeroing
+    the fine boundary condition nodes, and its transpose matches
+    :func:`restrict` followed by zeroing the coarse ones.
+    """
+    hierarchy, coarse_level = utils.get_level(Vc.ufl_domain())
+    _, fine_level = utils.get_level(Vf.ufl_domain())
+    refinements_per_level = hierarchy.refinements_per_level
+    repeat = (fine_level - coarse_level)*refinements_per_level
+    next_level = coarse_level * refinements_per_level
+
+    element = Vc.ufl_element()
+    mat = None
+    coarse = Vc
+    for j in range(repeat):
+        next_level += 1
+        if j == repeat - 1:
+            fine = Vf
+        else:
+            fine = work_function(hierarchy, next_level, element).function_space()
+        P = TransferOperator.get(coarse, fine).matrix()
+        mat = P if mat is None else P.matMult(mat)
+        coarse = fine
+    if cbcs or fbcs:
+        mat.diagonalScale(_bc_mask(Vf, fbcs or []), _bc_mask(Vc, cbcs or []))
+    return mat
+
+
+def work_function(hierarchy, level, element):
+    """Return a (cached) work :class:`.Function` on an intermediate
+    mesh of a hierarchy.
+
+    :arg hierarchy: the mesh hierarchy.
+    :arg level: the index of the mesh in ``hierarchy._meshes``.
+    :arg element: the UFL element of the function.
+    """
+    cache = hierarchy._shared_data_cache["transfer_work_functions"]
+    key = (level, element)
+    try:
+        return cache[key]
+    except KeyError:
+        V = firedrake.FunctionSpace(hierarchy._meshes[level], element)
+        return cache.setdefault(key, firedrake.Function(V))
 
 
 def check_arguments(coarse, fine):
@@ -49,15 +346,20 @@ def prolong(coarse, fine):
     next_level = coarse_level * refinements_per_level
 
     element = Vc.ufl_element()
-    meshes = hierarchy._meshes
     for j in range(repeat):
         next_level += 1
         if j == repeat - 1:
             next = fine
             Vf = fine.function_space()
         else:
-            Vf = firedrake.FunctionSpace(meshes[next_level], element)
-            next = firedrake.Function(Vf)
+            next = work_function(hierarchy, next_level, element)
+            Vf = next.function_space()
+
+        if TransferOperator.supported(Vc):
+            TransferOperator.get(Vc, Vf).prolong(coarse, next)
+            coarse = next
+            Vc = Vf
+            continue
 
         coarse_coords = Vc.ufl_domain().coordinates
         fine_to_coarse = utils.fine_node_to_coarse_node_map(Vf, Vc)
@@ -110,17 +412,23 @@ def restrict(fine_dual, coarse_dual):
     next_level = fine_level * refinements_per_level
 
     element = Vc.ufl_element()
-    meshes = hierarchy._meshes
 
     for j in range(repeat):
         next_level -= 1
         if j == repeat - 1:
-            coarse_dual.dat.zero()
             next = coarse_dual
             Vc = next.function_space()
         else:
-            Vc = firedrake.FunctionSpace(meshes[next_level], element)
-            next = firedrake.Function(Vc)
+            next = work_function(hierarchy, next_level, element)
+            Vc = next.function_space()
+
+        if TransferOperator.supported(Vc):
+            TransferOperator.get(Vc, Vf).restrict(fine_dual, next)
+            fine_dual = next
+            Vf = Vc
+            continue
+
+        next.dat.zero()
         # XXX: Should be able to figure out locations by pushing forward
         # reference cell node locations to physical space.
         # x = \sum_i c_i \phi_i(x_hat)
@@ -197,7 +505,15 @@ def inject(fine, coarse):
         else:
             Vc = firedrake.FunctionSpace(meshes[next_level], element)
             next = firedrake.Function(Vc)
-        if not dg:
+        injection = None
+        if not dg and TransferOperator.supported(Vc):
+            injection = TransferOperator.get(Vc, Vf).injection
+        if injection is not None:
+            fine.dat._force_evaluation(read=True, write=False)
+            fine.dat.global_to_local_begin(op2.READ)
+            fine.dat.global_to_local_end(op2.READ)
+            next.dat.data[:] = fine.dat.data_ro_with_halo[injection]
+        elif not dg:
             node_locations = utils.physical_node_locations(Vc)
 
             fine_coords = Vf.ufl_domain().coordinates
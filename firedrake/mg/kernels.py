@@ -308,6 +308,101 @@ def restrict_kernel(Vf, Vc):
         return cache.setdefault(key, op2.Kernel(my_kernel, name="restrict_kernel"))
 
 
+def transfer_weights_kernel(Vf, Vc):
+    """A kernel finding, for each fine node, the coarse cell (among
+    the candidates) containing it, and the values of the (scalar)
+    coarse basis functions of that cell at the node.
+
+    :arg Vf: the fine space.
+    :arg Vc: the coarse space, with a scalar element.
+    """
+    hierarchy, level = utils.get_level(Vc.ufl_domain())
+    levelf = level + Fraction(1 / hierarchy.refinements_per_level)
+    cache = hierarchy._shared_data_cache["transfer_kernels"]
+    coordinates = Vc.ufl_domain().coordinates
+    key = (("weights", )
+           + entity_dofs_key(Vc.finat_element.entity_dofs())
+           + entity_dofs_key(coordinates.function_space().finat_element.entity_dofs()))
+    try:
+        return cache[key]
+    except KeyError:
+        mesh = coordinates.ufl_domain()
+        evaluate_kernel = compile_element(firedrake.TestFunction(Vc))
+        to_reference_kernel = to_reference_coordinates(coordinates.ufl_element())
+        coords_element = create_element(coordinates.ufl_element())
+        element = create_element(Vc.ufl_element())
+        my_kernel = """
+        %(to_reference)s
+        %(evaluate)s
+        void transfer_weights_kernel(double *W, %(IntType)s *cell, const double *X, const double *Xc)
+        {
+            double Xref[%(tdim)d];
+            cell[0] = -1;
+            for (int i = 0; i < %(ncandidate)d; i++) {
+                const double *Xci = Xc + i*%(Xc_cell_inc)d;
+                to_reference_coords_kernel(Xref, X, Xci);
+                if (%(inside_cell)s) {
+                    cell[0] = i;
+                    break;
+                }
+            }
+            if (cell[0] == -1) abort();
+            for ( int i = 0; i < %(Wdim)d; i++ ) {
+                W[i] = 0;
+            }
+            evaluate_kernel(W, Xref);
+        }
+        """ % {"to_reference": str(to_reference_kernel),
+               "evaluate": str(evaluate_kernel),
+               "IntType": as_cstr(IntType),
+               "ncandidate": hierarchy.fine_to_coarse_cells[levelf].shape[1],
+               "Wdim": element.space_dimension(),
+               "inside_cell": inside_check(element.cell, eps=1e-8, X="Xref"),
+               "Xc_cell_inc": coords_element.space_dimension(),
+               "tdim": mesh.topological_dimension()}
+
+        return cache.setdefault(key, op2.Kernel(my_kernel, name="transfer_weights_kernel"))
+
+
+def weighted_transfer_kernels(ncoarse, block_size):
+    """Kernels applying precomputed transfer weights.
+
+    :arg ncoarse: the number of (scalar) coarse basis functions per cell.
+    :arg block_size: the number of values per node.
+    :returns: a tuple of prolongation and restriction kernels.
+
+    The prolongation gathers the coarse cell values weighted by the
+    coarse basis at the fine node, the restriction (its transpose)
+    scatters the fine node value with the same weights.
+    """
+    code = {"ncoarse": ncoarse, "bs": block_size}
+    prolong = """
+    void prolong_weighted(double *R, const double *c, const double *W)
+    {
+        for (int j = 0; j < %(bs)d; j++) {
+            R[j] = 0;
+        }
+        for (int k = 0; k < %(ncoarse)d; k++) {
+            for (int j = 0; j < %(bs)d; j++) {
+                R[j] += W[k] * c[k*%(bs)d + j];
+            }
+        }
+    }
+    """ % code
+    restrict = """
+    void restrict_weighted(double *R, const double *f, const double *W)
+    {
+        for (int k = 0; k < %(ncoarse)d; k++) {
+            for (int j = 0; j < %(bs)d; j++) {
+                R[k*%(bs)d + j] += W[k] * f[j];
+            }
+        }
+    }
+    """ % code
+    return (op2.Kernel(prolong, name="prolong_weighted"),
+            op2.Kernel(restrict, name="restrict_weighted"))
+
+
 def inject_kernel(Vf, Vc):
     hierarchy, level = utils.get_level(Vc.ufl_domain())
     cache = hierarchy._shared_data_cache["transfer_kernels"]
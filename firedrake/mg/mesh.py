@@ -1,8 +1,15 @@
 import numpy as np
+import os
 from fractions import Fraction
 from collections import defaultdict
+from functools import partial
+
+from pyop2 import op2
+from pyop2.datatypes import IntType
+from pyop2.mpi import COMM_WORLD
 
 import firedrake
+from firedrake.mesh import MeshTopology, _read_distributed, _write_distributed
 from firedrake.utils import cached_property
 from . import impl
 from .utils import set_level
@@ -67,6 +74,78 @@ class HierarchyBase(object):
         :arg idx: The :func:`~.Mesh` to return"""
         return self.meshes[idx]
 
+    def save(self, filename):
+        """Save the hierarchy to disk.
+
+        :arg filename: the name of the HDF5 file to write (including
+            the ``.h5`` suffix).
+
+        The topology of every mesh (including intermediate levels, see
+        :meth:`~.MeshTopology.save`) and the cell maps between them
+        are written, so that :meth:`load` on the same number of
+        processes does not need to refine, distribute, renumber or
+        recompute the inter-level maps.  The local to global maps of
+        the plexes (before and after distribution) are not saved: they
+        are only used to compute the cell maps, which are.  Only nested
+        hierarchies of unextruded meshes can be saved.
+        """
+        import h5py
+        if not self.nested:
+            raise NotImplementedError("Can only save nested hierarchies")
+        if any(m.cell_set._extruded for m in self._meshes):
+            raise NotImplementedError("Cannot save hierarchies of extruded meshes")
+        comm = self.comm
+        nlevels = len(self._meshes)
+        with h5py.File(filename, "w", driver="mpio", comm=comm) as h5:
+            write = partial(_write_distributed, h5, comm)
+            attrs = h5.create_group("hierarchy").attrs
+            attrs["nlevels"] = nlevels
+            attrs["refinements_per_level"] = self.refinements_per_level
+            radius = getattr(self._meshes[0], "_radius", None)
+            if radius is not None:
+                attrs["radius"] = radius
+            for i, m in enumerate(self._meshes):
+                m.topology._save(h5, "hierarchy/level_%d" % i)
+                level = Fraction(i, self.refinements_per_level)
+                if i < nlevels - 1:
+                    write("hierarchy/coarse_to_fine_cells/%d" % i, self.coarse_to_fine_cells[level])
+                if i > 0:
+                    write("hierarchy/fine_to_coarse_cells/%d" % i, self.fine_to_coarse_cells[level])
+
+    @classmethod
+    def load(cls, filename, comm=COMM_WORLD):
+        """Load a hierarchy saved with :meth:`save`.
+
+        :arg filename: the name of the HDF5 file to read.
+        :arg comm: the communicator to load the hierarchy on.  It
+            must have as many processes as the one the hierarchy was
+            saved on.
+        """
+        import h5py
+        if not os.path.exists(filename):
+            raise IOError("File '%s' does not exist, cannot be opened for reading" % filename)
+        with h5py.File(filename, "r", driver="mpio", comm=comm) as h5:
+            read = partial(_read_distributed, h5, comm)
+            attrs = h5["hierarchy"].attrs
+            nlevels = int(attrs["nlevels"])
+            refinements_per_level = int(attrs["refinements_per_level"])
+            radius = attrs.get("radius")
+            topologies = [MeshTopology._load(h5, comm, "hierarchy/level_%d" % i)
+                          for i in range(nlevels)]
+            coarse_to_fine_cells = dict((Fraction(i, refinements_per_level),
+                                         read("hierarchy/coarse_to_fine_cells/%d" % i))
+                                        for i in range(nlevels - 1))
+            fine_to_coarse_cells = dict((Fraction(i, refinements_per_level),
+                                         read("hierarchy/fine_to_coarse_cells/%d" % i) if i > 0 else None)
+                                        for i in range(nlevels))
+        meshes = [firedrake.Mesh(topology) for topology in topologies]
+        for i, m in enumerate(meshes):
+            m._plex.setRefineLevel(i)
+        if radius is not None:
+            meshes[0]._radius = radius
+        return cls(meshes, coarse_to_fine_cells, fine_to_coarse_cells,
+                   refinements_per_level, nested=True)
+
 
 def MeshHierarchy(mesh, refinement_levels,
                   refinements_per_level=1,
@@ -148,18 +227,23 @@ def MeshHierarchy(mesh, refinement_levels,
                        for dm in dms]
 
     lgmaps = []
+    numberings = []
     for i, m in enumerate(meshes):
         no = impl.create_lgmap(m._plex)
         m.init()
         o = impl.create_lgmap(m._plex)
         m._plex.setRefineLevel(i)
         lgmaps.append((no, o))
+        # Every mesh but the ends is both a coarse and a fine mesh,
+        # compute its cell renumbering once.
+        numberings.append(impl.get_entity_renumbering(m._plex, m._cell_numbering, "cell"))
 
     coarse_to_fine_cells = []
     fine_to_coarse_cells = [None]
-    for (coarse, fine), (clgmaps, flgmaps) in zip(zip(meshes[:-1], meshes[1:]),
-                                                  zip(lgmaps[:-1], lgmaps[1:])):
-        c2f, f2c = impl.coarse_to_fine_cells(coarse, fine, clgmaps, flgmaps)
+    for i, (coarse, fine) in enumerate(zip(meshes[:-1], meshes[1:])):
+        c2f, f2c = impl.coarse_to_fine_cells(coarse, fine, lgmaps[i], lgmaps[i+1],
+                                             cnumbering=numberings[i],
+                                             fnumbering=numberings[i+1])
         coarse_to_fine_cells.append(c2f)
         fine_to_coarse_cells.append(f2c)
 
@@ -176,6 +260,11 @@ def ExtrudedMeshHierarchy(base_hierarchy, layers, kernel=None, layer_height=None
     """Build a hierarchy of extruded meshes by extruded a hierarchy of meshes.
 
     :arg base_hierarchy: the unextruded base mesh hierarchy to extrude.
+    :arg layers: the number of layers, or for variable layers an
+        array of ``[start, ncells]`` pairs for each cell of the
+        coarsest base mesh (see :func:`~.ExtrudedMesh`).  Each cell of
+        a refined base mesh is extruded like the coarse cell it is
+        contained in, which requires a nested base hierarchy.
 
     See :func:`~.ExtrudedMesh` for the meaning of the remaining parameters.
     """
@@ -184,11 +273,16 @@ def ExtrudedMeshHierarchy(base_hierarchy, layers, kernel=None, layer_height=None
     if any(m.cell_set._extruded for m in base_hierarchy):
         raise ValueError("Meshes in base hierarchy must not be extruded")
 
-    meshes = [firedrake.ExtrudedMesh(m, layers, kernel=kernel,
+    layers = np.asarray(layers, dtype=IntType)
+    if layers.shape:
+        layers = _refined_layers(base_hierarchy, layers)
+    else:
+        layers = [layers for _ in base_hierarchy._meshes]
+    meshes = [firedrake.ExtrudedMesh(m, l, kernel=kernel,
                                      layer_height=layer_height,
                                      extrusion_type=extrusion_type,
                                      gdim=gdim)
-              for m in base_hierarchy._meshes]
+              for m, l in zip(base_hierarchy._meshes, layers)]
 
     return HierarchyBase(meshes,
                          base_hierarchy.coarse_to_fine_cells,
@@ -197,6 +291,34 @@ def ExtrudedMeshHierarchy(base_hierarchy, layers, kernel=None, layer_height=None
                          nested=base_hierarchy.nested)
 
 
+def _refined_layers(base_hierarchy, layers):
+    """Variable layers of each mesh of a base hierarchy.
+
+    :arg base_hierarchy: the (nested) base hierarchy.
+    :arg layers: the ``[start, ncells]`` pairs of the cells of the
+        coarsest mesh.
+    :returns: a list of (new) arrays of ``[start, ncells]`` pairs of
+        the cells of each mesh, fine cells inheriting the layers of
+        their coarse parent.
+    """
+    if not base_hierarchy.nested:
+        raise NotImplementedError("Variable layers need a nested base hierarchy")
+    meshes = base_hierarchy._meshes
+    if layers.shape != (meshes[0].cell_set.total_size, 2):
+        raise ValueError("Must provide single layer number or array of shape (%d, 2), not %s"
+                         % (meshes[0].cell_set.total_size, layers.shape))
+    result = [layers.copy()]
+    for i, fine in enumerate(meshes[1:], start=1):
+        fine_to_coarse = base_hierarchy.fine_to_coarse_cells[Fraction(i, base_hierarchy.refinements_per_level)]
+        # Only owned fine cells know their parent, update the halo.
+        dat = op2.Dat(op2.DataSet(fine.cell_set, 2), dtype=IntType)
+        dat.data[:] = result[-1][fine_to_coarse[:, 0]]
+        dat.global_to_local_begin(op2.READ)
+        dat.global_to_local_end(op2.READ)
+        result.append(dat.data_ro_with_halo.copy())
+    return result
+
+
 def NonNestedHierarchy(*meshes):
     return HierarchyBase(meshes, [None for _ in meshes], [None for _ in meshes],
                          nested=False)
@@ -5,9 +5,12 @@ from ufl.algorithms.multifunction import MultiFunction
 
 from functools import singledispatch
 import firedrake
+from firedrake.matrix import MatrixBase
 from firedrake.petsc import PETSc
+from firedrake.utils import cached_property
 
 from . import utils
+from .interface import TransferOperator, prolongation_matrix, _bc_mask
 
 
 __all__ = ["coarsen"]
@@ -265,6 +268,7 @@ def coarsen_snescontext(context, self, coefficient_mapping=None):
                            appctx=new_appctx)
     coarse._fine = context
     context._coarse = coarse
+    coarse.galerkin = coarse_operator(coarse) == "galerkin"
 
     ises = problem.J.arguments()[0].function_space()._ises
     coarse._nullspace = self(context._nullspace, self, coefficient_mapping=coefficient_mapping)
@@ -342,6 +346,126 @@ class Injection(object):
             v.copy(y)
 
 
+def _finest(ctx):
+    """Return the solver context on the finest level."""
+    while ctx._fine is not None:
+        ctx = ctx._fine
+    return ctx
+
+
+def coarse_operator(ctx):
+    """Return how the operator on a coarse level is built.
+
+    :arg ctx: the :class:`~._SNESContext` on the coarse level.
+
+    This is set with the options ``mg_coarse_operator`` (on the
+    coarsest mesh of the hierarchy), ``mg_levels_<n>_operator`` (on
+    the mesh of level ``n``) or ``mg_levels_operator`` (on all levels
+    not otherwise specified), with the options prefix of the finest
+    level solver.  Levels are numbered as the meshes of the
+    hierarchy, which is the numbering PCMG uses unless
+    ``-pc_mg_levels`` asks for fewer levels than the hierarchy has.
+
+    The operator is either ``"rediscretise"`` (the default),
+    assembling the coarsened form, or ``"galerkin"``, projecting the
+    operator of the next finer level (see :class:`GalerkinMatrix`).
+    """
+    _, level = utils.get_level(ctx._x.function_space().mesh())
+    options = PETSc.Options(_finest(ctx).options_prefix)
+    default = options.getString("mg_levels_operator", "rediscretise")
+    if level == 0:
+        operator = options.getString("mg_coarse_operator", default)
+    else:
+        operator = options.getString("mg_levels_%d_operator" % level, default)
+    if operator not in {"rediscretise", "galerkin"}:
+        raise ValueError("Unknown coarse operator '%s', expecting 'rediscretise' or 'galerkin'" % operator)
+    return operator
+
+
+class GalerkinMatrix(MatrixBase):
+    """The Galerkin projection of the operator on the next finer level
+    of a multigrid hierarchy.
+
+    :arg ctx: the :class:`~._SNESContext` on the coarse level.
+
+    The matrix is :math:`P^T A P`, where :math:`A` is the (assembled)
+    preconditioning operator on the finer level and :math:`P` the
+    assembled prolongation (see :func:`~.prolongation_matrix`), with
+    the boundary condition rows and columns replaced by the identity
+    (as in rediscretised operators).  No form is assembled on the
+    coarse level.
+    """
+    def __init__(self, ctx):
+        super(GalerkinMatrix, self).__init__(ctx.J, ctx._problem.bcs, "aij")
+        V_c = ctx._x.function_space()
+        V_f = ctx._fine._x.function_space()
+        if not TransferOperator.supported(V_c):
+            raise NotImplementedError("Galerkin coarse operators not implemented for %s"
+                                      % V_c.ufl_element())
+        self._fine = ctx._fine
+        self._prolongation = prolongation_matrix(V_c, V_f, self.bcs, self._fine._problem.bcs)
+        # Identity on the boundary condition nodes
+        self._diagonal = _bc_mask(V_c, self.bcs)
+        self._diagonal.scale(-1)
+        self._diagonal.shift(1)
+        self.assembled = False
+
+    def _fine_operator(self, update=True):
+        """Return the operator on the finer level.
+
+        :arg update: should the operator be brought up to date?
+        """
+        fine = self._fine
+        if update and (fine._fine is not None or not fine._jacobian_assembled):
+            # Coarse levels are set up from the coarsest, so the finer
+            # level operator may be out of date.
+            fine._compute_operators()
+            fine._operators_updated = True
+        A = fine._pjac.petscmat
+        if A.getType() not in {"seqaij", "mpiaij", "seqbaij", "mpibaij"}:
+            raise ValueError("Galerkin coarse operators need an assembled operator on the finer level, not '%s'"
+                             % A.getType())
+        return A
+
+    @cached_property
+    def petscmat(self):
+        # Only the nonzero structure of the product is needed here
+        return self._fine_operator(update=False).PtAP(self._prolongation)
+
+    def assemble(self):
+        super(GalerkinMatrix, self).assemble()
+        self._fine_operator().PtAP(self._prolongation, result=self.petscmat)
+        self.petscmat.setDiagonal(self._diagonal, addv=PETSc.InsertMode.ADD_VALUES)
+        self.assembled = True
+
+    def force_evaluation(self):
+        pass
+
+
+def transfer_mat_type(ctx):
+    """Return the type of the grid transfer matrices of a solver.
+
+    :arg ctx: a :class:`~._SNESContext` (on any level).
+    :returns: a tuple of the matrix type and whether PCMG builds
+        Galerkin coarse operators.
+
+    The type is set with the option ``mg_transfer_mat_type`` (with
+    the options prefix of the finest level solver), which may be
+    ``"matfree"`` (the default), applying :func:`~.prolong` and
+    :func:`~.restrict` in a python matrix, or ``"aij"``, assembling
+    the prolongation (see :func:`~.prolongation_matrix`).  Assembled
+    transfers may be used with Galerkin coarse operators
+    (``-pc_mg_galerkin``).
+    """
+    options = PETSc.Options(_finest(ctx).options_prefix)
+    mat_type = options.getString("mg_transfer_mat_type", "matfree")
+    if mat_type not in {"matfree", "aij"}:
+        raise ValueError("Unknown mg_transfer_mat_type '%s', expecting 'matfree' or 'aij'" % mat_type)
+    galerkin = options.hasName("pc_mg_galerkin") and \
+        options.getString("pc_mg_galerkin", "both") != "none"
+    return mat_type, galerkin
+
+
 def create_interpolation(dmc, dmf):
     cctx = firedrake.dmhooks.get_appctx(dmc)
     fctx = firedrake.dmhooks.get_appctx(dmf)
@@ -350,14 +474,23 @@ def create_interpolation(dmc, dmf):
     _, restrict, _ = firedrake.dmhooks.get_transfer_operators(dmf)
     V_c = cctx._problem.u.function_space()
     V_f = fctx._problem.u.function_space()
+    cbcs = cctx._problem.bcs
+    fbcs = fctx._problem.bcs
+
+    # Custom transfers are only available matrix-free
+    mat_type, galerkin = transfer_mat_type(fctx)
+    if mat_type == "aij" and TransferOperator.supported(V_c) \
+       and prolong is firedrake.prolong and restrict is firedrake.restrict:
+        # Rediscretised coarse operators have identity rows on the
+        # boundary, so the restricted residual must vanish there.
+        # Galerkin coarse operators would be singular if it did.
+        return prolongation_matrix(V_c, V_f, None if galerkin else cbcs, fbcs), None
 
     row_size = V_f.dof_dset.layout_vec.getSizes()
     col_size = V_c.dof_dset.layout_vec.getSizes()
 
     cfn = firedrake.Function(V_c)
     ffn = firedrake.Function(V_f)
-    cbcs = cctx._problem.bcs
-    fbcs = fctx._problem.bcs
 
     ctx = Interpolation(cfn, ffn, prolong, restrict, cbcs, fbcs)
     mat = PETSc.Mat().create(comm=dmc.comm)
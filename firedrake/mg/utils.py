@@ -106,11 +106,9 @@ def coarse_cell_to_fine_node_map(Vc, Vf):
     try:
         return cache[key]
     except KeyError:
-        assert Vc.extruded == Vf.extruded
-        if Vc.mesh().variable_layers or Vf.mesh().variable_layers:
-            raise NotImplementedError("Not implemented for variable layers, sorry")
-        if Vc.extruded and Vc.mesh().layers != Vf.mesh().layers:
-            raise ValueError("Coarse and fine meshes must have same number of layers")
+        # Fine cells have the layers of their parent, so this also
+        # works with variable layers.
+        check_layers(Vc, Vf)
 
         coarse_to_fine = hierarchy.coarse_to_fine_cells[levelc]
         _, ncell = coarse_to_fine.shape
@@ -128,6 +126,90 @@ def coarse_cell_to_fine_node_map(Vc, Vf):
                                              offset=offset))
 
 
+def check_layers(Vc, Vf):
+    """Check that two spaces on meshes of a hierarchy have the same
+    vertical structure."""
+    assert Vc.extruded == Vf.extruded
+    if not Vc.extruded:
+        return
+    if Vc.mesh().variable_layers != Vf.mesh().variable_layers:
+        raise ValueError("Coarse and fine meshes must both have variable layers, or neither")
+    if not Vc.mesh().variable_layers and Vc.mesh().layers != Vf.mesh().layers:
+        raise ValueError("Coarse and fine meshes must have same number of layers")
+
+
+def column_element(V):
+    """Return the horizontal and vertical elements of an extruded space.
+
+    :arg V: a :class:`.FunctionSpace`.
+    :returns: a tuple of the (scalar) horizontal and vertical
+        elements if ``V`` is on an extruded mesh and its (scalar)
+        element is their tensor product, otherwise ``None``.
+    """
+    if not V.extruded:
+        return None
+    element = V.ufl_element()
+    if isinstance(element, (ufl.VectorElement, ufl.TensorElement)):
+        element = element.sub_elements()[0]
+    if not isinstance(element, ufl.TensorProductElement):
+        return None
+    horizontal, vertical = element.sub_elements()
+    if horizontal.value_shape() or vertical.value_shape() or horizontal.family() == "Real":
+        return None
+    return horizontal, vertical
+
+
+def column_numbering(V):
+    """Number the nodes of an extruded space by column.
+
+    :arg V: a :class:`.FunctionSpace` with a :func:`column_element`.
+    :returns: a tuple ``(base, columns)`` of the
+        :class:`.FunctionSpace` of the horizontal element on the base
+        mesh, and an array with a row for each (base) node of it.
+        Entry ``[i, l*n + j]`` of the array is the node of ``V`` at
+        vertical dof ``j`` (of ``n``) of cell layer ``l`` above base
+        node ``i``, or -1 if the column has no such layer.
+
+    Nodes on the boundary between two layers appear in both.  This
+    works for variable layers.
+    """
+    mesh = V.mesh()
+    horizontal, _ = column_element(V)
+    cache = mesh._shared_data_cache["hierarchy_column_numbering"]
+    key = entity_dofs_key(V.finat_element.entity_dofs())
+    try:
+        return cache[key]
+    except KeyError:
+        base = firedrake.FunctionSpace(mesh._base_mesh, horizontal)
+        nhorizontal = base.finat_element.space_dimension()
+        nvertical = V.finat_element.space_dimension() // nhorizontal
+        cell_nodes = V.cell_node_map().values_with_halo
+        base_nodes = base.cell_node_map().values_with_halo
+        ncell = len(cell_nodes)
+        if mesh.variable_layers:
+            layers = mesh.cell_set.layers_array
+            start = layers[:, 0]
+            cell_layers = layers[:, 1] - layers[:, 0] - 1
+        else:
+            start = numpy.zeros(ncell, dtype=IntType)
+            cell_layers = numpy.full(ncell, mesh.layers - 1, dtype=IntType)
+        # One entry per cell in each column, walking up the columns
+        cells = numpy.repeat(numpy.arange(ncell, dtype=IntType), cell_layers)
+        layer = (numpy.arange(len(cells), dtype=IntType)
+                 - numpy.repeat(numpy.cumsum(cell_layers) - cell_layers, cell_layers))
+        nodes = cell_nodes[cells] + V.offset*layer.reshape(-1, 1)
+        # Tensor product dofs are numbered horizontal dof major
+        nodes = nodes.reshape(-1, nhorizontal, nvertical)
+        vertical = ((start[cells] + layer).reshape(-1, 1, 1)*nvertical
+                    + numpy.arange(nvertical, dtype=IntType).reshape(1, 1, -1))
+        rows = numpy.broadcast_to(base_nodes[cells].reshape(-1, nhorizontal, 1), nodes.shape)
+        vertical = numpy.broadcast_to(vertical, nodes.shape)
+        columns = numpy.full((base.node_set.total_size, numpy.max(start + cell_layers, initial=0)*nvertical),
+                             -1, dtype=IntType)
+        columns[rows, vertical] = nodes
+        return cache.setdefault(key, (base, columns))
+
+
 def physical_node_locations(V):
     element = V.ufl_element()
     if element.value_shape():
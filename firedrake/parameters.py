@@ -75,6 +75,7 @@ parameters.add(pyop2_opts)
 
 parameters.add(Parameters("form_compiler", **default_parameters()))
 
+# True, False or the name of a strategy in firedrake.mesh.mesh_reorderings
 parameters["reorder_meshes"] = True
 
 # One of nest, aij, baij or matfree
@@ -84,6 +85,13 @@ parameters["default_sub_matrix_type"] = "baij"
 
 parameters["type_check_safe_par_loops"] = False
 
+# Number of solvers the functional solve(a == L, u) interface keeps
+# (per solution Function) for reuse, 0 disables the cache.
+parameters["solver_cache_size"] = 0
+
+# Record a performance report for each nonlinear (and linear) variational solve
+parameters["performance_reports"] = False
+
 
 def disable_performance_optimisations():
     """Switches off performance optimisations in Firedrake.
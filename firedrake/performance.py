@@ -0,0 +1,151 @@
+"""Per-solve breakdown of the time spent in a nonlinear solve.
+
+The report is built from the PETSc log events that PETSc, PyOP2 and
+Firedrake already record (for example ``SNESFunctionEval`` or
+``ApplyBC``): the event counters are read before and after a solve
+and the differences are grouped into categories.  Reading the
+counters costs a few microseconds, so reports may be left switched on
+(with ``parameters["performance_reports"]``) in production runs.
+"""
+import json
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+import numpy
+
+from pyop2.mpi import MPI
+
+from firedrake.petsc import PETSc
+
+
+__all__ = ["SolveReport"]
+
+
+categories = OrderedDict([
+    ("residual_assembly", ("SNESFunctionEval", )),
+    ("jacobian_assembly", ("SNESJacobianEval", )),
+    ("bcs", ("ApplyBC", )),
+    ("pc_setup", ("PCSetUp", )),
+    ("pc_apply", ("PCApply", )),
+    ("ksp_solve", ("KSPSolve", )),
+    ("parloops", ("ParLoopExecute", )),
+    ("halo_exchange", ("VecScatterBegin", "VecScatterEnd",
+                       "SFBcastBegin", "SFBcastEnd",
+                       "SFReduceBegin", "SFReduceEnd")),
+    ("compilation", ("TSFCCompile", )),
+])
+"""The categories of a :class:`SolveReport`, mapping to the PETSc log
+events they are built from.  Categories may overlap (for example
+parloops run inside residual assembly)."""
+
+
+fields = ("time", "count", "flops", "messages", "message_bytes")
+"""The quantities recorded for each category."""
+
+
+class SolveReport(namedtuple("SolveReport", ["events", "time", "snes_iterations",
+                                             "ksp_iterations", "converged_reason",
+                                             "bytes_assembled"])):
+    """A breakdown of a nonlinear solve.
+
+    :arg events: a dict mapping each category (see
+        :data:`categories`) to a dict of the ``time`` (seconds),
+        ``max_time`` (the largest time on any process), ``count``,
+        ``flops``, ``messages`` and ``message_bytes`` spent in it
+        on this process.
+    :arg time: the wall clock time of the solve (seconds).
+    :arg snes_iterations: the number of nonlinear iterations.
+    :arg ksp_iterations: the total number of linear iterations.
+    :arg converged_reason: the SNES converged reason.
+    :arg bytes_assembled: the bytes of residuals and Jacobians
+        assembled (on this process).
+    """
+    __slots__ = ()
+
+    def as_dict(self):
+        """Return the report as a (JSON serialisable) dict."""
+        return {"events": dict((k, dict(v)) for k, v in self.events.items()),
+                "time": self.time,
+                "snes_iterations": self.snes_iterations,
+                "ksp_iterations": self.ksp_iterations,
+                "converged_reason": self.converged_reason,
+                "bytes_assembled": self.bytes_assembled}
+
+    def write_json(self, filename):
+        """Write the report to a file as JSON.
+
+        :arg filename: the name of the file.
+        """
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def __str__(self):
+        lines = ["%-20s %12s %12s %8s" % ("category", "time", "max time", "count")]
+        for category, event in self.events.items():
+            lines.append("%-20s %12.4g %12.4g %8d" % (category, event["time"],
+                                                      event["max_time"], event["count"]))
+        lines.append("total time: %.4g, SNES iterations: %d, KSP iterations: %d"
+                     % (self.time, self.snes_iterations, self.ksp_iterations))
+        return "\n".join(lines)
+
+
+_logging = False
+
+
+def _counters():
+    """The current counters of each category, as an array."""
+    global _logging
+    if not _logging:
+        PETSc.Log.begin()
+        _logging = True
+    counters = numpy.zeros((len(categories), len(fields)))
+    for i, names in enumerate(categories.values()):
+        for name in names:
+            info = PETSc.Log.Event(name).getPerfInfo()
+            counters[i] += (info["time"], info["count"], info["flops"],
+                            info["numMessages"], info["messageLength"])
+    return counters
+
+
+def _bytes_assembled(ctx, events):
+    """Estimate the bytes assembled by residual and Jacobian evaluations."""
+    from firedrake.memory import _mat_nbytes
+    nbytes = events["residual_assembly"]["count"] * ctx._F.dat.nbytes
+    if events["jacobian_assembly"]["count"] and "_jac" in ctx.__dict__:
+        nbytes += events["jacobian_assembly"]["count"] * _mat_nbytes(ctx._jac.petscmat)
+    return int(nbytes)
+
+
+@contextmanager
+def solve_report(solver):
+    """Record a :class:`SolveReport` of a solve on a solver.
+
+    :arg solver: a :class:`~.NonlinearVariationalSolver`.
+
+    On exit (even if the solve failed) the report is stored as the
+    ``report`` attribute of the solver.  This is collective over the
+    communicator of the solver.
+    """
+    snes = solver.snes
+    start = _counters()
+    tic = time.time()
+    try:
+        yield
+    finally:
+        elapsed = time.time() - tic
+        counters = _counters() - start
+        max_time = numpy.empty(len(categories))
+        snes.comm.tompi4py().Allreduce(numpy.ascontiguousarray(counters[:, 0]),
+                                       max_time, op=MPI.MAX)
+        events = OrderedDict()
+        for i, category in enumerate(categories):
+            event = OrderedDict(zip(fields, counters[i].tolist()))
+            event["count"] = int(event["count"])
+            event["max_time"] = float(max_time[i])
+            events[category] = event
+        solver.report = SolveReport(events, elapsed,
+                                    snes.getIterationNumber(),
+                                    snes.getLinearSolveIterations(),
+                                    int(snes.getConvergedReason()),
+                                    _bytes_assembled(solver._ctx, events))
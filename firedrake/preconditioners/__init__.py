@@ -4,3 +4,4 @@ from firedrake.preconditioners.massinv import *    # noqa: F401
 from firedrake.preconditioners.pcd import *        # noqa: F401
 from firedrake.preconditioners.patch import *      # noqa: F401
 from firedrake.preconditioners.low_order import *  # noqa: F401
+from firedrake.preconditioners.precision import *  # noqa: F401
@@ -1,6 +1,7 @@
 import abc
 
 from firedrake.preconditioners.base import PCBase
+from firedrake.preconditioners.precision import preconditioner_matrix
 from firedrake.functionspace import FunctionSpace, MixedFunctionSpace
 from firedrake.petsc import PETSc
 from firedrake.ufl_expr import TestFunction, TrialFunction
@@ -13,7 +14,10 @@ class AssembledPC(PCBase):
     """A matrix-free PC that assembles the operator.
 
     Internally this makes a PETSc PC object that can be controlled by
-    options using the extra options prefix ``assembled_``.
+    options using the extra options prefix ``assembled_``.  Setting
+    ``assembled_mat_precision`` to ``single`` builds it from a single
+    precision copy of the operator, see
+    :class:`~.SinglePrecisionMatrix`.
     """
 
     _prefix = "assembled_"
@@ -70,6 +74,7 @@ class AssembledPC(PCBase):
         tnullsp = P.getTransposeNullSpace()
         if tnullsp.handle != 0:
             Pmat.setTransposeNullSpace(tnullsp)
+        Pmat, self._update_Pmat = preconditioner_matrix(self.P, options_prefix)
 
         # Internally, we just set up a PC object that the user can configure
         # however from the PETSc command line.  Since PC allows the user to specify
@@ -99,6 +104,7 @@ class AssembledPC(PCBase):
     def update(self, pc):
         self._assemble_P()
         self.P.force_evaluation()
+        self._update_Pmat()
 
     def form(self, pc, test, trial):
         _, P = pc.getOperators()
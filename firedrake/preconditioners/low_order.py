@@ -1,5 +1,6 @@
 from firedrake.petsc import PETSc
 from firedrake.preconditioners.base import PCBase
+from firedrake.preconditioners.precision import preconditioner_matrix
 import numpy
 
 from ufl.algorithms import MultiFunction, map_integrands
@@ -166,9 +167,11 @@ class P1PC(PCBase):
                     vecs.append(v.copy())
             nullsp = PETSc.NullSpace().create(vectors=vecs, comm=pc.comm)
             self.lo_op.petscmat.setNearNullSpace(nullsp)
+        lo_mat, self._update_lo_mat = preconditioner_matrix(self.lo_op,
+                                                            pc.getOptionsPrefix() + "lo_")
         lo = PETSc.PC().create(comm=pc.comm)
         lo.incrementTabLevel(1, parent=pc)
-        lo.setOperators(self.lo_op.petscmat, self.lo_op.petscmat)
+        lo.setOperators(lo_mat, lo_mat)
         lo.setOptionsPrefix(pc.getOptionsPrefix() + "lo_")
         lo.setFromOptions()
         self.lo = lo
@@ -188,6 +191,7 @@ class P1PC(PCBase):
     def update(self, pc):
         firedrake.assemble(self.lo_J, bcs=self.lo_bcs, tensor=self.lo_op)
         self.lo_op.force_evaluation()
+        self._update_lo_mat()
 
     def apply(self, pc, x, y):
         work1, work2 = self.work
@@ -1,4 +1,5 @@
 from firedrake.preconditioners.base import PCBase
+from firedrake.preconditioners.precision import preconditioner_matrix
 from firedrake.petsc import PETSc
 
 __all__ = ("MassInvPC", )
@@ -16,6 +17,10 @@ class MassInvPC(PCBase):
     This can be provided (defaulting to constant viscosity) by
     providing a field defining the viscosity in the application
     context, keyed on ``"mu"``.
+
+    The option ``Mp_mat_precision single`` builds the KSP from a single
+    precision copy of the mass matrix, see
+    :class:`~.SinglePrecisionMatrix`.
     """
     def initialize(self, pc):
         from firedrake import TrialFunction, TestFunction, dx, assemble, inner, parameters
@@ -57,6 +62,8 @@ class MassInvPC(PCBase):
         if tnullsp.handle != 0:
             Pmat.setTransposeNullSpace(tnullsp)
 
+        Pmat, _ = preconditioner_matrix(A, options_prefix)
+
         ksp = PETSc.KSP().create(comm=pc.comm)
         ksp.incrementTabLevel(1, parent=pc)
         ksp.setOperators(Pmat)
@@ -0,0 +1,162 @@
+import ctypes
+
+import numpy
+
+from pyop2.compilation import load
+from pyop2.datatypes import IntType, as_cstr, as_ctypes
+
+from firedrake.petsc import PETSc
+
+__all__ = ("SinglePrecisionMatrix", "preconditioner_matrix")
+
+
+spmv_code = """
+void spmv(%(int)s nrows, const %(int)s *indptr, const %(int)s *indices,
+          const float *values, const double *x, double *y)
+{
+    for (%(int)s i = 0; i < nrows; i++) {
+        double s = 0;
+        for (%(int)s k = indptr[i]; k < indptr[i + 1]; k++) {
+            s += (double)values[k] * x[indices[k]];
+        }
+        y[i] = s;
+    }
+}
+""" % {"int": as_cstr(IntType)}
+
+
+_factorisations = ("lu", "ilu", "cholesky", "icc")
+"""PC types factoring the matrix, which a
+:class:`SinglePrecisionMatrix` does not support."""
+
+
+class SinglePrecisionMatrix(object):
+    """A python matrix context holding the values of an assembled
+    matrix in single precision.
+
+    :arg A: the assembled (AIJ or BAIJ) PETSc Mat.
+
+    PETSc stores matrices in its (double precision) scalar type, so
+    the values of ``A`` are copied into single precision storage.  The
+    action is computed with double precision vectors and accumulation,
+    so only the matrix values are rounded, halving the memory traffic
+    of the values in a matrix-vector product.  The matrix provides
+    its action and diagonal, so can be used with preconditioners that
+    only need those (for example Jacobi, or Chebyshev iterations with
+    a Jacobi preconditioner), but cannot be factored (so not with LU,
+    ILU, Cholesky or ICC).
+
+    The operator is still assembled in double precision (into ``A``)
+    and then copied, so this saves bandwidth in every application,
+    but no memory.  Only the matrices built by the assembled, mass
+    inverse and low order preconditioners can be stored like this, not
+    a solver's own Jacobian (or preconditioning matrix), nor the level
+    operators of a multigrid hierarchy.
+    """
+
+    _supported = ("seqaij", "mpiaij", "seqbaij", "mpibaij")
+
+    def __init__(self, A):
+        if A.getType() not in self._supported:
+            raise ValueError("Single precision storage of a '%s' matrix not supported, use one of %s"
+                             % (A.getType(), ", ".join(self._supported)))
+        self.comm = A.comm
+        self._spmv = load(spmv_code, "c", "spmv",
+                          argtypes=[as_ctypes(IntType)] + [ctypes.c_voidp]*5,
+                          restype=None,
+                          comm=self.comm)
+        x, _ = A.createVecs()
+        indptr, indices, _ = A.getValuesCSR()
+        if self.comm.size > 1:
+            # Number the owned columns first, followed by the
+            # off-process columns, which are the only ones gathered.
+            cstart, cend = A.getOwnershipRangeColumn()
+            offproc = (indices < cstart) | (indices >= cend)
+            columns, ghosts = numpy.unique(indices[offproc], return_inverse=True)
+            indices = indices - cstart
+            indices[offproc] = (cend - cstart) + ghosts
+            self._x = numpy.empty(cend - cstart + len(columns), dtype=PETSc.ScalarType)
+            self._ghosts = PETSc.Vec().createWithArray(self._x[cend - cstart:], comm=PETSc.COMM_SELF)
+            iset = PETSc.IS().createGeneral(columns.astype(IntType), comm=PETSc.COMM_SELF)
+            self._scatter = PETSc.Scatter().create(x, iset, self._ghosts, None)
+        else:
+            self._scatter = None
+        self.indptr = numpy.ascontiguousarray(indptr, dtype=IntType)
+        self.indices = numpy.ascontiguousarray(indices, dtype=IntType)
+        self.diagonal = x.duplicate()
+        self.update(A)
+
+    def update(self, A):
+        """Copy the values of ``A`` (which must have the same sparsity
+        as the matrix this was created with)."""
+        _, _, values = A.getValuesCSR()
+        self.values = numpy.ascontiguousarray(values, dtype=numpy.float32)
+        A.getDiagonal(self.diagonal)
+
+    def mult(self, mat, x, y):
+        if self._scatter is not None:
+            self._scatter.scatter(x, self._ghosts, addv=PETSc.InsertMode.INSERT_VALUES,
+                                  mode=PETSc.ScatterMode.FORWARD)
+            xarray = self._x
+            xarray[:x.getLocalSize()] = x.array_r
+        else:
+            xarray = x.array_r
+        yarray = y.array
+        self._spmv(len(self.indptr) - 1,
+                   self.indptr.ctypes.data, self.indices.ctypes.data,
+                   self.values.ctypes.data, xarray.ctypes.data,
+                   yarray.ctypes.data)
+
+    def getDiagonal(self, mat, vec):
+        self.diagonal.copy(vec)
+
+    def view(self, mat, viewer=None):
+        if viewer is None:
+            return
+        if viewer.getType() == PETSc.Viewer.Type.ASCII:
+            viewer.printfASCII("Single precision copy of an assembled matrix, %d nonzeros\n"
+                               % len(self.values))
+
+
+def preconditioner_matrix(A, options_prefix):
+    """Return the PETSc Mat a preconditioner should be built from.
+
+    :arg A: an assembled :class:`~.MatrixBase`.
+    :arg options_prefix: the options prefix of the preconditioner.
+    :returns: a tuple of the Mat and a callable (with no arguments)
+        updating it after ``A`` is reassembled.
+
+    If the option ``mat_precision`` (with the given prefix) is
+    ``"single"`` the Mat holds its values in single precision, see
+    :class:`SinglePrecisionMatrix`, otherwise (the default) it is
+    ``A.petscmat``.  Single precision cannot be combined with a
+    factorisation ``pc_type`` (with the given prefix).
+    """
+    options = PETSc.Options()
+    precision = options.getString(options_prefix + "mat_precision", "double")
+    if precision == "double":
+        return A.petscmat, lambda: None
+    elif precision != "single":
+        raise ValueError("Unknown matrix precision '%s', expecting 'single' or 'double'" % precision)
+    pc_type = options.getString(options_prefix + "pc_type", None)
+    if pc_type in _factorisations:
+        raise ValueError("Cannot factor a single precision matrix with pc_type '%s', "
+                         "use a preconditioner only needing its action and diagonal" % pc_type)
+    ctx = SinglePrecisionMatrix(A.petscmat)
+    mat = PETSc.Mat().create(comm=A.comm)
+    mat.setType("python")
+    mat.setSizes(A.petscmat.getSizes(), bsize=A.petscmat.getBlockSize())
+    mat.setPythonContext(ctx)
+    mat.setUp()
+    mat.setNullSpace(A.petscmat.getNullSpace())
+    tnullsp = A.petscmat.getTransposeNullSpace()
+    if tnullsp.handle != 0:
+        mat.setTransposeNullSpace(tnullsp)
+    nearnullsp = A.petscmat.getNearNullSpace()
+    if nearnullsp.handle != 0:
+        mat.setNearNullSpace(nearnullsp)
+
+    def update():
+        ctx.update(A.petscmat)
+        mat.assemble()
+    return mat, update
@@ -2,7 +2,7 @@ import abc
 import ufl
 
 import firedrake
-from firedrake.utils import cached_property
+from firedrake.utils import cached_property, dat_version
 from firedrake import expression
 from firedrake import functionspace
 from firedrake import functionspaceimpl
@@ -192,11 +192,23 @@ class BasicProjector(ProjectorBase):
 
 
 class SupermeshProjector(ProjectorBase):
-    @cached_property
+    @property
     def mixed_mass(self):
-        from firedrake.supermeshing import assemble_mixed_mass_matrix
-        return assemble_mixed_mass_matrix(self.source.function_space(),
-                                          self.target.function_space())
+        """The mixed mass matrix of the source and target spaces.
+
+        The matrix is kept until the coordinates of either mesh
+        change (or on every access, if PyOP2 does not track versions,
+        see :func:`~.supermeshing.mixed_mass_matrix`).
+        """
+        from firedrake.supermeshing import mixed_mass_matrix
+        V_A = self.source.function_space()
+        V_B = self.target.function_space()
+        versions = (dat_version(V_A.mesh().coordinates.dat),
+                    dat_version(V_B.mesh().coordinates.dat))
+        if None in versions or versions != getattr(self, "_mixed_mass_versions", None):
+            self._mixed_mass = mixed_mass_matrix(V_A, V_B)
+            self._mixed_mass_versions = versions
+        return self._mixed_mass
 
     @property
     def rhs(self):
@@ -4,8 +4,8 @@ import numpy as np
 from firedrake.slate.static_condensation.sc_base import SCBase
 from firedrake.matrix_free.operators import ImplicitMatrixContext
 from firedrake.petsc import PETSc
-from firedrake.parloops import par_loop, READ, INC
 from firedrake.slate.slate import Tensor, AssembledVector
+from pyop2.datatypes import IntType
 from pyop2.profiling import timed_region, timed_function
 from pyop2.utils import as_tuple
 
@@ -91,24 +91,13 @@ class HybridizationPC(SCBase):
         self.broken_solution = Function(V_d)
         self.broken_residual = Function(V_d)
         self.trace_solution = Function(TraceSpace)
-        self.unbroken_solution = Function(V)
-        self.unbroken_residual = Function(V)
-
-        shapes = (V[self.vidx].finat_element.space_dimension(),
-                  np.prod(V[self.vidx].shape))
-        weight_kernel = """
-        for (int i=0; i<%d; ++i) {
-        for (int j=0; j<%d; ++j) {
-        w[i][j] += 1.0;
-        }}""" % shapes
-
-        self.weight = Function(V[self.vidx])
-        par_loop(weight_kernel, ufl.dx, {"w": (self.weight, INC)})
-        self.average_kernel = """
-        for (int i=0; i<%d; ++i) {
-        for (int j=0; j<%d; ++j) {
-        vec_out[i][j] += vec_in[i][j]/w[i][j];
-        }}""" % shapes
+
+        # The averaging of the broken spaces into the unbroken ones
+        # (and its transpose) transfers data between them
+        self.transfer = PETSc.Mat().createNest([[_broken_transfer(Vi, V_d[j]) if i == j else None
+                                                 for j in range(len(V))]
+                                                for i, Vi in enumerate(V)],
+                                               comm=pc.comm)
 
         # Create the symbolic Schur-reduction:
         # Original mixed operator replaced with "broken"
@@ -299,29 +288,15 @@ class HybridizationPC(SCBase):
         """
 
         with timed_region("HybridBreak"):
-            with self.unbroken_residual.dat.vec_wo as v:
-                x.copy(v)
-
-            # Transfer unbroken_rhs into broken_rhs
-            # NOTE: Scalar space is already "broken" so no need for
-            # any projections
-            unbroken_scalar_data = self.unbroken_residual.split()[self.pidx]
-            broken_scalar_data = self.broken_residual.split()[self.pidx]
-            unbroken_scalar_data.dat.copy(broken_scalar_data.dat)
-
-            # Assemble the new "broken" hdiv residual
-            # We need a residual R' in the broken space that
-            # gives R'[w] = R[w] when w is in the unbroken space.
-            # We do this by splitting the residual equally between
-            # basis functions that add together to give unbroken
-            # basis functions.
-            unbroken_res_hdiv = self.unbroken_residual.split()[self.vidx]
-            broken_res_hdiv = self.broken_residual.split()[self.vidx]
-            broken_res_hdiv.assign(0)
-            par_loop(self.average_kernel, ufl.dx,
-                     {"w": (self.weight, READ),
-                      "vec_in": (unbroken_res_hdiv, READ),
-                      "vec_out": (broken_res_hdiv, INC)})
+            # Transfer the unbroken rhs into the broken rhs.  We need
+            # a residual R' in the broken space that gives R'[w] =
+            # R[w] when w is in the unbroken space.  We do this by
+            # splitting the residual equally between basis functions
+            # that add together to give unbroken basis functions.
+            # NOTE: Scalar space is already "broken", so this is the
+            # identity there.
+            with self.broken_residual.dat.vec_wo as v:
+                self.transfer.multTranspose(x, v)
 
         with timed_region("HybridRHS"):
             # Compute the rhs for the multiplier system
@@ -357,23 +332,10 @@ class HybridizationPC(SCBase):
         self._elim_unknown()
 
         with timed_region("HybridProject"):
-            # Project the broken solution into non-broken spaces
-            broken_pressure = self.broken_solution.split()[self.pidx]
-            unbroken_pressure = self.unbroken_solution.split()[self.pidx]
-            broken_pressure.dat.copy(unbroken_pressure.dat)
-
-            # Compute the hdiv projection of the broken hdiv solution
-            broken_hdiv = self.broken_solution.split()[self.vidx]
-            unbroken_hdiv = self.unbroken_solution.split()[self.vidx]
-            unbroken_hdiv.assign(0)
-
-            par_loop(self.average_kernel, ufl.dx,
-                     {"w": (self.weight, READ),
-                      "vec_in": (broken_hdiv, READ),
-                      "vec_out": (unbroken_hdiv, INC)})
-
-        with self.unbroken_solution.dat.vec_ro as v:
-            v.copy(y)
+            # Project the broken solution into non-broken spaces by
+            # averaging the broken hdiv solution.
+            with self.broken_solution.dat.vec_ro as v:
+                self.transfer.mult(v, y)
 
     def view(self, pc, viewer=None):
         """Viewer calls for the various configurable objects in this PC."""
@@ -388,3 +350,55 @@ class HybridizationPC(SCBase):
         viewer.pushASCIITab()
         viewer.printfASCII("Project the broken hdiv solution into the HDiv space.\n")
         viewer.popASCIITab()
+
+
+def _cell_nodes(V):
+    """The nodes of each (owned and halo) cell of a space, with a row
+    for each cell (and layer, on extruded meshes)."""
+    mesh = V.mesh()
+    cell_nodes = V.cell_node_map().values_with_halo
+    if not mesh.cell_set._extruded:
+        return cell_nodes
+    ncell = len(cell_nodes)
+    if mesh.variable_layers:
+        layers = mesh.cell_set.layers_array
+        cell_layers = layers[:, 1] - layers[:, 0] - 1
+    else:
+        cell_layers = np.full(ncell, mesh.layers - 1, dtype=IntType)
+    cells = np.repeat(np.arange(ncell, dtype=IntType), cell_layers)
+    layer = (np.arange(len(cells), dtype=IntType)
+             - np.repeat(np.cumsum(cell_layers) - cell_layers, cell_layers))
+    return cell_nodes[cells] + V.offset*layer.reshape(-1, 1)
+
+
+def _broken_transfer(V, V_d):
+    """Assemble the averaging of a broken space into an unbroken space.
+
+    :arg V: the unbroken :class:`.FunctionSpace`.
+    :arg V_d: the :class:`.FunctionSpace` of the broken element of ``V``.
+    :returns: a PETSc AIJ matrix (with a row for each dof of ``V``)
+        setting each unbroken dof to the average of the broken dofs
+        of the cells it is shared between.
+    """
+    bs = V.dof_dset.cdim
+    component = np.arange(bs, dtype=IntType)
+    rows = (_cell_nodes(V).reshape(-1, 1)*bs + component).ravel()
+    columns = (_cell_nodes(V_d).reshape(-1, 1)*bs + component).ravel()
+    columns = V_d.dof_dset.scalar_lgmap.apply(columns)
+    nrows = V.dof_dset.size*bs
+    # Halo cells complete the rows of the owned dofs
+    owned = rows < nrows
+    rows, columns = rows[owned], columns[owned]
+    order = np.lexsort((columns, rows))
+    rows, columns = rows[order], columns[order]
+    counts = np.bincount(rows, minlength=nrows)
+    indptr = np.zeros(nrows + 1, dtype=IntType)
+    np.cumsum(counts, out=indptr[1:])
+
+    mat = PETSc.Mat().create(comm=V.comm)
+    mat.setType(PETSc.Mat.Type.AIJ)
+    mat.setSizes((V.dof_dset.layout_vec.getSizes(),
+                  V_d.dof_dset.layout_vec.getSizes()), bsize=bs)
+    mat.setPreallocationCSR((indptr, columns.astype(IntType), 1.0/counts[rows]))
+    mat.assemble()
+    return mat
@@ -19,12 +19,16 @@
 
 __all__ = ["solve"]
 
+import weakref
+from collections import OrderedDict
+
 import ufl
 
 import firedrake.linear_solver as ls
 import firedrake.variational_solver as vs
 from firedrake import solving_utils
 from firedrake import dmhooks
+from firedrake import utils
 import firedrake
 
 
@@ -115,6 +119,19 @@ def solve(*args, **kwargs):
 
     In the same fashion you can add the near nullspace using the
     ``near_nullspace`` keyword argument.
+
+    *Reusing solvers*
+
+    Each call to solve a variational problem builds a new solver.
+    Setting ``parameters["solver_cache_size"]`` to a positive number
+    caches that many solvers per solution :class:`.Function`, a
+    repeated call with the same forms (up to the values of their
+    coefficients), boundary conditions and solver parameters then
+    reuses the matrices, kernels and PETSc solver objects of the
+    previous call.  The operator of a linear problem is only
+    reassembled if the values of its coefficients (or the mesh
+    coordinates) have changed, where PyOP2 tracks modifications (see
+    :func:`~.utils.dat_version`), and otherwise on every call.
     """
 
     assert(len(args) > 0)
@@ -137,20 +154,30 @@ def _solve_varproblem(*args, **kwargs):
         options_prefix = _extract_args(*args, **kwargs)
 
     appctx = kwargs.get("appctx", {})
+    key = (u, bcs, form_compiler_parameters, solver_parameters,
+           nullspace, nullspace_T, near_nullspace, options_prefix, appctx)
     # Solve linear variational problem
     if isinstance(eq.lhs, ufl.Form) and isinstance(eq.rhs, ufl.Form):
 
-        # Create problem
-        problem = vs.LinearVariationalProblem(eq.lhs, eq.rhs, u, bcs, Jp,
-                                              form_compiler_parameters=form_compiler_parameters)
-
-        # Create solver and call solve
-        solver = vs.LinearVariationalSolver(problem, solver_parameters=solver_parameters,
-                                            nullspace=nullspace,
-                                            transpose_nullspace=nullspace_T,
-                                            near_nullspace=near_nullspace,
-                                            options_prefix=options_prefix,
-                                            appctx=appctx)
+        def make_solver():
+            # Create problem
+            problem = vs.LinearVariationalProblem(eq.lhs, eq.rhs, u, bcs, Jp,
+                                                  form_compiler_parameters=form_compiler_parameters)
+
+            # Create solver
+            return vs.LinearVariationalSolver(problem, solver_parameters=solver_parameters,
+                                              nullspace=nullspace,
+                                              transpose_nullspace=nullspace_T,
+                                              near_nullspace=near_nullspace,
+                                              options_prefix=options_prefix,
+                                              appctx=appctx)
+
+        solver, cached = _cached_solver(make_solver, "linear", eq.lhs, eq.rhs, Jp, *key)
+        state = _operator_state(eq.lhs, Jp)
+        if cached and (state is None or state != solver._operator_state):
+            # The values the operator depends on have changed.
+            solver.invalidate_jacobian()
+        solver._operator_state = state
         solver.solve()
 
     # Solve nonlinear variational problem
@@ -158,20 +185,128 @@ def _solve_varproblem(*args, **kwargs):
 
         if eq.rhs != 0:
             raise TypeError("Only '0' support on RHS of nonlinear Equation, not %r" % eq.rhs)
-        # Create problem
-        problem = vs.NonlinearVariationalProblem(eq.lhs, u, bcs, J, Jp,
-                                                 form_compiler_parameters=form_compiler_parameters)
-
-        # Create solver and call solve
-        solver = vs.NonlinearVariationalSolver(problem, solver_parameters=solver_parameters,
-                                               nullspace=nullspace,
-                                               transpose_nullspace=nullspace_T,
-                                               near_nullspace=near_nullspace,
-                                               options_prefix=options_prefix,
-                                               appctx=appctx)
+
+        def make_solver():
+            # Create problem
+            problem = vs.NonlinearVariationalProblem(eq.lhs, u, bcs, J, Jp,
+                                                     form_compiler_parameters=form_compiler_parameters)
+
+            # Create solver
+            return vs.NonlinearVariationalSolver(problem, solver_parameters=solver_parameters,
+                                                 nullspace=nullspace,
+                                                 transpose_nullspace=nullspace_T,
+                                                 near_nullspace=near_nullspace,
+                                                 options_prefix=options_prefix,
+                                                 appctx=appctx)
+
+        solver, _ = _cached_solver(make_solver, "nonlinear", eq.lhs, J, Jp, *key)
         solver.solve()
 
 
+def _cached_solver(make_solver, kind, F, J, Jp, u, bcs, form_compiler_parameters,
+                   solver_parameters, nullspace, nullspace_T, near_nullspace,
+                   options_prefix, appctx):
+    """Return a solver for a variational problem, reusing a previous
+    one if the solver cache is enabled.
+
+    :arg make_solver: a callable with no arguments returning a new
+        solver.
+    :arg kind: ``"linear"`` or ``"nonlinear"``.
+    :arg F: the residual (or bilinear form, for linear problems).
+    :arg J: the Jacobian (or linear form, for linear problems).
+    :arg Jp: the preconditioning form.
+
+    The remaining arguments are as for :func:`solve`.
+
+    :returns: a tuple of the solver and a flag indicating if it was
+        found in the cache.
+
+    Solvers are cached on the solution :class:`.Function`, so they
+    live (at most) as long as it does.  The key contains the
+    signatures of the forms and weak references to their
+    coefficients, the boundary conditions and null spaces, so that
+    only a change in the values of the coefficients reuses a solver.
+    """
+    from firedrake.parameters import parameters
+    size = parameters["solver_cache_size"]
+    if not size:
+        return make_solver(), False
+    key = (kind, _form_key(F), _form_key(J), _form_key(Jp),
+           tuple(map(_ref, bcs)), _parameters_key(form_compiler_parameters),
+           _parameters_key(solver_parameters), _ref(nullspace), _ref(nullspace_T),
+           _ref(near_nullspace), options_prefix, _ref(appctx or None))
+    try:
+        cache = u._solver_cache
+    except AttributeError:
+        cache = u._solver_cache = OrderedDict()
+    try:
+        solver = cache.pop(key)
+        cached = True
+    except KeyError:
+        solver = make_solver()
+        cached = False
+    cache[key] = solver
+    while len(cache) > size:
+        cache.popitem(last=False)
+    return solver, cached
+
+
+def _ref(obj):
+    """A cache key for an object: a weak reference to it.
+
+    Objects that cannot be weakly referenced (dicts) are keyed by
+    their id, which is not recycled while the cached solver (which
+    holds them) is alive."""
+    if obj is None:
+        return None
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        return id(obj)
+
+
+def _form_key(form):
+    "A cache key for a form: its signature, domains and coefficients."
+    if form is None or not isinstance(form, ufl.Form):
+        return _ref(form)
+    return (form.signature(),
+            tuple(map(_ref, form.ufl_domains())),
+            tuple(map(_ref, form.coefficients())))
+
+
+def _operator_state(*forms):
+    """The versions of the values the operator assembled from some
+    forms depends on: those of the coefficients and the coordinates.
+
+    :returns: a tuple of versions, or ``None`` if they are not
+        tracked (see :func:`~.utils.dat_version`).
+    """
+    dats = []
+    for form in forms:
+        if isinstance(form, ufl.Form):
+            dats.extend(c.dat for c in form.coefficients())
+            dats.extend(m.coordinates.dat for m in form.ufl_domains())
+    versions = tuple(map(utils.dat_version, dats))
+    if None in versions:
+        return None
+    return versions
+
+
+def _parameters_key(parameters):
+    "A cache key for a (possibly nested) parameters dict."
+    if not parameters:
+        return ()
+    from firedrake.petsc import flatten_parameters
+    key = []
+    for k, v in sorted(flatten_parameters(parameters).items()):
+        try:
+            hash(v)
+        except TypeError:
+            v = id(v)
+        key.append((k, v))
+    return tuple(key)
+
+
 def _la_solve(A, x, b, **kwargs):
     r"""Solve a linear algebra problem.
 
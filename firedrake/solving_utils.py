@@ -72,7 +72,6 @@ class _SNESContext(object):
     def __init__(self, problem, mat_type, pmat_type, appctx=None,
                  pre_jacobian_callback=None, pre_function_callback=None,
                  options_prefix=None):
-        from firedrake.assemble import create_assembly_callable
         if pmat_type is None:
             pmat_type = mat_type
         self.mat_type = mat_type
@@ -117,11 +116,16 @@ class _SNESContext(object):
             # pmat_type == mat_type and Jp is None
             self.Jp = None
 
-        self._assemble_residual = create_assembly_callable(self.F,
-                                                           tensor=self._F,
-                                                           form_compiler_parameters=self.fcp)
-
         self._jacobian_assembled = False
+        # Is the operator the Galerkin projection of the one on the
+        # finer level (rather than assembled from the form)?
+        self.galerkin = False
+        self._operators_updated = False
+        # Largest number of linear iterations with which the Jacobian
+        # is reused rather than reassembled (None to always reassemble).
+        self.jacobian_reuse = None
+        self.jacobian_assemblies = 0
+        self.jacobian_reuses = 0
         self._splits = {}
         self._coarse = None
         self._fine = None
@@ -270,6 +274,25 @@ class _SNESContext(object):
         with ctx._F.dat.vec_ro as v:
             v.copy(F)
 
+    def _reuse_jacobian(self, snes):
+        r"""Should the assembled Jacobian be reused?
+
+        :arg snes: a PETSc SNES object
+
+        The Jacobian (and so the preconditioner) is reused if
+        :attr:`jacobian_reuse` is set and the last linear solve
+        converged in at most that many iterations.  It is never
+        reused with a ``preonly`` KSP, which always takes one
+        iteration, however far the Jacobian is from the current one.
+        """
+        if self.jacobian_reuse is None or not self._jacobian_assembled:
+            return False
+        ksp = snes.getKSP()
+        if ksp.getType() == PETSc.KSP.Type.PREONLY:
+            return False
+        return ksp.getConvergedReason() > 0 and \
+            ksp.getIterationNumber() <= self.jacobian_reuse
+
     @staticmethod
     def form_jacobian(snes, X, J, P):
         r"""Form the Jacobian for this problem
@@ -288,7 +311,11 @@ class _SNESContext(object):
             # Don't need to do any work with a constant jacobian
             # that's already assembled
             return
+        if ctx._reuse_jacobian(snes):
+            ctx.jacobian_reuses += 1
+            return
         ctx._jacobian_assembled = True
+        ctx.jacobian_assemblies += 1
 
         # X may not be the same vector as the vec behind self._x, so
         # copy guess in from X.
@@ -321,31 +348,49 @@ class _SNESContext(object):
         """
         dm = ksp.getDM()
         ctx = dmhooks.get_appctx(dm)
-        problem = ctx._problem
 
         assert J.handle == ctx._jac.petscmat.handle
-        if problem._constant_jacobian and ctx._jacobian_assembled:
+        assert P.handle == ctx._pjac.petscmat.handle
+        if ctx._operators_updated:
+            # Already updated to project a coarser Galerkin operator
+            ctx._operators_updated = False
+            return
+        ctx._compute_operators()
+
+    def _compute_operators(self):
+        r"""Form the Jacobian on a coarse level of a multigrid hierarchy"""
+        problem = self._problem
+        if problem._constant_jacobian and self._jacobian_assembled:
             # Don't need to do any work with a constant jacobian
             # that's already assembled
             return
-        ctx._jacobian_assembled = True
+        self._jacobian_assembled = True
 
-        fine = ctx._fine
+        fine = self._fine
         if fine is not None:
             _, _, inject = dmhooks.get_transfer_operators(fine._x.function_space().dm)
-            inject(fine._x, ctx._x)
-            for bc in ctx._problem.bcs:
-                bc.apply(ctx._x)
+            inject(fine._x, self._x)
+            for bc in problem.bcs:
+                bc.apply(self._x)
 
-        ctx._assemble_jac()
-        ctx._jac.force_evaluation()
-        if ctx.Jp is not None:
-            assert P.handle == ctx._pjac.petscmat.handle
-            ctx._assemble_pjac()
-            ctx._pjac.force_evaluation()
+        self._assemble_jac()
+        self._jac.force_evaluation()
+        if self._pjac is not self._jac:
+            self._assemble_pjac()
+            self._pjac.force_evaluation()
+
+    @cached_property
+    def _assemble_residual(self):
+        from firedrake.assemble import create_assembly_callable
+        from firedrake.tsfc_interface import action_parameters
+        return create_assembly_callable(self.F, tensor=self._F,
+                                        form_compiler_parameters=action_parameters(self.F, self.fcp))
 
     @cached_property
     def _jac(self):
+        if self.galerkin:
+            from firedrake.mg.ufl_utils import GalerkinMatrix
+            return GalerkinMatrix(self)
         from firedrake.assemble import allocate_matrix
         return allocate_matrix(self.J, bcs=self._problem.bcs,
                                form_compiler_parameters=self.fcp,
@@ -355,6 +400,8 @@ class _SNESContext(object):
 
     @cached_property
     def _assemble_jac(self):
+        if self.galerkin:
+            return self._jac.assemble
         from firedrake.assemble import create_assembly_callable
         return create_assembly_callable(self.J, tensor=self._jac, bcs=self._problem.bcs, form_compiler_parameters=self.fcp, mat_type=self.mat_type)
 
@@ -364,6 +411,8 @@ class _SNESContext(object):
 
     @cached_property
     def _pjac(self):
+        if self.galerkin:
+            return self._jac
         if self.mat_type != self.pmat_type or self._problem.Jp is not None:
             from firedrake.assemble import allocate_matrix
             return allocate_matrix(self.Jp, bcs=self._problem.bcs, form_compiler_parameters=self.fcp, mat_type=self.pmat_type, appctx=self.appctx, options_prefix=self.options_prefix)
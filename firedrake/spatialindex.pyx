@@ -3,7 +3,7 @@ import numpy as np
 import ctypes
 import cython
 from libc.stdint cimport uintptr_t
-from libc.stdlib cimport free
+from libc.stdlib cimport free, malloc
 
 include "spatialindexinc.pxi"
 
@@ -102,3 +102,61 @@ def bounding_boxes(SpatialIndex sidx not None, np.ndarray[np.float64_t, ndim=1]
         pyids[i] = ids[i]
     free(ids)
     return pyids
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def intersections(SpatialIndex sidx not None,
+                  np.ndarray[np.float64_t, ndim=2, mode="c"] regions_lo,
+                  np.ndarray[np.float64_t, ndim=2, mode="c"] regions_hi):
+    """Given a spatial index and a set of regions, return the pairs of
+    regions and bounding boxes that intersect.
+
+    :arg sidx: the SpatialIndex
+    :arg regions_lo: the lower corners of the regions.
+    :arg regions_hi: the higher corners of the regions.
+    :returns: a tuple of two numpy arrays, pair ``i`` being region
+        ``regions[i]`` and bounding box ``boxes[i]``."""
+    cdef:
+        int64_t i, j, n, total
+        uint32_t dim
+        int64_t **ids = NULL
+        uint64_t *nids = NULL
+        RTError err
+        np.ndarray[np.int64_t, ndim=1, mode="c"] regions, boxes
+
+    assert regions_lo.shape[0] == regions_hi.shape[0]
+    assert regions_lo.shape[1] == regions_hi.shape[1]
+    n = regions_lo.shape[0]
+    dim = regions_lo.shape[1]
+    ids = <int64_t **>malloc(max(n, 1) * sizeof(int64_t *))
+    nids = <uint64_t *>malloc(max(n, 1) * sizeof(uint64_t))
+    if ids == NULL or nids == NULL:
+        free(ids)
+        free(nids)
+        raise MemoryError("failed to allocate intersections")
+    total = 0
+    try:
+        for i in range(n):
+            ids[i] = NULL
+            nids[i] = 0
+        for i in range(n):
+            err = Index_Intersects_id(sidx.index, &regions_lo[i, 0], &regions_hi[i, 0], dim,
+                                      &ids[i], &nids[i])
+            if err != RT_None:
+                raise RuntimeError("intersection failed")
+            total += nids[i]
+        regions = np.empty(total, dtype=np.int64)
+        boxes = np.empty(total, dtype=np.int64)
+        total = 0
+        for i in range(n):
+            for j in range(nids[i]):
+                regions[total] = i
+                boxes[total] = ids[i][j]
+                total += 1
+    finally:
+        for i in range(n):
+            free(ids[i])
+        free(ids)
+        free(nids)
+    return regions, boxes
@@ -1,27 +1,36 @@
 # Code for projections and other fun stuff involving supermeshes.
 import firedrake
 import ctypes
+import hashlib
 import os
-from firedrake.supermeshimpl import assemble_mixed_mass_matrix as ammm
+import weakref
+from firedrake.supermeshimpl import assemble_mixed_mass_matrix as ammm, preallocate_mixed_mass_matrix
 from firedrake.mg.utils import get_level
 from firedrake.petsc import PETSc
+from firedrake.utils import dat_version
 from firedrake.mg.kernels import to_reference_coordinates, compile_element
 from firedrake.utility_meshes import UnitTriangleMesh, UnitTetrahedronMesh
 from firedrake.functionspace import FunctionSpace
 from firedrake.assemble import assemble
 from firedrake.ufl_expr import TestFunction, TrialFunction
 import firedrake.mg.utils as utils
+import firedrake.spatialindex as spatialindex
 import ufl
 from ufl import inner, dx
 import numpy
-from pyop2.datatypes import ScalarType
+from pyop2.datatypes import IntType
 from pyop2.sparsity import get_preallocation
 from pyop2.compilation import load
-from pyop2.mpi import COMM_SELF
+from pyop2.mpi import COMM_SELF, MPI
 from pyop2.utils import get_petsc_dir
 
 
-__all__ = ["assemble_mixed_mass_matrix"]
+__all__ = ["assemble_mixed_mass_matrix", "mixed_mass_matrix"]
+
+
+_mixed_mass_cache = weakref.WeakKeyDictionary()
+"""Cached mixed mass matrices, keyed by mesh A, then mesh B, then the
+pair of elements."""
 
 
 class BlockMatrix(object):
@@ -44,6 +53,100 @@ class BlockMatrix(object):
             y.array[start::stride] = yi.array_r
 
 
+def candidate_cells(mesh_A, mesh_B):
+    """Return the pairs of cells of two meshes that (probably) intersect.
+
+    :arg mesh_A: the first mesh.
+    :arg mesh_B: the second mesh.
+    :returns: a tuple of two arrays ``(cells_A, cells_B)``, pair ``i``
+        being owned cell ``cells_A[i]`` of ``mesh_A`` and (possibly
+        halo) cell ``cells_B[i]`` of ``mesh_B``, or ``None`` if the
+        meshes are not the same mesh or adjacent levels of a
+        hierarchy (see :func:`intersection_finder`).
+    """
+    if mesh_A is mesh_B:
+        cells = numpy.arange(mesh_A.cell_set.size, dtype=IntType)
+        return cells, cells.copy()
+
+    (mh_A, level_A) = get_level(mesh_A)
+    (mh_B, level_B) = get_level(mesh_B)
+
+    if (mh_A is None or mh_B is None) or (mh_A is not mh_B) or abs(level_A - level_B) != 1:
+        return None
+
+    # What are the cells of B that (probably) intersect with a given cell in A?
+    if level_A > level_B:
+        cell_map = mh_A.fine_to_coarse_cells[level_A]
+    elif level_A < level_B:
+        cell_map = mh_A.coarse_to_fine_cells[level_A]
+    cells_A, k = numpy.nonzero(cell_map >= 0)
+    return cells_A.astype(IntType), cell_map[cells_A, k].astype(IntType)
+
+
+def cell_data(V):
+    """Return the vertex coordinates and global dofs of each cell.
+
+    :arg V: a (scalar) :class:`.FunctionSpace` on a simplex mesh.
+    :returns: a tuple of arrays of the vertex coordinates (with shape
+        ``(cells, vertices, gdim)``) and global dof numbers of each
+        (owned and halo) cell.
+    """
+    coordinates = V.mesh().coordinates
+    vertices = coordinates.dat.data_ro_with_halos[coordinates.cell_node_map().values_with_halo]
+    cell_nodes = V.cell_node_map().values_with_halo
+    dofs = V.dof_dset.lgmap.apply(cell_nodes.reshape(-1)).reshape(cell_nodes.shape)
+    return (numpy.ascontiguousarray(vertices, dtype=numpy.float64),
+            numpy.ascontiguousarray(dofs, dtype=IntType))
+
+
+def exchange_cells(V_B, vertices_A):
+    """Gather the cells of another mesh that may intersect the local cells.
+
+    :arg V_B: the :class:`.FunctionSpace` on the other mesh.
+    :arg vertices_A: the vertex coordinates of the owned local cells.
+    :returns: a tuple of arrays of the vertex coordinates and global
+        dofs of ``V_B`` (see :func:`cell_data`) of the owned cells of
+        every process that intersect the bounding box of the local
+        cells.
+
+    The meshes may be distributed differently.  Each cell is
+    received at most once, so pairing each owned local cell with the
+    received cells counts every intersection exactly once.  This is
+    collective over the communicator of ``V_B``.
+    """
+    comm = V_B.comm
+    lo = vertices_A.min(axis=(0, 1), initial=numpy.inf)
+    hi = vertices_A.max(axis=(0, 1), initial=-numpy.inf)
+    boxes = comm.allgather((lo, hi))
+    vertices, dofs = cell_data(V_B)
+    nowned = V_B.mesh().cell_set.size
+    vertices = vertices[:nowned]
+    dofs = dofs[:nowned]
+    cell_lo = vertices.min(axis=1)
+    cell_hi = vertices.max(axis=1)
+    send = []
+    for lo, hi in boxes:
+        mask = numpy.all((cell_lo <= hi) & (cell_hi >= lo), axis=1)
+        send.append((vertices[mask], dofs[mask]))
+    received = comm.alltoall(send)
+    return (numpy.ascontiguousarray(numpy.concatenate([v for v, _ in received])),
+            numpy.ascontiguousarray(numpy.concatenate([d for _, d in received])))
+
+
+def intersection_finder(vertices_A, vertices_B):
+    """Return the pairs of cells whose bounding boxes intersect.
+
+    :arg vertices_A: the vertex coordinates of the cells of one mesh.
+    :arg vertices_B: the vertex coordinates of the cells of the other.
+    :returns: a tuple of two arrays ``(cells_A, cells_B)`` of the
+        pairs of candidate intersecting cells.
+    """
+    index = spatialindex.from_regions(vertices_B.min(axis=1), vertices_B.max(axis=1))
+    cells_A, cells_B = spatialindex.intersections(index, vertices_A.min(axis=1),
+                                                  vertices_A.max(axis=1))
+    return cells_A.astype(IntType), cells_B.astype(IntType)
+
+
 def assemble_mixed_mass_matrix(V_A, V_B):
     """
     Construct the mixed mass matrix of two function spaces,
@@ -70,38 +173,6 @@ each supermesh cell.
     assert dim == mesh_A.topological_dimension()
     assert dim == mesh_B.topological_dimension()
 
-    (mh_A, level_A) = get_level(mesh_A)
-    (mh_B, level_B) = get_level(mesh_B)
-
-    if mesh_A is mesh_B:
-        def likely(cell_A):
-            return [cell_A]
-    else:
-        if (mh_A is None or mh_B is None) or (mh_A is not mh_B):
-            msg = """
-Sorry, only implemented for non-nested hierarchies for now. You need to
-call libsupermesh's intersection finder here to compute the likely cell
-coverings that we fetch from the hierarchy.
-"""
-
-            raise NotImplementedError(msg)
-
-        if abs(level_A - level_B) > 1:
-            raise NotImplementedError("Only works for transferring between adjacent levels for now.")
-
-        # What are the cells of B that (probably) intersect with a given cell in A?
-        if level_A > level_B:
-            cell_map = mh_A.fine_to_coarse_cells[level_A]
-
-            def likely(cell_A):
-                return cell_map[cell_A]
-
-        elif level_A < level_B:
-            cell_map = mh_A.coarse_to_fine_cells[level_A]
-
-            def likely(cell_A):
-                return cell_map[cell_A]
-
     assert V_A.value_size == V_B.value_size
     orig_value_size = V_A.value_size
     if V_A.value_size > 1:
@@ -112,6 +183,17 @@ coverings that we fetch from the hierarchy.
     assert V_A.value_size == 1
     assert V_B.value_size == 1
 
+    vertices_A, dofs_A = cell_data(V_A)
+    candidates = candidate_cells(mesh_A, mesh_B)
+    if candidates is None:
+        # Unrelated meshes, possibly distributed differently
+        vertices_A = vertices_A[:mesh_A.cell_set.size]
+        vertices_B, dofs_B = exchange_cells(V_B, vertices_A)
+        cells_A, cells_B = intersection_finder(vertices_A, vertices_B)
+    else:
+        vertices_B, dofs_B = cell_data(V_B)
+        cells_A, cells_B = candidates
+
     preallocator = PETSc.Mat().create(comm=mesh_A.comm)
     preallocator.setType(PETSc.Mat.Type.PREALLOCATOR)
 
@@ -125,12 +207,7 @@ coverings that we fetch from the hierarchy.
     preallocator.setSizes(size=(nrows, ncols), bsize=1)
     preallocator.setUp()
 
-    zeros = numpy.zeros((V_B.cell_node_map().arity, V_A.cell_node_map().arity), dtype=ScalarType)
-    for cell_A, dofs_A in enumerate(V_A.cell_node_map().values):
-        for cell_B in likely(cell_A):
-            dofs_B = V_B.cell_node_map().values_with_halo[cell_B, :]
-            preallocator.setValuesLocal(dofs_B, dofs_A, zeros)
-    preallocator.assemble()
+    preallocate_mixed_mass_matrix(dofs_A, dofs_B, cells_A, cells_B, preallocator)
 
     dnnz, onnz = get_preallocation(preallocator, nrows[0])
 
@@ -369,7 +446,7 @@ coverings that we fetch from the hierarchy.
                argtypes=[ctypes.c_voidp, ctypes.c_voidp, ctypes.c_voidp, ctypes.c_voidp, ctypes.c_voidp, ctypes.c_voidp, ctypes.c_voidp],
                restype=ctypes.c_int)
 
-    ammm(V_A, V_B, likely, node_locations_A, node_locations_B, M_SS, ctypes.addressof(lib), mat)
+    ammm(vertices_A, vertices_B, dofs_A, dofs_B, cells_A, cells_B, node_locations_A, node_locations_B, M_SS, ctypes.addressof(lib), mat)
 
     if orig_value_size == 1:
         return mat
@@ -384,3 +461,52 @@ coverings that we fetch from the hierarchy.
         blockmat = PETSc.Mat().createPython(size, context=context, comm=mat.comm)
         blockmat.setUp()
         return blockmat
+
+
+def coordinates_stamp(mesh):
+    """Return a stamp of the coordinates of a mesh, which changes when
+    they are modified.
+
+    This is the version of the coordinates where PyOP2 tracks versions
+    (see :func:`~.utils.dat_version`), and otherwise a digest of the
+    (owned) coordinates.
+    """
+    version = dat_version(mesh.coordinates.dat)
+    if version is not None:
+        return version
+    return hashlib.sha1(numpy.ascontiguousarray(mesh.coordinates.dat.data_ro)).hexdigest()
+
+
+def mixed_mass_matrix(V_A, V_B):
+    """Return the (cached) mixed mass matrix of two function spaces.
+
+    :arg V_A: the :class:`.FunctionSpace` of the TrialFunction.
+    :arg V_B: the :class:`.FunctionSpace` of the TestFunction.
+
+    See :func:`assemble_mixed_mass_matrix`.  Matrices are cached for
+    the lifetime of the meshes (which are only weakly referenced), by
+    the pair of meshes and elements.  A cached matrix is reassembled
+    if the coordinates of either mesh have changed since it was
+    assembled.  This is collective over the communicator of the
+    meshes.
+    """
+    mesh_A = V_A.mesh()
+    mesh_B = V_B.mesh()
+    cache = _mixed_mass_cache.setdefault(mesh_A, weakref.WeakKeyDictionary())
+    cache = cache.setdefault(mesh_B, {})
+    key = (V_A.ufl_element(), V_B.ufl_element())
+    stamp = (coordinates_stamp(mesh_A), coordinates_stamp(mesh_B))
+    try:
+        cached_stamp, mat = cache[key]
+        valid = cached_stamp == stamp
+    except KeyError:
+        valid = False
+    if dat_version(mesh_A.coordinates.dat) is None:
+        # Assembly is collective, so must agree on cache misses.
+        # Versions agree across processes, digests of the owned
+        # coordinates need not.
+        valid = mesh_A.comm.allreduce(valid, op=MPI.LAND)
+    if not valid:
+        mat = assemble_mixed_mass_matrix(V_A, V_B)
+        cache[key] = (stamp, mat)
+    return mat
@@ -28,6 +28,122 @@ __all__ = ['IntervalMesh', 'UnitIntervalMesh',
            'TorusMesh', 'CylinderMesh']
 
 
+def _construct_distributed(distribution_parameters, comm):
+    """Should a structured mesh be constructed directly in parallel?
+
+    This is requested with ``distribution_parameters={"partition":
+    "block"}`` on more than one process."""
+    if distribution_parameters is None:
+        return False
+    return comm.size > 1 and distribution_parameters.get("partition") == "block"
+
+
+def _local_block(n, comm):
+    """Return the contiguous range ``[start, end)`` of ``range(n)``
+    owned by this process."""
+    size, rank = comm.size, comm.rank
+    start = rank*(n // size) + min(rank, n % size)
+    return start, start + n // size + (rank < n % size)
+
+
+def _label_exterior_facets(plex):
+    """Label the facets carrying a boundary marker as exterior.
+
+    A distributed plex cannot distinguish the domain boundary from
+    process boundaries, so the exterior facets of distributed
+    structured meshes are labelled from the boundary markers."""
+    plex.createLabel("exterior_facets")
+    for marker in plex.getLabelIdIS(dmplex.FACE_SETS_LABEL).indices:
+        for face in plex.getStratumIS(dmplex.FACE_SETS_LABEL, marker).indices:
+            plex.setLabelValue("exterior_facets", face, 1)
+
+
+def _rectangle_coords(nx, ny, Lx, Ly, start, end):
+    """Return the coordinates of the vertices ``start:end`` of a
+    rectangle mesh (see :func:`_rectangle_cells` for the numbering)."""
+    v = np.arange(start, end, dtype=IntType)
+    coords = np.empty((end - start, 2), dtype=np.double)
+    # Vertices of the quadrilaterals, y moves fastest
+    corner = v < (nx + 1)*(ny + 1)
+    coords[corner, 0] = np.linspace(0.0, Lx, nx + 1, dtype=np.double)[v[corner] // (ny + 1)]
+    coords[corner, 1] = np.linspace(0.0, Ly, ny + 1, dtype=np.double)[v[corner] % (ny + 1)]
+    # Midpoints of the quadrilaterals ("crossed" diagonals)
+    centre = v[~corner] - (nx + 1)*(ny + 1)
+    dx = Lx * 0.5 / nx
+    dy = Ly * 0.5 / ny
+    coords[~corner, 0] = np.linspace(dx, Lx - dx, nx, dtype=np.double)[centre // ny]
+    coords[~corner, 1] = np.linspace(dy, Ly - dy, ny, dtype=np.double)[centre % ny]
+    return coords
+
+
+def _rectangle_cells(nx, ny, quadrilateral, diagonal, start, end):
+    """Return the cells of the quadrilaterals ``start:end`` of a
+    rectangle mesh, split into triangles as requested by
+    ``quadrilateral`` and ``diagonal``."""
+    q = np.arange(start, end, dtype=np.int32)
+    i, j = q // ny, q % ny
+    if not quadrilateral and diagonal == "crossed":
+        #
+        # 2-----3
+        # | \ / |
+        # |  4  |
+        # | / \ |
+        # 0-----1
+        cells = np.column_stack([i*(ny+1) + j,
+                                 i*(ny+1) + j+1,
+                                 (i+1)*(ny+1) + j,
+                                 (i+1)*(ny+1) + j+1,
+                                 (nx+1)*(ny+1) + i*ny + j])
+        idx = [0, 1, 4, 0, 2, 4, 2, 3, 4, 3, 1, 4]
+        return cells[:, idx].reshape(-1, 3)
+    cells = np.column_stack([i*(ny+1) + j, i*(ny+1) + j+1, (i+1)*(ny+1) + j+1, (i+1)*(ny+1) + j])
+    if not quadrilateral:
+        if diagonal == "left":
+            idx = [0, 1, 3, 1, 2, 3]
+        elif diagonal == "right":
+            idx = [0, 1, 2, 0, 2, 3]
+        else:
+            raise ValueError("Unrecognised value for diagonal '%r'", diagonal)
+        # two cells per cell above...
+        cells = cells[:, idx].reshape(-1, 3)
+    return cells
+
+
+def _box_coords(nx, ny, nz, Lx, Ly, Lz, start, end):
+    """Return the coordinates of the vertices ``start:end`` of a box
+    mesh.  X moves fastest, then Y, then Z."""
+    v = np.arange(start, end, dtype=IntType)
+    k, v = np.divmod(v, (nx + 1)*(ny + 1))
+    j, i = np.divmod(v, nx + 1)
+    return np.column_stack([np.linspace(0, Lx, nx + 1, dtype=np.double)[i],
+                            np.linspace(0, Ly, ny + 1, dtype=np.double)[j],
+                            np.linspace(0, Lz, nz + 1, dtype=np.double)[k]])
+
+
+def _box_cells(nx, ny, nz, start, end):
+    """Return the tetrahedra of the hexahedra ``start:end`` of a box
+    mesh, each hexahedron is split into six tetrahedra."""
+    h = np.arange(start, end, dtype=np.int32)
+    k, h = np.divmod(h, nx*ny)
+    j, i = np.divmod(h, nx)
+    v0 = k*(nx + 1)*(ny + 1) + j*(nx + 1) + i
+    v1 = v0 + 1
+    v2 = v0 + (nx + 1)
+    v3 = v1 + (nx + 1)
+    v4 = v0 + (nx + 1)*(ny + 1)
+    v5 = v1 + (nx + 1)*(ny + 1)
+    v6 = v2 + (nx + 1)*(ny + 1)
+    v7 = v3 + (nx + 1)*(ny + 1)
+
+    cells = [v0, v1, v3, v7,
+             v0, v1, v7, v5,
+             v0, v5, v7, v4,
+             v0, v3, v2, v7,
+             v0, v6, v4, v7,
+             v0, v2, v6, v7]
+    return np.column_stack(cells).reshape(-1, 4)
+
+
 def IntervalMesh(ncells, length_or_left, right=None, distribution_parameters=None, comm=COMM_WORLD):
     """
     Generate a uniform mesh of an interval.
@@ -351,57 +467,40 @@ def RectangleMesh(nx, ny, Lx, Ly, quadrilateral=False, reorder=None,
     * 2: plane x == Lx
     * 3: plane y == 0
     * 4: plane y == Ly
+
+    Passing ``distribution_parameters={"partition": "block"}``
+    constructs the mesh directly in parallel: each process only
+    creates a contiguous block of the cells and vertices.
     """
 
     for n in (nx, ny):
         if n <= 0 or n % 1:
             raise ValueError("Number of cells must be a postive integer")
 
-    xcoords = np.linspace(0.0, Lx, nx + 1, dtype=np.double)
-    ycoords = np.linspace(0.0, Ly, ny + 1, dtype=np.double)
-    coords = np.asarray(np.meshgrid(xcoords, ycoords)).swapaxes(0, 2).reshape(-1, 2)
-    # cell vertices
-    i, j = np.meshgrid(np.arange(nx, dtype=np.int32), np.arange(ny, dtype=np.int32))
-    if not quadrilateral and diagonal == "crossed":
-        dx = Lx * 0.5 / nx
-        dy = Ly * 0.5 / ny
-        xs = np.linspace(dx, Lx - dx, nx, dtype=np.double)
-        ys = np.linspace(dy, Ly - dy, ny, dtype=np.double)
-        extra = np.asarray(np.meshgrid(xs, ys)).swapaxes(0, 2).reshape(-1, 2)
-        coords = np.vstack([coords, extra])
-        #
-        # 2-----3
-        # | \ / |
-        # |  4  |
-        # | / \ |
-        # 0-----1
-        cells = [i*(ny+1) + j,
-                 i*(ny+1) + j+1,
-                 (i+1)*(ny+1) + j,
-                 (i+1)*(ny+1) + j+1,
-                 (nx+1)*(ny+1) + i*ny + j]
-        cells = np.asarray(cells).swapaxes(0, 2).reshape(-1, 5)
-        idx = [0, 1, 4, 0, 2, 4, 2, 3, 4, 3, 1, 4]
-        cells = cells[:, idx].reshape(-1, 3)
+    if quadrilateral or diagonal in ("left", "right"):
+        nvertices = (nx + 1)*(ny + 1)
+    elif diagonal == "crossed":
+        nvertices = (nx + 1)*(ny + 1) + nx*ny
     else:
-        cells = [i*(ny+1) + j, i*(ny+1) + j+1, (i+1)*(ny+1) + j+1, (i+1)*(ny+1) + j]
-        cells = np.asarray(cells).swapaxes(0, 2).reshape(-1, 4)
-        if not quadrilateral:
-            if diagonal == "left":
-                idx = [0, 1, 3, 1, 2, 3]
-            elif diagonal == "right":
-                idx = [0, 1, 2, 0, 2, 3]
-            else:
-                raise ValueError("Unrecognised value for diagonal '%r'", diagonal)
-            # two cells per cell above...
-            cells = cells[:, idx].reshape(-1, 3)
-
-    plex = mesh._from_cell_list(2, cells, coords, comm)
+        raise ValueError("Unrecognised value for diagonal '%r'", diagonal)
+
+    distribute = _construct_distributed(distribution_parameters, comm)
+    if distribute:
+        cells = _rectangle_cells(nx, ny, quadrilateral, diagonal,
+                                 *_local_block(nx*ny, comm))
+        coords = _rectangle_coords(nx, ny, Lx, Ly,
+                                   *_local_block(nvertices, comm))
+        plex = mesh._from_distributed_cell_list(2, cells, coords, comm)
+        distribution_parameters = dict(distribution_parameters, partition=False)
+    else:
+        cells = _rectangle_cells(nx, ny, quadrilateral, diagonal, 0, nx*ny)
+        coords = _rectangle_coords(nx, ny, Lx, Ly, 0, nvertices)
+        plex = mesh._from_cell_list(2, cells, coords, comm)
 
     # mark boundary facets
     plex.createLabel(dmplex.FACE_SETS_LABEL)
     plex.markBoundaryFaces("boundary_faces")
-    coords = plex.getCoordinates()
+    coords = plex.getCoordinatesLocal()
     coord_sec = plex.getCoordinateSection()
     if plex.getStratumSize("boundary_faces", 1) > 0:
         boundary_faces = plex.getStratumIS("boundary_faces", 1).getIndices()
@@ -417,6 +516,8 @@ def RectangleMesh(nx, ny, Lx, Ly, quadrilateral=False, reorder=None,
                 plex.setLabelValue(dmplex.FACE_SETS_LABEL, face, 3)
             if abs(face_coords[1] - Ly) < ytol and abs(face_coords[3] - Ly) < ytol:
                 plex.setLabelValue(dmplex.FACE_SETS_LABEL, face, 4)
+    if distribute:
+        _label_exterior_facets(plex)
 
     return mesh.Mesh(plex, reorder=reorder, distribution_parameters=distribution_parameters)
 
@@ -688,42 +789,33 @@ def BoxMesh(nx, ny, nz, Lx, Ly, Lz, reorder=None, distribution_parameters=None,
     * 4: plane y == Ly
     * 5: plane z == 0
     * 6: plane z == Lz
+
+    Passing ``distribution_parameters={"partition": "block"}``
+    constructs the mesh directly in parallel: each process only
+    creates a contiguous block of the cells and vertices.
     """
     for n in (nx, ny, nz):
         if n <= 0 or n % 1:
             raise ValueError("Number of cells must be a postive integer")
 
-    xcoords = np.linspace(0, Lx, nx + 1, dtype=np.double)
-    ycoords = np.linspace(0, Ly, ny + 1, dtype=np.double)
-    zcoords = np.linspace(0, Lz, nz + 1, dtype=np.double)
-    # X moves fastest, then Y, then Z
-    coords = np.asarray(np.meshgrid(xcoords, ycoords, zcoords)).swapaxes(0, 3).reshape(-1, 3)
-    i, j, k = np.meshgrid(np.arange(nx, dtype=np.int32),
-                          np.arange(ny, dtype=np.int32),
-                          np.arange(nz, dtype=np.int32))
-    v0 = k*(nx + 1)*(ny + 1) + j*(nx + 1) + i
-    v1 = v0 + 1
-    v2 = v0 + (nx + 1)
-    v3 = v1 + (nx + 1)
-    v4 = v0 + (nx + 1)*(ny + 1)
-    v5 = v1 + (nx + 1)*(ny + 1)
-    v6 = v2 + (nx + 1)*(ny + 1)
-    v7 = v3 + (nx + 1)*(ny + 1)
-
-    cells = [v0, v1, v3, v7,
-             v0, v1, v7, v5,
-             v0, v5, v7, v4,
-             v0, v3, v2, v7,
-             v0, v6, v4, v7,
-             v0, v2, v6, v7]
-    cells = np.asarray(cells).swapaxes(0, 3).reshape(-1, 4)
-
-    plex = mesh._from_cell_list(3, cells, coords, comm)
+    nhexes = nx*ny*nz
+    nvertices = (nx + 1)*(ny + 1)*(nz + 1)
+    distribute = _construct_distributed(distribution_parameters, comm)
+    if distribute:
+        cells = _box_cells(nx, ny, nz, *_local_block(nhexes, comm))
+        coords = _box_coords(nx, ny, nz, Lx, Ly, Lz,
+                             *_local_block(nvertices, comm))
+        plex = mesh._from_distributed_cell_list(3, cells, coords, comm)
+        distribution_parameters = dict(distribution_parameters, partition=False)
+    else:
+        cells = _box_cells(nx, ny, nz, 0, nhexes)
+        coords = _box_coords(nx, ny, nz, Lx, Ly, Lz, 0, nvertices)
+        plex = mesh._from_cell_list(3, cells, coords, comm)
 
     # Apply boundary IDs
     plex.createLabel(dmplex.FACE_SETS_LABEL)
     plex.markBoundaryFaces("boundary_faces")
-    coords = plex.getCoordinates()
+    coords = plex.getCoordinatesLocal()
     coord_sec = plex.getCoordinateSection()
     if plex.getStratumSize("boundary_faces", 1) > 0:
         boundary_faces = plex.getStratumIS("boundary_faces", 1).getIndices()
@@ -744,6 +836,8 @@ def BoxMesh(nx, ny, nz, Lx, Ly, Lz, reorder=None, distribution_parameters=None,
                 plex.setLabelValue(dmplex.FACE_SETS_LABEL, face, 5)
             if abs(face_coords[2] - Lz) < ztol and abs(face_coords[5] - Lz) < ztol and abs(face_coords[8] - Lz) < ztol:
                 plex.setLabelValue(dmplex.FACE_SETS_LABEL, face, 6)
+    if distribute:
+        _label_exterior_facets(plex)
 
     return mesh.Mesh(plex, reorder=reorder, distribution_parameters=distribution_parameters)
 
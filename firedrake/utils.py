@@ -62,3 +62,15 @@ def known_pyop2_safe(f):
         finally:
             opts["type_check"] = check
     return decorator(wrapper, f)
+
+
+def dat_version(dat):
+    """Return the version of the values of a PyOP2 data carrier.
+
+    :arg dat: a :class:`pyop2.Dat`, :class:`pyop2.MixedDat` or
+        :class:`pyop2.Global`.
+    :returns: a counter PyOP2 increments whenever the values are
+        modified, or ``None`` if the installed PyOP2 does not count
+        modifications (callers then compare the values instead).
+    """
+    return getattr(dat, "dat_version", None)
@@ -3,6 +3,7 @@ from itertools import chain
 from contextlib import ExitStack
 
 from firedrake import dmhooks
+from firedrake import performance
 from firedrake import slate
 from firedrake import solving_utils
 from firedrake import ufl_expr
@@ -99,6 +100,17 @@ class NonlinearVariationalSolver(OptionsManager):
                that has a complicated dependence on the unknown solution.
         :kwarg pre_function_callback: As above, but called immediately
                before residual assembly
+        :kwarg jacobian_reuse: an optional number of linear iterations.
+               If provided, the Jacobian (and preconditioner) is only
+               reassembled when the last linear solve took more than
+               this many iterations or failed, across Newton
+               iterations and calls to :meth:`solve`.  If a solve
+               fails to converge with a reused Jacobian it is
+               repeated with the Jacobian reassembled at every Newton
+               iteration.  The Jacobian is always reassembled with
+               a ``preonly`` KSP, whose iteration count says nothing
+               about the quality of the Jacobian.  See
+               :attr:`jacobian_assemblies` and :attr:`jacobian_reuses`.
 
         Example usage of the ``solver_parameters`` option: to set the
         nonlinear solver type to just use a linear solver, use
@@ -141,6 +153,7 @@ class NonlinearVariationalSolver(OptionsManager):
         options_prefix = kwargs.get("options_prefix")
         pre_j_callback = kwargs.get("pre_jacobian_callback")
         pre_f_callback = kwargs.get("pre_function_callback")
+        jacobian_reuse = kwargs.get("jacobian_reuse")
 
         super(NonlinearVariationalSolver, self).__init__(parameters, options_prefix)
 
@@ -159,6 +172,7 @@ class NonlinearVariationalSolver(OptionsManager):
                                          pre_jacobian_callback=pre_j_callback,
                                          pre_function_callback=pre_f_callback,
                                          options_prefix=self.options_prefix)
+        ctx.jacobian_reuse = jacobian_reuse
 
         # No preconditioner by default for matrix-free
         if (problem.Jp is not None and pmatfree) or matfree:
@@ -174,6 +188,9 @@ class NonlinearVariationalSolver(OptionsManager):
 
         self._ctx = ctx
         self._work = problem.u.dof_dset.layout_vec.duplicate()
+        # The initial guess, to restart from if a solve with a reused
+        # Jacobian fails
+        self._initial_guess = None
         self.snes.setDM(problem.dm)
 
         ctx.set_function(self.snes)
@@ -199,6 +216,8 @@ class NonlinearVariationalSolver(OptionsManager):
         # Used for custom grid transfer.
         self._transfer_operators = ()
         self._setup = False
+        # SolveReport of the last solve, if reports are switched on.
+        self.report = None
 
     def set_transfer_operators(self, *contextmanagers):
         r"""Set context managers which manages which grid transfer operators should be used.
@@ -221,7 +240,19 @@ class NonlinearVariationalSolver(OptionsManager):
 
            If bounds are provided the ``snes_type`` must be set to
            ``vinewtonssls`` or ``vinewtonrsls``.
+
+        If ``parameters["performance_reports"]`` is set, a
+        :class:`~.SolveReport` of the solve is stored as
+        :attr:`report`.
         """
+        from firedrake.parameters import parameters
+        if parameters["performance_reports"]:
+            with performance.solve_report(self):
+                self._solve(bounds)
+        else:
+            self._solve(bounds)
+
+    def _solve(self, bounds):
         # Make sure appcontext is attached to the DM before we solve.
         dm = self.snes.getDM()
         # Apply the boundary conditions to the initial guess.
@@ -235,17 +266,43 @@ class NonlinearVariationalSolver(OptionsManager):
         work = self._work
         with self._problem.u.dat.vec as u:
             u.copy(work)
+            if self._ctx.jacobian_reuse is not None:
+                # The residual evaluations overwrite u with the iterates
+                if self._initial_guess is None:
+                    self._initial_guess = work.duplicate()
+                work.copy(self._initial_guess)
             with ExitStack() as stack:
                 # Ensure options database has full set of options (so monitors
                 # work right)
                 for ctx in chain((self.inserted_options(), dmhooks.appctx(dm, self._ctx)),
                                  self._transfer_operators):
                     stack.enter_context(ctx)
+                reuses = self._ctx.jacobian_reuses
                 self.snes.solve(None, work)
+                if self.snes.getConvergedReason() < 0 and self._ctx.jacobian_reuses > reuses:
+                    # Stale Jacobian, try again reassembling it.
+                    jacobian_reuse = self._ctx.jacobian_reuse
+                    self._ctx.jacobian_reuse = None
+                    try:
+                        self._initial_guess.copy(work)
+                        self.snes.solve(None, work)
+                    finally:
+                        self._ctx.jacobian_reuse = jacobian_reuse
             work.copy(u)
         self._setup = True
         solving_utils.check_snes_convergence(self.snes)
 
+    @property
+    def jacobian_assemblies(self):
+        r"""The number of times the Jacobian has been assembled."""
+        return self._ctx.jacobian_assemblies
+
+    @property
+    def jacobian_reuses(self):
+        r"""The number of Jacobian assemblies saved by reusing the
+        Jacobian (see the ``jacobian_reuse`` argument)."""
+        return self._ctx.jacobian_reuses
+
 
 class LinearVariationalProblem(NonlinearVariationalProblem):
     r"""Linear variational problem a(u, v) = L(v)."""
@@ -318,3 +375,40 @@ class LinearVariationalSolver(NonlinearVariationalSolver):
         Forces the matrix to be reassembled next time it is required.
         """
         self._ctx._jacobian_assembled = False
+
+    @utils.cached_property
+    def _linear_solver(self):
+        from firedrake.linear_solver import LinearSolver
+        ctx = self._ctx
+        return LinearSolver(ctx._jac, P=ctx._pjac if ctx.Jp is not None else None,
+                            solver_parameters=self.parameters,
+                            nullspace=ctx._nullspace,
+                            transpose_nullspace=ctx._nullspace_T,
+                            near_nullspace=ctx._near_nullspace,
+                            options_prefix=self.options_prefix,
+                            ksp=self.snes.ksp)
+
+    def solve_many(self, us, Ls):
+        r"""Solve the problem for several right hand sides.
+
+        :arg us: an iterable of :class:`.Function`\s to write the
+             solutions into.
+        :arg Ls: an iterable of right hand sides, each either a
+             linear form or an assembled :class:`.Function`.
+
+        The operator and boundary conditions of the problem are used
+        with each right hand side in place of the problem's.  The
+        operator is assembled (if necessary) and the preconditioner
+        set up once, see :meth:`.LinearSolver.solve_many`.
+        """
+        from firedrake.assemble import assemble
+        ctx = self._ctx
+        dm = self.snes.getDM()
+        bs = [L if not isinstance(L, (ufl.Form, slate.slate.TensorBase))
+              else assemble(L, form_compiler_parameters=ctx.fcp)
+              for L in Ls]
+        with dmhooks.appctx(dm, ctx):
+            with self._problem.u.dat.vec_ro as X:
+                ctx.form_jacobian(self.snes, X, ctx._jac.petscmat,
+                                  ctx._pjac.petscmat)
+            self._linear_solver.solve_many(us, bs)
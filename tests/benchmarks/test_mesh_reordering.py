@@ -0,0 +1,27 @@
+from firedrake import *
+import pytest
+
+
+benchmark = pytest.mark.benchmark(warmup=True, disable_gc=True, warmup_iterations=1)
+
+
+@benchmark
+@pytest.mark.parametrize("reorder",
+                         [False] + sorted(mesh_reorderings))
+def test_assemble_laplace_residual(reorder, benchmark):
+    m = UnitCubeMesh(16, 16, 16, reorder=reorder)
+    V = FunctionSpace(m, 'CG', 2)
+
+    f = Function(V)
+    f.interpolate(SpatialCoordinate(m)[0])
+    v = TestFunction(V)
+    L = inner(grad(f), grad(v))*dx
+    g = assemble(L)
+
+    # Bytes moved per assembly: coordinates, the coefficient and the
+    # output, gathered and scattered once per cell.
+    ncells = m.cell_set.size
+    dofs = V.cell_node_map().arity + m.coordinates.cell_node_map().arity * 3
+    benchmark.extra_info["reorder"] = str(reorder)
+    benchmark.extra_info["bytes"] = ncells * (dofs + V.cell_node_map().arity) * 8
+    benchmark(lambda: assemble(L, tensor=g))
@@ -0,0 +1,56 @@
+from firedrake import *
+import pytest
+
+
+benchmark = pytest.mark.benchmark(warmup=True, disable_gc=True, warmup_iterations=1)
+
+
+@benchmark
+@pytest.mark.parametrize("degree", range(1, 7))
+@pytest.mark.parametrize("mat_type,mode",
+                         [("matfree", "spectral"),
+                          ("matfree", "vanilla"),
+                          ("aij", "spectral")],
+                         ids=["matfree-sumfact", "matfree", "aij"])
+def test_hex_laplace_action(mat_type, mode, degree, benchmark):
+    # Roughly the same number of dofs for each degree.
+    n = max(1, 24 // degree)
+    mesh = ExtrudedMesh(UnitSquareMesh(n, n, quadrilateral=True), n)
+    V = FunctionSpace(mesh, "Q", degree)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    A = assemble(inner(grad(u), grad(v))*dx, mat_type=mat_type,
+                 form_compiler_parameters={"mode": mode})
+    A.force_evaluation()
+    x, y = A.petscmat.createVecs()
+    x.set(1)
+    A.petscmat.mult(x, y)
+
+    # Throughput is dofs / time.
+    benchmark.extra_info["dofs"] = V.dim()
+    benchmark(lambda: A.petscmat.mult(x, y))
+
+
+@benchmark
+@pytest.mark.parametrize("degree", range(1, 7))
+@pytest.mark.parametrize("mode", ["spectral", "vanilla"],
+                         ids=["sumfact", "default"])
+def test_hex_residual(mode, degree, benchmark):
+    n = max(1, 24 // degree)
+    mesh = ExtrudedMesh(UnitSquareMesh(n, n, quadrilateral=True), n)
+    V = FunctionSpace(mesh, "Q", degree)
+    u = Function(V)
+    v = TestFunction(V)
+    x, y, z = SpatialCoordinate(mesh)
+    u.interpolate(x*y*z)
+    F = inner((1 + u**2)*grad(u), grad(v))*dx - inner(x, v)*dx
+    residual = Function(V)
+    assemble(F, tensor=residual, form_compiler_parameters={"mode": mode})
+    residual.dat.data_ro
+
+    def run():
+        assemble(F, tensor=residual, form_compiler_parameters={"mode": mode})
+        residual.dat.data_ro
+
+    benchmark.extra_info["dofs"] = V.dim()
+    benchmark(run)
@@ -185,3 +185,96 @@ def test_grid_transfer_parallel(hierarchy, transfer_type):
         run_restriction(hierarchy, vector, space, degrees)
     elif transfer_type == "prolongation":
         run_prolongation(hierarchy, vector, space, degrees)
+
+
+def test_transfer_operators_cached():
+    mesh = UnitSquareMesh(3, 3)
+    hierarchy = MeshHierarchy(mesh, 1, refinements_per_level=2)
+    Vc = VectorFunctionSpace(hierarchy[0], "CG", 2)
+    Vf = VectorFunctionSpace(hierarchy[1], "CG", 2)
+    x, y = SpatialCoordinate(hierarchy[0])
+    uc = interpolate(as_vector([x*y, x**2 - y]), Vc)
+    uf = Function(Vf)
+
+    prolong(uc, uf)
+    cache = hierarchy._shared_data_cache
+    operators = dict(cache["transfer_operators"])
+    work = dict(cache["transfer_work_functions"])
+    assert len(operators) == 2
+    assert len(work) == 1
+
+    prolong(uc, uf)
+    assert cache["transfer_operators"] == operators
+    assert cache["transfer_work_functions"] == work
+    x, y = SpatialCoordinate(hierarchy[1])
+    assert numpy.allclose(uf.dat.data_ro, interpolate(as_vector([x*y, x**2 - y]), Vf).dat.data_ro)
+
+    # Restriction is the transpose of prolongation
+    rf = Function(Vf)
+    rf.dat.data[:] = numpy.random.rand(*rf.dat.data.shape)
+    rc = Function(Vc)
+    restrict(rf, rc)
+    assert numpy.allclose(rc.dat.data_ro.ravel().dot(uc.dat.data_ro.ravel()),
+                          rf.dat.data_ro.ravel().dot(uf.dat.data_ro.ravel()))
+
+
+@pytest.mark.parametrize("refinements_per_level", [1, 2])
+def test_prolongation_matrix(refinements_per_level):
+    mesh = UnitSquareMesh(3, 3)
+    hierarchy = MeshHierarchy(mesh, 1, refinements_per_level=refinements_per_level)
+    Vc = VectorFunctionSpace(hierarchy[0], "CG", 2)
+    Vf = VectorFunctionSpace(hierarchy[1], "CG", 2)
+    bc = DirichletBC(Vf.sub(0), 0, 1)
+    uc = Function(Vc)
+    uc.dat.data[:] = numpy.random.rand(*uc.dat.data.shape)
+    uf = Function(Vf)
+    prolong(uc, uf)
+    bc.zero(uf)
+
+    P = prolongation_matrix(Vc, Vf, fbcs=[bc])
+    assert P.getType().endswith("aij")
+    expect = Function(Vf)
+    with uc.dat.vec_ro as x, expect.dat.vec_wo as y:
+        P.mult(x, y)
+    assert numpy.allclose(expect.dat.data_ro, uf.dat.data_ro)
+
+
+def test_grid_transfer_variable_layers():
+    mesh = UnitSquareMesh(2, 2)
+    base = MeshHierarchy(mesh, 2)
+    ncells = mesh.cell_set.total_size
+    layers = numpy.column_stack([numpy.arange(ncells) % 2,
+                                 2 + numpy.arange(ncells) % 3])
+    hierarchy = ExtrudedMeshHierarchy(base, layers, layer_height=0.25)
+    assert all(m.variable_layers for m in hierarchy)
+
+    Ve = FiniteElement("CG", hierarchy[0].ufl_cell(), 2)
+
+    def exact(mesh):
+        x, y, z = SpatialCoordinate(mesh)
+        return interpolate(x**2 + x*y - z**2, FunctionSpace(mesh, Ve))
+
+    actual = exact(hierarchy[0])
+    for mesh in hierarchy[1:]:
+        uf = Function(FunctionSpace(mesh, Ve))
+        prolong(actual, uf)
+        actual = uf
+        assert numpy.allclose(exact(mesh).dat.data_ro, actual.dat.data_ro)
+
+    for mesh in reversed(hierarchy[:-1]):
+        uc = Function(FunctionSpace(mesh, Ve))
+        inject(actual, uc)
+        actual = uc
+        assert numpy.allclose(exact(mesh).dat.data_ro, actual.dat.data_ro)
+
+    Vc = FunctionSpace(hierarchy[0], Ve)
+    Vf = FunctionSpace(hierarchy[1], Ve)
+    rf = Function(Vf)
+    rf.dat.data[:] = numpy.random.rand(*rf.dat.data.shape)
+    rc = Function(Vc)
+    restrict(rf, rc)
+    uc = exact(hierarchy[0])
+    uf = Function(Vf)
+    prolong(uc, uf)
+    assert numpy.allclose(rc.dat.data_ro.dot(uc.dat.data_ro),
+                          rf.dat.data_ro.dot(uf.dat.data_ro))
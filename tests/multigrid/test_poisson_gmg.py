@@ -95,3 +95,89 @@ def test_poisson_gmg_parallel_fas():
 @pytest.mark.parallel
 def test_poisson_gmg_parallel_newtonfas():
     assert run_poisson("newtonfas") < 4e-6
+
+
+@pytest.mark.parametrize("galerkin", [False, True])
+def test_poisson_gmg_assembled_transfers(galerkin):
+    mesh = UnitSquareMesh(10, 10)
+    mh = MeshHierarchy(mesh, 2)
+    V = FunctionSpace(mh[-1], "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    x = SpatialCoordinate(V.mesh())
+    a = dot(grad(u), grad(v))*dx
+    L = sin(pi*x[0])*sin(pi*x[1])*v*dx
+    bcs = DirichletBC(V, 0, (1, 2, 3, 4))
+
+    def run(transfer):
+        uh = Function(V)
+        parameters = {"ksp_type": "cg",
+                      "ksp_rtol": 1e-10,
+                      "pc_type": "mg",
+                      "mg_transfer_mat_type": transfer,
+                      "mg_levels_ksp_type": "chebyshev",
+                      "mg_levels_pc_type": "jacobi",
+                      "mg_coarse_pc_type": "lu"}
+        if galerkin:
+            parameters["pc_mg_galerkin"] = None
+        solver = LinearVariationalSolver(LinearVariationalProblem(a, L, uh, bcs=bcs),
+                                         solver_parameters=parameters)
+        solver.solve()
+        return uh, solver.snes.ksp.getIterationNumber()
+
+    uh, its = run("aij")
+    assert its < 10
+    if not galerkin:
+        expect, expect_its = run("matfree")
+        assert its == expect_its
+        assert errornorm(expect, uh) < 1e-8
+
+
+@pytest.mark.parametrize("operators",
+                         [{"mg_levels_operator": "galerkin"},
+                          {"mg_levels_1_operator": "galerkin"},
+                          {"mg_coarse_operator": "galerkin"}],
+                         ids=["all", "level1", "coarse"])
+def test_poisson_gmg_galerkin_levels(operators):
+    mesh = UnitSquareMesh(4, 4)
+    mh = MeshHierarchy(mesh, 2)
+    V = FunctionSpace(mh[-1], "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    x = SpatialCoordinate(V.mesh())
+    a = dot(grad(u), grad(v))*dx
+    L = sin(pi*x[0])*sin(pi*x[1])*v*dx
+    bcs = DirichletBC(V, 0, (1, 2, 3, 4))
+    uh = Function(V)
+    parameters = {"ksp_type": "cg",
+                  "ksp_rtol": 1e-10,
+                  "pc_type": "mg",
+                  "mg_levels_ksp_type": "chebyshev",
+                  "mg_levels_pc_type": "jacobi",
+                  "mg_coarse_pc_type": "lu"}
+    parameters.update(operators)
+    solver = LinearVariationalSolver(LinearVariationalProblem(a, L, uh, bcs=bcs),
+                                     solver_parameters=parameters)
+    solver.solve()
+    assert solver.snes.ksp.getIterationNumber() < 10
+
+    expect = Function(V)
+    solve(a == L, expect, bcs=bcs)
+    assert errornorm(expect, uh) < 1e-8
+
+    # For P1 on nested meshes the Galerkin and rediscretised operators agree
+    ctx = solver._ctx._coarse
+    galerkin = []
+    while ctx is not None:
+        if ctx.galerkin:
+            Vc = ctx._x.function_space()
+            uc = TrialFunction(Vc)
+            vc = TestFunction(Vc)
+            A = assemble(dot(grad(uc), grad(vc))*dx,
+                         bcs=DirichletBC(Vc, 0, (1, 2, 3, 4))).petscmat
+            G = ctx._jac.petscmat.copy()
+            G.axpy(-1, A, structure=PETSc.Mat.Structure.DIFFERENT_NONZERO_PATTERN)
+            assert G.norm() < 1e-10
+            galerkin.append(ctx)
+        ctx = ctx._coarse
+    assert len(galerkin) == (2 if "mg_levels_operator" in operators else 1)
@@ -0,0 +1,128 @@
+import pytest
+import os
+from firedrake import *
+import numpy as np
+
+
+@pytest.fixture(params=[False, True],
+                ids=["simplex", "quad"])
+def quadrilateral(request):
+    return request.param
+
+
+@pytest.fixture
+def meshfile(dumpdir):
+    return os.path.join(dumpdir, "mesh.h5")
+
+
+def poisson(mesh):
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    x, y = SpatialCoordinate(mesh)
+    uh = Function(V)
+    solve(inner(grad(u), grad(v))*dx == x*y*v*dx, uh,
+          bcs=DirichletBC(V, 0, (1, 2)),
+          solver_parameters={"ksp_type": "preonly",
+                             "pc_type": "lu"})
+    return uh
+
+
+def run_save_load(quadrilateral, meshfile):
+    mesh = UnitSquareMesh(5, 5, quadrilateral=quadrilateral)
+    mesh.init()
+    mesh.topology.save(meshfile)
+
+    loaded = Mesh(meshfile, dim=2)
+    loaded.init()
+
+    topology = mesh.topology
+    ltopology = loaded.topology
+    assert ltopology.ufl_cell() == topology.ufl_cell()
+    assert np.array_equal(ltopology._entity_classes, topology._entity_classes)
+    assert np.array_equal(ltopology._plex_renumbering.indices,
+                          topology._plex_renumbering.indices)
+    assert np.array_equal(ltopology.cell_closure, topology.cell_closure)
+    assert np.array_equal(ltopology.exterior_facets.facet_cell,
+                          topology.exterior_facets.facet_cell)
+    assert np.array_equal(ltopology.interior_facets.facet_cell,
+                          topology.interior_facets.facet_cell)
+    assert np.array_equal(ltopology.exterior_facets.unique_markers,
+                          topology.exterior_facets.unique_markers)
+    assert np.allclose(loaded.coordinates.dat.data_ro,
+                       mesh.coordinates.dat.data_ro)
+
+    # Same topology and numbering, so the same discrete solution.
+    assert np.allclose(poisson(loaded).dat.data_ro, poisson(mesh).dat.data_ro)
+
+
+def test_save_load_mesh(quadrilateral, meshfile):
+    run_save_load(quadrilateral, meshfile)
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_save_load_mesh_parallel(quadrilateral, meshfile):
+    run_save_load(quadrilateral, meshfile)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_load_mesh_process_mismatch(meshfile):
+    if COMM_WORLD.rank == 0:
+        mesh = UnitSquareMesh(2, 2, comm=COMM_SELF)
+        mesh.topology.save(meshfile)
+    COMM_WORLD.barrier()
+    with pytest.raises(ValueError):
+        Mesh(meshfile)
+
+
+def test_save_extruded_mesh_fails(meshfile):
+    UnitSquareMesh(2, 2).topology.save(meshfile)
+    with open(meshfile, "rb") as f:
+        saved = f.read()
+    mesh = ExtrudedMesh(UnitIntervalMesh(2), 2)
+    with pytest.raises(NotImplementedError):
+        mesh.topology.save(meshfile)
+    # The existing file is untouched
+    with open(meshfile, "rb") as f:
+        assert f.read() == saved
+
+
+def run_save_load_hierarchy(meshfile):
+    mesh = UnitSquareMesh(3, 3)
+    mh = MeshHierarchy(mesh, 2, refinements_per_level=2)
+    mh.save(meshfile)
+
+    loaded = HierarchyBase.load(meshfile)
+    assert len(loaded) == len(mh)
+    assert loaded.refinements_per_level == mh.refinements_per_level
+    assert loaded.nested
+    for m, lm in zip(mh._meshes, loaded._meshes):
+        assert np.array_equal(lm.topology.cell_closure, m.topology.cell_closure)
+        assert np.allclose(lm.coordinates.dat.data_ro, m.coordinates.dat.data_ro)
+    for level, c2f in mh.coarse_to_fine_cells.items():
+        assert np.array_equal(loaded.coarse_to_fine_cells[level], c2f)
+    for level, f2c in mh.fine_to_coarse_cells.items():
+        if f2c is None:
+            assert loaded.fine_to_coarse_cells[level] is None
+        else:
+            assert np.array_equal(loaded.fine_to_coarse_cells[level], f2c)
+
+    def prolonged(hierarchy):
+        Vc = FunctionSpace(hierarchy[0], "CG", 2)
+        Vf = FunctionSpace(hierarchy[-1], "CG", 2)
+        x, y = SpatialCoordinate(hierarchy[0])
+        uc = interpolate(x*y, Vc)
+        uf = Function(Vf)
+        prolong(uc, uf)
+        return uf.dat.data_ro
+
+    assert np.allclose(prolonged(loaded), prolonged(mh))
+
+
+def test_save_load_mesh_hierarchy(meshfile):
+    run_save_load_hierarchy(meshfile)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_save_load_mesh_hierarchy_parallel(meshfile):
+    run_save_load_hierarchy(meshfile)
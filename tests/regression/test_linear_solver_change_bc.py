@@ -30,3 +30,57 @@ def test_linear_solver_change_bc():
 
     solver.solve(uh, b)
     assert numpy.allclose(uh.dat.data_ro, bc.function_arg.dat.data_ro)
+
+
+def test_linear_solver_lifting_cached():
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "P", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+
+    k = Constant(1)
+    a = k*dot(grad(u), grad(v))*dx
+
+    g = Constant(1)
+    bc = DirichletBC(V, g, "on_boundary")
+
+    A = assemble(a, bcs=bc)
+    b = assemble(v*dx)
+
+    solver = LinearSolver(A, solver_parameters={"ksp_type": "preonly",
+                                                "pc_type": "lu"})
+    u, update, lift, blift = solver._rhs
+    calls = []
+
+    def counted():
+        calls.append(None)
+        update()
+
+    solver._rhs = (u, counted, lift, blift)
+
+    uh = Function(V)
+    solver.solve(uh, b)
+    expect = uh.copy(deepcopy=True)
+    solver.solve(uh, b)
+    assert len(calls) == 1
+    assert numpy.allclose(uh.dat.data_ro, expect.dat.data_ro)
+
+    # New boundary values
+    g.assign(2)
+    solver.solve(uh, b)
+    assert len(calls) == 2
+    assert numpy.allclose(uh.dat.data_ro[bc.nodes], 2)
+
+    # New operator
+    k.assign(2)
+    assemble(a, bcs=bc, tensor=A)
+    solver.solve(uh, b)
+    assert len(calls) == 3
+    assert numpy.allclose(uh.dat.data_ro[bc.nodes], 2)
+
+    # New coordinates
+    mesh.coordinates.dat.data[:] *= 2
+    assemble(a, bcs=bc, tensor=A)
+    solver.solve(uh, b)
+    assert len(calls) == 4
+    assert numpy.allclose(uh.dat.data_ro[bc.nodes], 2)
@@ -127,6 +127,180 @@ def test_matrixfree_action(a, V, bcs):
     assert np.allclose(expect.dat.data_ro, actual.dat.data_ro)
 
 
+def run_matrixfree_action_vecs(a, V, bcs, fcp=None):
+    # Apply the operators to vectors that are not the storage of any
+    # function, the input must not be modified.
+    f = Function(V)
+    x = SpatialCoordinate(V.mesh())
+    if V.shape == ():
+        f.interpolate(x[0]*sin(x[1]*2*pi))
+    else:
+        f.interpolate(as_vector([x[0]*sin(x[1]*2*pi),
+                                 x[1]*cos(x[0]*2*pi)]))
+    A = assemble(a, bcs=bcs)
+    A.force_evaluation()
+    Amf = assemble(a, mat_type="matfree", bcs=bcs,
+                   form_compiler_parameters=fcp)
+    Amf.force_evaluation()
+
+    with f.dat.vec_ro as v:
+        X = v.duplicate()
+        v.copy(X)
+    for op in ("mult", "multTranspose"):
+        expect = X.duplicate()
+        actual = X.duplicate()
+        getattr(A.petscmat, op)(X, expect)
+        getattr(Amf.petscmat, op)(X, actual)
+        assert np.allclose(expect.array_r, actual.array_r)
+        with f.dat.vec_ro as v:
+            assert np.array_equal(X.array_r, v.array_r)
+
+
+@pytest.mark.parametrize("bcs", [False, True],
+                         ids=["no bcs", "bcs"])
+def test_matrixfree_action_vecs(a, V, bcs):
+    bcs = DirichletBC(V, zero(V.shape), (1, 2)) if bcs else None
+    run_matrixfree_action_vecs(a, V, bcs)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_matrixfree_action_vecs_parallel(mesh):
+    V = FunctionSpace(mesh, "CG", 2)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    a = inner(grad(u), grad(v))*dx
+    run_matrixfree_action_vecs(a, V, DirichletBC(V, 0, (1, 2)))
+
+
+@pytest.mark.parametrize("mode", ["spectral", "vanilla"])
+def test_matrixfree_action_tensor_product(mode):
+    mesh = ExtrudedMesh(UnitSquareMesh(2, 2, quadrilateral=True), 2)
+    V = FunctionSpace(mesh, "Q", 3)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    a = inner(grad(u), grad(v))*dx + inner(u, v)*dx
+    bcs = DirichletBC(V, 0, "bottom")
+    run_matrixfree_action_vecs(a, V, bcs, fcp={"mode": mode})
+
+
+def test_action_parameters():
+    from firedrake.tsfc_interface import action_parameters
+    quad = UnitSquareMesh(1, 1, quadrilateral=True)
+    tri = UnitSquareMesh(1, 1)
+    prism = ExtrudedMesh(tri, 1)
+    for mesh, mode in [(quad, "spectral"), (prism, "spectral"), (tri, None)]:
+        L = TestFunction(FunctionSpace(mesh, "CG", 1))*dx
+        assert action_parameters(L).get("mode") == mode
+        assert action_parameters(L, {"mode": "vanilla"})["mode"] == "vanilla"
+
+
+def run_matrixfree_diagonal(a, V, bcs):
+    A = assemble(a, bcs=bcs, mat_type="aij")
+    A.force_evaluation()
+    Amf = assemble(a, bcs=bcs, mat_type="matfree")
+    Amf.force_evaluation()
+    expect, actual = A.petscmat.createVecs()
+    A.petscmat.getDiagonal(expect)
+    Amf.petscmat.getDiagonal(actual)
+    assert np.allclose(expect.array_r, actual.array_r)
+
+
+@pytest.mark.parametrize("bcs", [False, True],
+                         ids=["no bcs", "bcs"])
+def test_matrixfree_diagonal(a, V, bcs):
+    bcs = DirichletBC(V, zero(V.shape), (1, 2)) if bcs else None
+    run_matrixfree_diagonal(a, V, bcs)
+
+
+def test_matrixfree_diagonal_mixed(mesh):
+    W = VectorFunctionSpace(mesh, "CG", 2)*FunctionSpace(mesh, "CG", 1)
+    u, p = TrialFunctions(W)
+    v, q = TestFunctions(W)
+    a = (inner(grad(u), grad(v)) + inner(p, q) - inner(p, div(v)) + inner(div(u), q))*dx
+    bcs = [DirichletBC(W.sub(0).sub(1), 0, 1), DirichletBC(W.sub(1), 0, 2)]
+    run_matrixfree_diagonal(a, W, bcs)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_matrixfree_diagonal_parallel(mesh):
+    V = VectorFunctionSpace(mesh, "CG", 2)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    a = inner(grad(u), grad(v))*dx + inner(u("+"), v("+"))*dS
+    run_matrixfree_diagonal(a, V, DirichletBC(V.sub(0), 0, (1, 3)))
+
+
+def test_matrixfree_jacobi(V, a, L, bcs):
+    def solve_jacobi(mat_type):
+        u = Function(V)
+        problem = LinearVariationalProblem(a, L, u, bcs=bcs)
+        solver = LinearVariationalSolver(problem,
+                                         solver_parameters={"mat_type": mat_type,
+                                                            "ksp_type": "cg",
+                                                            "pc_type": "jacobi",
+                                                            "ksp_rtol": 1e-10})
+        solver.solve()
+        return u, solver.snes.ksp.getIterationNumber()
+
+    u, its = solve_jacobi("aij")
+    umf, itsmf = solve_jacobi("matfree")
+    assert its == itsmf
+    assert np.allclose(u.dat.data_ro, umf.dat.data_ro)
+
+
+def run_vec_storage():
+    from firedrake.function import vec_storage
+    from pyop2 import op2
+    mesh = UnitSquareMesh(2, 2)
+    W = FunctionSpace(mesh, "CG", 1)*FunctionSpace(mesh, "DG", 0)
+    f = Function(W)
+    f.assign(1)
+    with f.dat.vec_ro as v:
+        X = v.duplicate()
+    X.set(2)
+    with vec_storage(f, X, op2.READ):
+        assert np.allclose(f.dat.data_ro[0], 2)
+        assert np.allclose(f.dat.data_ro[1], 2)
+    assert np.allclose(X.array_r, 2)
+
+    with vec_storage(f, X, op2.WRITE):
+        f.sub(1).assign(3)
+    assert np.allclose(X.array_r[-f.dat.split[1].data_ro.shape[0]:], 3)
+
+
+def test_vec_storage():
+    run_vec_storage()
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_vec_storage_parallel():
+    run_vec_storage()
+
+
+@pytest.mark.parametrize("bcs", [False, True])
+def test_matrix_free_mult_overwrites_output(bcs):
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    a = inner(grad(u), grad(v))*dx + inner(u, v)*dx
+    bcs = DirichletBC(V, 0, 1) if bcs else None
+    A = assemble(a, bcs=bcs, mat_type="aij").petscmat
+    Amf = assemble(a, bcs=bcs, mat_type="matfree").petscmat
+
+    X, Y = A.createVecs()
+    X.setRandom()
+    expect = Y.duplicate()
+    A.mult(X, expect)
+    # The result must not depend on what was in the output Vec.
+    Y.set(1e10)
+    Amf.mult(X, Y)
+    assert np.allclose(Y.array_r, expect.array_r)
+    Y.set(-1e10)
+    Amf.multTranspose(X, Y)
+    assert np.allclose(Y.array_r, expect.array_r)
+
+
 @pytest.mark.parametrize("preassembled", [False, True],
                          ids=["variational", "preassembled"])
 @pytest.mark.parametrize("parameters",
@@ -223,6 +397,49 @@ def test_matrix_free_preassembly_change_bcs(mesh):
     assert np.allclose(u.vector().array(), 6.0)
 
 
+def test_matrixfree_submatrix_cached(mesh):
+    V = FunctionSpace(mesh, "CG", 1)
+    Q = FunctionSpace(mesh, "CG", 2)
+    W = V*Q
+    u, p = TrialFunctions(W)
+    v, q = TestFunctions(W)
+    c = Function(V).assign(1)
+    a = c*inner(u, v)*dx + inner(p, q)*dx + inner(u, q)*dx
+
+    A = assemble(a, mat_type="matfree")
+    ctx = A.petscmat.getPythonContext()
+    iset = W.dof_dset.field_ises[0]
+
+    def submatrix():
+        return A.petscmat.createSubMatrix(iset, iset)
+
+    sub = submatrix()
+    assert submatrix().getPythonContext() is sub.getPythonContext()
+
+    def check(bcs):
+        Asub = assemble(c*inner(TrialFunction(V), TestFunction(V))*dx,
+                        bcs=bcs, mat_type="aij").M.handle
+        x, y = sub.createVecs()
+        x.setRandom()
+        expect = y.duplicate()
+        sub.mult(x, y)
+        Asub.mult(x, expect)
+        assert np.allclose(y.array_r, expect.array_r)
+
+    check(None)
+    # Coefficients are shared with the parent operator
+    c.assign(2)
+    check(None)
+
+    bc = DirichletBC(W.sub(0), 0, 1)
+    ctx.row_bcs = [bc]
+    ctx.col_bcs = [bc]
+    sub = submatrix()
+    assert sub.getPythonContext() is ctx._sub_contexts[(0, ), (0, )][0]
+    assert len(sub.getPythonContext().row_bcs) == 1
+    check(DirichletBC(V, 0, 1))
+
+
 @pytest.mark.parallel(nprocs=4)
 def test_matrix_free_split_communicators():
 
@@ -0,0 +1,49 @@
+import json
+import pytest
+from firedrake import *
+from firedrake.memory import categories
+
+
+def run_memory_usage():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 2)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    f = Function(V, name="big_function")
+    A = assemble(inner(u, v)*dx, mat_type="aij")
+    A.force_evaluation()
+
+    usage = memory_usage()
+    assert tuple(usage.local) == categories
+    assert all(usage.local[c] <= usage.max[c] <= usage.total[c] for c in categories)
+    for c in ("mesh", "function_space_data", "functions", "matrices", "kernel_caches"):
+        assert usage.local[c] > 0
+
+    names = [name for category, name, nbytes in usage.objects
+             if category == "functions"]
+    assert "big_function" in names
+    nbytes, = [n for category, name, n in usage.objects
+               if name == "big_function"]
+    assert nbytes == f.dat.data_ro_with_halos.nbytes
+    assert usage.local["matrices"] >= A.petscmat.getInfo()["nz_used"] * 8
+
+    json.dumps(usage.as_dict())
+    assert len(usage.largest(3)) == 3
+    return usage
+
+
+def test_memory_usage():
+    run_memory_usage()
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_memory_usage_parallel():
+    usage = run_memory_usage()
+    assert usage.total["functions"] > usage.local["functions"]
+
+
+def test_log_memory_usage():
+    mesh = UnitSquareMesh(2, 2)
+    Function(FunctionSpace(mesh, "CG", 1))
+    usage = log_memory_usage(level=DEBUG)
+    assert usage.local["functions"] > 0
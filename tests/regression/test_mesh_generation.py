@@ -415,3 +415,76 @@ def test_changing_default_reorder_works(reorder):
         assert m._did_reordering == reorder
     finally:
         parameters["reorder_meshes"] = old_reorder
+
+
+@pytest.mark.parametrize("reorder",
+                         sorted(mesh_reorderings))
+def test_reordering_strategies(reorder):
+    m = UnitSquareMesh(4, 4, reorder=reorder)
+    m.init()
+
+    assert m._did_reordering
+    assert abs(integrate_one(m) - 1) < 1e-12
+
+
+def test_custom_reordering():
+    def reverse(plex):
+        return np.arange(*plex.getHeightStratum(0))[::-1]
+
+    m = UnitSquareMesh(4, 4, reorder=reverse)
+    m.init()
+
+    assert m._did_reordering
+    assert abs(integrate_one(m) - 1) < 1e-12
+
+
+def test_unknown_reordering_raises():
+    with pytest.raises(ValueError):
+        UnitSquareMesh(1, 1, reorder="not_an_ordering")
+
+
+@pytest.mark.parallel(nprocs=2)
+@pytest.mark.parametrize("reorder",
+                         sorted(mesh_reorderings))
+def test_reordering_strategies_parallel(reorder):
+    m = UnitCubeMesh(3, 3, 3, reorder=reorder)
+    assert abs(integrate_one(m) - 1) < 1e-12
+
+
+@pytest.mark.parallel(nprocs=3)
+@pytest.mark.parametrize(("kwargs", "ncells"),
+                         [({"quadrilateral": True}, 35),
+                          ({"diagonal": "left"}, 70),
+                          ({"diagonal": "right"}, 70),
+                          ({"diagonal": "crossed"}, 140)],
+                         ids=["quadrilateral", "left", "right", "crossed"])
+def test_rectangle_block_construction(kwargs, ncells):
+    m = RectangleMesh(7, 5, 2, 3, distribution_parameters={"partition": "block"},
+                      **kwargs)
+    assert abs(integrate_one(m) - 6) < 1e-10
+    assert m.comm.allreduce(m.cell_set.size) == ncells
+    for marker, length in zip((1, 2, 3, 4), (3, 3, 2, 2)):
+        assert abs(assemble(Constant(1)*ds(marker, domain=m)) - length) < 1e-10
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_box_block_construction():
+    m = BoxMesh(4, 3, 5, 1, 2, 3, distribution_parameters={"partition": "block"})
+    assert abs(integrate_one(m) - 6) < 1e-10
+    assert m.comm.allreduce(m.cell_set.size) == 6*4*3*5
+    for marker, area in zip(range(1, 7), (6, 6, 3, 3, 2, 2)):
+        assert abs(assemble(Constant(1)*ds(marker, domain=m)) - area) < 1e-10
+    # No facets on process boundaries are exterior
+    assert abs(assemble(Constant(1)*ds(domain=m)) - 22) < 1e-10
+
+
+@pytest.mark.parallel(nprocs=2)
+@pytest.mark.parametrize("construct",
+                         [lambda dp: IntervalMesh(8, 1, distribution_parameters=dp),
+                          lambda dp: PeriodicRectangleMesh(4, 4, 1, 1, distribution_parameters=dp),
+                          lambda dp: IcosahedralSphereMesh(1, 1, distribution_parameters=dp),
+                          lambda dp: CubedSphereMesh(1, 1, distribution_parameters=dp)],
+                         ids=["interval", "periodic-rectangle", "icosahedral", "cubed-sphere"])
+def test_block_construction_unsupported(construct):
+    with pytest.raises(ValueError):
+        construct({"partition": "block"})
@@ -0,0 +1,62 @@
+from firedrake import *
+import json
+import os
+import pytest
+
+
+@pytest.fixture
+def reports():
+    parameters["performance_reports"] = True
+    yield
+    parameters["performance_reports"] = False
+
+
+def run_performance_report(tmpdir):
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V)
+    v = TestFunction(V)
+    F = inner((1 + u**2)*grad(u), grad(v))*dx - v*dx
+    bc = DirichletBC(V, 0, "on_boundary")
+    solver = NonlinearVariationalSolver(NonlinearVariationalProblem(F, u, bcs=bc),
+                                        solver_parameters={"snes_type": "newtonls",
+                                                           "ksp_type": "cg",
+                                                           "pc_type": "jacobi"})
+    assert solver.report is None
+    solver.solve()
+    report = solver.report
+    assert isinstance(report, SolveReport)
+    assert report.snes_iterations == solver.snes.getIterationNumber()
+    assert report.ksp_iterations == solver.snes.getLinearSolveIterations()
+    assert report.converged_reason > 0
+    assert report.events["residual_assembly"]["count"] >= report.snes_iterations
+    assert report.events["jacobian_assembly"]["count"] == report.snes_iterations
+    assert report.events["bcs"]["count"] > 0
+    assert report.bytes_assembled > 0
+    for event in report.events.values():
+        assert event["max_time"] >= event["time"] >= 0
+    assert report.time >= report.events["residual_assembly"]["time"]
+
+    filename = os.path.join(str(tmpdir), "report_%d.json" % mesh.comm.rank)
+    report.write_json(filename)
+    with open(filename) as f:
+        assert json.load(f) == report.as_dict()
+
+
+def test_performance_report(reports, tmpdir):
+    run_performance_report(tmpdir)
+
+
+@pytest.mark.parallel(nprocs=2)
+def test_performance_report_parallel(reports, tmpdir):
+    run_performance_report(tmpdir)
+
+
+def test_performance_report_off():
+    mesh = UnitIntervalMesh(4)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V)
+    v = TestFunction(V)
+    solver = NonlinearVariationalSolver(NonlinearVariationalProblem((u - 1)*v*dx, u))
+    solver.solve()
+    assert solver.report is None
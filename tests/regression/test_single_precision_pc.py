@@ -0,0 +1,85 @@
+from firedrake import *
+from firedrake.petsc import PETSc
+from firedrake.preconditioners.precision import SinglePrecisionMatrix, preconditioner_matrix
+import pytest
+import numpy as np
+
+
+@pytest.fixture
+def problem():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 2)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    x, y = SpatialCoordinate(mesh)
+    a = inner(grad(u), grad(v))*dx + u*v*dx
+    L = sin(pi*x)*sin(pi*y)*v*dx
+    return a, L, V
+
+
+def run_single_precision_matrix(problem):
+    a, _, V = problem
+    A = assemble(a, mat_type="aij").petscmat
+    ctx = SinglePrecisionMatrix(A)
+    x, y = A.createVecs()
+    x.setRandom()
+    expect = y.duplicate()
+    A.mult(x, expect)
+    ctx.mult(None, x, y)
+    assert np.allclose(y.array_r, expect.array_r, rtol=1e-6)
+
+    d = y.duplicate()
+    ctx.getDiagonal(None, d)
+    assert np.allclose(d.array_r, A.getDiagonal().array_r)
+
+
+def test_single_precision_matrix(problem):
+    run_single_precision_matrix(problem)
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_single_precision_matrix_parallel(problem):
+    run_single_precision_matrix(problem)
+
+
+@pytest.mark.parametrize("pc_type", ["AssembledPC", "P1PC"])
+def test_single_precision_pc(problem, pc_type):
+    a, L, V = problem
+    prefix = {"AssembledPC": "assembled_", "P1PC": "lo_"}[pc_type]
+
+    def solve_with(precision):
+        uh = Function(V)
+        parameters = {"mat_type": "matfree",
+                      "ksp_type": "fgmres",
+                      "ksp_rtol": 1e-10,
+                      "pc_type": "python",
+                      "pc_python_type": "firedrake.%s" % pc_type,
+                      prefix + "mat_type": "aij",
+                      prefix + "mat_precision": precision,
+                      prefix + "pc_type": "ksp",
+                      prefix + "ksp_ksp_type": "chebyshev",
+                      prefix + "ksp_ksp_max_it": 3,
+                      prefix + "ksp_pc_type": "jacobi"}
+        solver = LinearVariationalSolver(LinearVariationalProblem(a, L, uh),
+                                         solver_parameters=parameters)
+        solver.solve()
+        return uh, solver.snes.ksp.getIterationNumber()
+
+    u_double, its_double = solve_with("double")
+    u_single, its_single = solve_with("single")
+    assert np.allclose(u_single.dat.data_ro, u_double.dat.data_ro)
+    assert abs(its_single - its_double) <= 2
+
+
+def test_single_precision_factorisation_fails(problem):
+    a, _, _ = problem
+    A = assemble(a, mat_type="aij")
+    options = PETSc.Options()
+    options["single_mat_precision"] = "single"
+    options["single_pc_type"] = "lu"
+    try:
+        with pytest.raises(ValueError):
+            preconditioner_matrix(A, "single_")
+    finally:
+        options.delValue("single_mat_precision")
+        options.delValue("single_pc_type")
@@ -2,6 +2,7 @@ import pytest
 from firedrake import *
 from firedrake.petsc import PETSc
 from numpy.linalg import norm as np_norm
+import numpy as np
 import gc
 
 
@@ -205,3 +206,222 @@ def test_quasinewton_ops_assembled():
     solver = NonlinearVariationalSolver(problem, solver_parameters=solver_parameters)
 
     assert solver.snes.ksp.pc.getOperators()[0].assembled
+
+
+@pytest.fixture
+def solver_cache():
+    parameters["solver_cache_size"] = 2
+    yield
+    parameters["solver_cache_size"] = 0
+
+
+def test_solver_cache(solver_cache):
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    c = Constant(1)
+    f = Function(V)
+    out = Function(V)
+    params = {"ksp_type": "preonly", "pc_type": "lu"}
+
+    for value in [1, 2, 4]:
+        c.assign(value)
+        f.assign(value)
+        # A new form each call, with the same coefficients.
+        solve(c*u*v*dx == f*v*dx, out, solver_parameters=params)
+        assert np.allclose(out.dat.data_ro, 1)
+    assert len(out._solver_cache) == 1
+
+    # A different coefficient gets a new solver
+    g = Function(V).assign(2)
+    solve(c*u*v*dx == g*v*dx, out, solver_parameters=params)
+    assert np.allclose(out.dat.data_ro, 0.5)
+    assert len(out._solver_cache) == 2
+
+    # Older solvers are evicted
+    solve(u*v*dx == g*v*dx, out, solver_parameters=params)
+    assert np.allclose(out.dat.data_ro, 2)
+    assert len(out._solver_cache) == 2
+
+
+def test_solver_cache_coordinates_changed(solver_cache):
+    mesh = UnitSquareMesh(2, 2)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    x, _ = SpatialCoordinate(mesh)
+    out = Function(V)
+    params = {"ksp_type": "preonly", "pc_type": "lu"}
+
+    solve(u*v*dx == x*v*dx, out, solver_parameters=params)
+    assert np.allclose(out.dat.data_ro, mesh.coordinates.dat.data_ro[:, 0])
+    # The mass matrix depends on the coordinates
+    mesh.coordinates.dat.data[:] *= 2
+    solve(u*v*dx == x*v*dx, out, solver_parameters=params)
+    assert len(out._solver_cache) == 1
+    assert np.allclose(out.dat.data_ro, mesh.coordinates.dat.data_ro[:, 0])
+
+
+def test_solver_cache_gced(solver_cache, a_L_out):
+    a, L, out = a_L_out
+    # The fixture keeps its function alive
+    out = Function(out.function_space())
+
+    gc.collect()
+    before = howmany(LinearVariationalSolver)
+
+    solve(a == L, out)
+    solve(a == L, out)
+    out.dat.data_ro
+    gc.collect()
+    assert howmany(LinearVariationalSolver) == before + 1
+
+    del out
+    gc.collect()
+    assert howmany(LinearVariationalSolver) == before
+
+
+@pytest.mark.parametrize("ksp_type", ["preonly", "cg"])
+def test_solve_many(ksp_type):
+    mesh = UnitSquareMesh(4, 4)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = TrialFunction(V)
+    v = TestFunction(V)
+    x, y = SpatialCoordinate(mesh)
+    a = inner(grad(u), grad(v))*dx
+    bc = DirichletBC(V, x, 1)
+    Ls = [sin(k*x)*v*dx for k in range(1, 5)]
+    params = {"ksp_type": ksp_type, "pc_type": "lu", "ksp_rtol": 1e-12}
+
+    expect = []
+    for L in Ls:
+        uh = Function(V)
+        solve(a == L, uh, bcs=bc, solver_parameters=params)
+        expect.append(uh)
+
+    A = assemble(a, bcs=bc)
+    solver = LinearSolver(A, solver_parameters=params)
+    us = [Function(V) for _ in Ls]
+    solver.solve_many(us, [assemble(L) for L in Ls])
+    for uh, e in zip(us, expect):
+        assert np.allclose(uh.dat.data_ro, e.dat.data_ro)
+
+    out = Function(V)
+    problem = LinearVariationalProblem(a, Ls[0], out, bcs=bc)
+    lvs = LinearVariationalSolver(problem, solver_parameters=params)
+    us = [Function(V) for _ in Ls]
+    lvs.solve_many(us, Ls)
+    for uh, e in zip(us, expect):
+        assert np.allclose(uh.dat.data_ro, e.dat.data_ro)
+    # The KSP (and preconditioner) of the nonlinear solver is shared
+    assert lvs._linear_solver.ksp.handle == lvs.snes.ksp.handle
+    lvs.solve()
+    assert np.allclose(out.dat.data_ro, expect[0].dat.data_ro)
+
+    with pytest.raises(ValueError):
+        solver.solve_many(us[:1], [assemble(L) for L in Ls])
+
+
+def test_jacobian_reuse():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V)
+    v = TestFunction(V)
+    f = Constant(1)
+    F = inner((1 + 0.1*u**2)*grad(u), grad(v))*dx - f*v*dx
+    bc = DirichletBC(V, 0, "on_boundary")
+    params = {"snes_type": "newtonls",
+              "snes_rtol": 1e-10,
+              "ksp_type": "cg",
+              "pc_type": "icc"}
+
+    def run(jacobian_reuse):
+        u.assign(0)
+        problem = NonlinearVariationalProblem(F, u, bcs=bc)
+        solver = NonlinearVariationalSolver(problem, solver_parameters=params,
+                                            jacobian_reuse=jacobian_reuse)
+        for value in [1, 1.1, 1.2]:
+            f.assign(value)
+            solver.solve()
+        return solver, u.copy(deepcopy=True)
+
+    solver, expect = run(None)
+    assert solver.jacobian_reuses == 0
+    assemblies = solver.jacobian_assemblies
+
+    solver, uh = run(100)
+    assert solver.jacobian_reuses > 0
+    assert solver.jacobian_assemblies < assemblies
+    assert np.allclose(uh.dat.data_ro, expect.dat.data_ro)
+
+    # A budget that is never met reassembles every time
+    solver, uh = run(0)
+    assert solver.jacobian_reuses == 0
+    assert solver.jacobian_assemblies == assemblies
+
+
+def test_jacobian_reuse_direct_solver():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V)
+    v = TestFunction(V)
+    F = inner((1 + u**2)*grad(u), grad(v))*dx - 20*v*dx
+    bc = DirichletBC(V, 0, "on_boundary")
+    params = {"snes_type": "newtonls",
+              "snes_rtol": 1e-10,
+              "ksp_type": "preonly",
+              "pc_type": "lu"}
+
+    def run(jacobian_reuse):
+        u.assign(0)
+        problem = NonlinearVariationalProblem(F, u, bcs=bc)
+        solver = NonlinearVariationalSolver(problem, solver_parameters=params,
+                                            jacobian_reuse=jacobian_reuse)
+        solver.solve()
+        return solver
+
+    solver = run(None)
+    iterations = solver.snes.getIterationNumber()
+    assemblies = solver.jacobian_assemblies
+
+    # A direct solve always takes one iteration, so does not
+    # indicate whether the Jacobian can be reused.
+    solver = run(1)
+    assert solver.jacobian_reuses == 0
+    assert solver.jacobian_assemblies == assemblies
+    assert solver.snes.getIterationNumber() == iterations
+
+
+def test_jacobian_reuse_retry():
+    mesh = UnitSquareMesh(8, 8)
+    V = FunctionSpace(mesh, "CG", 1)
+    u = Function(V)
+    v = TestFunction(V)
+    F = inner((1 + u**2)*grad(u), grad(v))*dx - 20*v*dx
+    bc = DirichletBC(V, 0, "on_boundary")
+    params = {"snes_type": "newtonls",
+              "snes_rtol": 1e-10,
+              "snes_max_it": 10,
+              "ksp_type": "gmres",
+              "ksp_rtol": 1e-12,
+              "pc_type": "ilu"}
+
+    def run(jacobian_reuse):
+        u.assign(0)
+        problem = NonlinearVariationalProblem(F, u, bcs=bc)
+        solver = NonlinearVariationalSolver(problem, solver_parameters=params,
+                                            jacobian_reuse=jacobian_reuse)
+        solver.solve()
+        return solver, u.copy(deepcopy=True)
+
+    solver, expect = run(None)
+    iterations = solver.snes.getIterationNumber()
+
+    # The Jacobian of the initial guess is too far from the Jacobian
+    # at the solution for Newton iterations reusing it to converge, so
+    # the solve is repeated from the initial guess reassembling it.
+    solver, uh = run(100)
+    assert solver.jacobian_reuses > 0
+    assert solver.snes.getIterationNumber() == iterations
+    assert np.allclose(uh.dat.data_ro, expect.dat.data_ro)
@@ -30,6 +30,15 @@ from firedrake import *
                          [(1, "RT", False), (1, "RTCF", True),
                           (2, "RT", False), (2, "RTCF", True)])
 def test_slate_hybridization(degree, hdiv_family, quadrilateral):
+    run_slate_hybridization(degree, hdiv_family, quadrilateral)
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_slate_hybridization_parallel():
+    run_slate_hybridization(2, "RT", False)
+
+
+def run_slate_hybridization(degree, hdiv_family, quadrilateral):
     # Create a mesh
     mesh = UnitSquareMesh(6, 6, quadrilateral=quadrilateral)
     RT = FunctionSpace(mesh, hdiv_family, degree)
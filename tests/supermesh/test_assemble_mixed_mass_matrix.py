@@ -1,6 +1,7 @@
 from firedrake import *
 from firedrake.petsc import PETSc
 from firedrake.supermeshing import *
+import numpy
 import pytest
 
 
@@ -55,3 +56,37 @@ def test_assemble_mixed_mass_matrix(mesh, family_A, family_B, degree_A, degree_B
     M_ex.axpy(-1.0, M)
     nrm = M_ex.norm(PETSc.NormType.NORM_INFINITY)
     assert nrm < 1.0e-10
+
+
+def test_mixed_mass_matrix_cached():
+    mesh_A = UnitSquareMesh(2, 3)
+    mesh_B = UnitSquareMesh(3, 2)
+    V_A = FunctionSpace(mesh_A, "CG", 1)
+    V_B = FunctionSpace(mesh_B, "DG", 1)
+
+    M = mixed_mass_matrix(V_A, V_B)
+    assert mixed_mass_matrix(V_A, V_B) is M
+    assert mixed_mass_matrix(FunctionSpace(mesh_A, "CG", 1), V_B) is M
+    assert mixed_mass_matrix(V_A, FunctionSpace(mesh_B, "DG", 0)) is not M
+
+    # Moving a mesh invalidates the cached matrix
+    mesh_B.coordinates.dat.data[:] *= 2
+    moved = mixed_mass_matrix(V_A, V_B)
+    assert moved is not M
+    expect = assemble_mixed_mass_matrix(V_A, V_B)
+    expect.axpy(-1.0, moved)
+    assert expect.norm(PETSc.NormType.NORM_INFINITY) < 1.0e-10
+
+
+def test_projector_mixed_mass_cached():
+    mesh_A = UnitSquareMesh(2, 3)
+    mesh_B = UnitSquareMesh(3, 2)
+    f = Function(FunctionSpace(mesh_A, "CG", 1)).assign(1)
+    projector = Projector(f, FunctionSpace(mesh_B, "DG", 1))
+
+    M = projector.mixed_mass
+    assert projector.mixed_mass is M
+    assert numpy.allclose(projector.project().dat.data_ro, 1)
+
+    mesh_A.coordinates.dat.data[:] *= 2
+    assert projector.mixed_mass is not M
@@ -82,3 +82,30 @@ def test_project_parallel(hierarchy, coarse, fine):
     actual = assemble(actual*dx)
 
     assert numpy.allclose(expect, actual)
+
+
+def run_project_unrelated(coarse, fine):
+    # No hierarchy, and the meshes are distributed independently
+    cmesh = UnitSquareMesh(3, 4, diagonal="left")
+    fmesh = RectangleMesh(7, 5, 1, 1, diagonal="crossed")
+
+    Vc = FunctionSpace(cmesh, *coarse)
+    Vf = FunctionSpace(fmesh, *fine)
+
+    c = Function(Vc)
+    x, y = SpatialCoordinate(cmesh)
+    c.interpolate(x**2 + x*y)
+    expect = assemble(c*dx)
+
+    actual = assemble(project(c, Vf)*dx)
+
+    assert numpy.allclose(expect, actual)
+
+
+def test_project_unrelated(coarse, fine):
+    run_project_unrelated(coarse, fine)
+
+
+@pytest.mark.parallel(nprocs=3)
+def test_project_unrelated_parallel(coarse, fine):
+    run_project_unrelated(coarse, fine)